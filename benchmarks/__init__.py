@@ -0,0 +1,26 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Speed benchmarks for the simulation engine.
+
+Run the suite and store the results for the current commit with::
+
+    python -m benchmarks.runner run
+
+and flag regressions between two stored runs with::
+
+    python -m benchmarks.runner compare <old commit> <new commit>
+"""
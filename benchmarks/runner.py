@@ -0,0 +1,207 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Run the benchmark suite and compare stored results.
+
+Results are written as JSON, by default to .benchmarks/<commit>.json, so
+that runs on different commits can be compared::
+
+    python -m benchmarks.runner run [-k algorithm_run] [-r 5]
+    python -m benchmarks.runner compare HEAD~1 HEAD [-t 0.1]
+
+compare exits with status 1 if any case got slower by more than the
+threshold.
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+import numpy as np
+
+from benchmarks.suite import BENCHMARKS, case_key, iter_cases
+
+RESULTS_DIR = '.benchmarks'
+
+
+def git_commit(rev='HEAD'):
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', rev],
+            stderr=subprocess.STDOUT,
+        ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_case(func, params, repeat):
+    """
+    Set up a benchmark case and time @repeat calls to it, after a warm up
+    call.
+    """
+    run = func(**params)
+    run()
+    times = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        run()
+        times.append(timeit.default_timer() - start)
+    return times
+
+
+def run_suite(names=None, repeat=5, log=None):
+    """
+    Run the benchmarks whose names contain any of @names, all of them by
+    default, and return the results document.
+    """
+    benchmarks = [bm for name, bm in BENCHMARKS.items()
+                  if not names or any(n in name for n in names)]
+
+    results = {}
+    for bm, params in iter_cases(benchmarks):
+        key = case_key(bm.name, params)
+        times = time_case(bm.func, params, repeat)
+        results[key] = {
+            'name': bm.name,
+            'params': params,
+            'times': times,
+            'min': min(times),
+            'median': float(np.median(times)),
+        }
+        if log is not None:
+            log('{key}: {median:.6f}s'.format(key=key, **results[key]))
+
+    return {
+        'commit': git_commit(),
+        'date': datetime.datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def results_path(ref):
+    """
+    Resolve @ref, either a path to a results file or a git revision whose
+    results were stored in RESULTS_DIR.
+    """
+    if os.path.isfile(ref):
+        return ref
+    commit = git_commit(ref) or ref
+    return os.path.join(RESULTS_DIR, commit + '.json')
+
+
+def compare(old, new, threshold=0.1, stat='median'):
+    """
+    Compare two results documents.
+
+    Returns a list of (key, old time, new time, ratio) for every case run in
+    both, sorted by ratio, and the subset of those whose ratio is over
+    1 + @threshold.
+    """
+    old_results = old['results']
+    new_results = new['results']
+
+    rows = []
+    for key in sorted(set(old_results) & set(new_results)):
+        old_time = old_results[key][stat]
+        new_time = new_results[key][stat]
+        ratio = new_time / old_time if old_time else float('inf')
+        rows.append((key, old_time, new_time, ratio))
+
+    rows.sort(key=lambda row: row[3], reverse=True)
+    regressions = [row for row in rows if row[3] > 1 + threshold]
+    return rows, regressions
+
+
+def cmd_run(args):
+    doc = run_suite(args.k, args.repeat, log=print)
+
+    path = args.output
+    if path is None:
+        if not os.path.isdir(RESULTS_DIR):
+            os.makedirs(RESULTS_DIR)
+        path = os.path.join(RESULTS_DIR, (doc['commit'] or 'unknown') +
+                            '.json')
+
+    with open(path, 'w') as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+    print('Wrote {path}'.format(path=path))
+    return 0
+
+
+def cmd_compare(args):
+    with open(results_path(args.old)) as f:
+        old = json.load(f)
+    with open(results_path(args.new)) as f:
+        new = json.load(f)
+
+    rows, regressions = compare(old, new, args.threshold, args.stat)
+    for key, old_time, new_time, ratio in rows:
+        flag = ' REGRESSION' if ratio > 1 + args.threshold else ''
+        print('{ratio:6.2f}x {old:.6f}s -> {new:.6f}s {key}{flag}'.format(
+            ratio=ratio, old=old_time, new=new_time, key=key, flag=flag))
+
+    if regressions:
+        print('{n} of {total} cases regressed by more than {pct:.0%}'.format(
+            n=len(regressions), total=len(rows), pct=args.threshold))
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run and compare the zipline benchmark suite.')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run = subparsers.add_parser('run', help='Run the benchmarks.')
+    run.add_argument('-k', action='append',
+                     help='Only run benchmarks whose name contains K. '
+                          'Can be given more than once.')
+    run.add_argument('-r', '--repeat', type=int, default=5)
+    run.add_argument('-o', '--output',
+                     help='Where to write the results. Defaults to '
+                          '{dir}/<commit>.json'.format(dir=RESULTS_DIR))
+    run.set_defaults(func=cmd_run)
+
+    cmp = subparsers.add_parser('compare',
+                                help='Compare the results of two runs.')
+    cmp.add_argument('old', help='Results file or git revision.')
+    cmp.add_argument('new', help='Results file or git revision.')
+    cmp.add_argument('-t', '--threshold', type=float, default=0.1,
+                     help='Allowed slowdown before a case is flagged, '
+                          'as a fraction.')
+    cmp.add_argument('-s', '--stat', choices=['median', 'min'],
+                     default='median')
+    cmp.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    if not hasattr(args, 'func'):
+        parser.print_help()
+        return 2
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
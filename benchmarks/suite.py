@@ -0,0 +1,251 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+The benchmarks.
+
+Each benchmark is a function decorated with @benchmark, called once per
+combination of its parameters.  It does any setup and returns a callable
+taking no arguments, which is the part that gets timed.  The callable may be
+called several times, so it must not consume its inputs.
+"""
+
+from collections import namedtuple, OrderedDict
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from six import iteritems
+
+from zipline.algorithm import TradingAlgorithm
+from zipline.finance import trading
+from zipline.finance.blotter import Blotter
+from zipline.finance.execution import LimitOrder
+from zipline.finance.risk import RiskMetricsCumulative, RiskReport
+from zipline.history import HistorySpec
+from zipline.history.history_container import HistoryContainer
+from zipline.protocol import BarData, SIDData
+from zipline.sources import DataFrameSource
+from zipline.sources.test_source import create_trade
+from zipline.utils import factory
+from zipline.utils.data import RollingPanel
+
+
+Benchmark = namedtuple('Benchmark', ['name', 'func', 'params'])
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(**params):
+    """
+    Register a benchmark, parametrized by the cartesian product of the
+    values in @params.
+    """
+    def register(func):
+        BENCHMARKS[func.__name__] = Benchmark(func.__name__, func, params)
+        return func
+    return register
+
+
+def iter_cases(benchmarks=None):
+    """
+    Yield (benchmark, params) for every parameter combination of the
+    registered @benchmarks, all of them by default.
+    """
+    for bm in (benchmarks or BENCHMARKS.values()):
+        names = sorted(bm.params)
+        for values in product(*(bm.params[name] for name in names)):
+            yield bm, OrderedDict(zip(names, values))
+
+
+def case_key(name, params):
+    """
+    A stable string identifying a benchmark case, e.g. run[sids=10].
+    """
+    return '{name}[{params}]'.format(
+        name=name,
+        params=','.join('{0}={1}'.format(k, v) for k, v in iteritems(params)),
+    )
+
+
+# Simulations are short so that a full run of the suite stays reasonable.
+DAYS = {'daily': 60, 'minute': 2}
+
+
+def random_prices(index, sids):
+    walk = np.random.randn(len(index), len(sids)).cumsum(axis=0)
+    return pd.DataFrame(100.0 + np.abs(walk), index=index, columns=sids)
+
+
+def sim_params_for(frequency):
+    return factory.create_simulation_parameters(
+        num_days=DAYS[frequency],
+        data_frequency=frequency,
+        emission_rate='daily',
+    )
+
+
+def bars_for(sim_params):
+    if sim_params.data_frequency == 'minute':
+        return trading.environment.minutes_for_days_in_range(
+            sim_params.first_open, sim_params.last_close)
+    return sim_params.trading_days
+
+
+def history_specs_for(bar_count, frequency):
+    spec = HistorySpec(bar_count, '1d', 'price', True, frequency)
+    return {spec.key_str: spec}
+
+
+@benchmark(sids=[1, 10, 100],
+           frequency=['daily', 'minute'],
+           history=[0, 20])
+def algorithm_run(sids, frequency, history):
+    """
+    End to end TradingAlgorithm.run with an algorithm that rebalances an
+    equal weighted portfolio every bar.
+    """
+    np.random.seed(0)
+    sim_params = sim_params_for(frequency)
+    sid_list = list(range(sids))
+    prices = random_prices(bars_for(sim_params), sid_list)
+    sim_params.sids = set(sid_list)
+
+    def initialize(algo):
+        if history:
+            algo.add_history(history, '1d', 'price')
+
+    def handle_data(algo, data):
+        if history:
+            algo.history(history, '1d', 'price')
+        for sid in data:
+            algo.order_target_percent(sid, 1.0 / sids)
+
+    def run():
+        algo = TradingAlgorithm(initialize=initialize,
+                                handle_data=handle_data,
+                                sim_params=sim_params)
+        algo.run(DataFrameSource(prices), overwrite_sim_params=False)
+
+    return run
+
+
+@benchmark(sids=[1, 10, 100],
+           frequency=['daily', 'minute'],
+           bar_count=[5, 50, 200])
+def history_get_history(sids, frequency, bar_count):
+    """
+    HistoryContainer.get_history on a container full of bars.
+    """
+    np.random.seed(0)
+    sim_params = sim_params_for(frequency)
+    sid_list = list(range(sids))
+    specs = history_specs_for(bar_count, frequency)
+    spec = list(specs.values())[0]
+
+    bars = bars_for(sim_params)
+    container = HistoryContainer(specs, sid_list, bars[0], frequency)
+    prices = random_prices(bars, sid_list)
+    for dt, row in prices.iterrows():
+        data = BarData({
+            sid: SIDData(sid, {'dt': dt, 'price': price})
+            for sid, price in row.iteritems()
+        })
+        container.update(data, dt)
+
+    last = bars[-1]
+
+    def run():
+        container.get_history(spec, last)
+
+    return run
+
+
+@benchmark(sids=[1, 10, 100, 1000],
+           window=[30, 390])
+def rolling_panel_add_frame(sids, window):
+    """
+    RollingPanel.add_frame for 1000 frames, which rolls the panel over
+    several times.
+    """
+    np.random.seed(0)
+    items = ['price', 'volume']
+    dates = pd.date_range('2006-01-03', periods=1000, freq='min', tz='UTC')
+    frame = pd.DataFrame(np.random.randn(len(items), sids),
+                         index=items, columns=list(range(sids)))
+
+    def run():
+        panel = RollingPanel(window, items, list(range(sids)))
+        for dt in dates:
+            panel.add_frame(dt, frame)
+
+    return run
+
+
+@benchmark(open_orders=[1, 10, 100, 1000])
+def blotter_process_trade(open_orders):
+    """
+    Blotter.process_trade for a sid with resting limit orders that the
+    trade doesn't fill.
+    """
+    sim_params = sim_params_for('daily')
+    dt = sim_params.first_open
+
+    blotter = Blotter()
+    blotter.current_dt = dt
+    for _ in range(open_orders):
+        blotter.order(0, 100, LimitOrder(1.0))
+
+    trade = create_trade(0, 10.0, 1000, dt)
+
+    def run():
+        for _ in range(100):
+            for _ in blotter.process_trade(trade):
+                pass
+
+    return run
+
+
+@benchmark(days=[21, 252, 1260])
+def risk_cumulative_update(days):
+    """
+    RiskMetricsCumulative.update over every day of a simulation.
+    """
+    np.random.seed(0)
+    sim_params = factory.create_simulation_parameters(num_days=days)
+    returns = np.random.randn(days) / 100
+
+    def run():
+        metrics = RiskMetricsCumulative(sim_params)
+        for dt, ret in zip(sim_params.trading_days, returns):
+            metrics.update(dt, ret, 0.0)
+
+    return run
+
+
+@benchmark(days=[252, 1260])
+def risk_report(days):
+    """
+    The full period RiskReport built at the end of a simulation.
+    """
+    np.random.seed(0)
+    sim_params = factory.create_simulation_parameters(num_days=days)
+    returns = pd.Series(np.random.randn(days) / 100,
+                        index=sim_params.trading_days)
+
+    def run():
+        RiskReport(returns, sim_params)
+
+    return run
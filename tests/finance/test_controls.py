@@ -0,0 +1,109 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections import namedtuple
+from datetime import timedelta
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from nose_parameterized import parameterized
+
+from zipline.errors import TradingControlViolation
+from zipline.finance.controls import (
+    LongOnly,
+    MaxOrderCount,
+    MaxOrderSize,
+    MaxPositionSize,
+)
+from zipline.protocol import Portfolio
+
+Bar = namedtuple('Bar', ['price'])
+
+DT = pd.Timestamp('2014-01-06 15:00', tz='UTC')
+
+
+class ValidateBatchTestCase(TestCase):
+
+    def setUp(self):
+        self.sids = [1, 2, 3, 4, 5]
+        self.amounts = [10, -40, 150, -5, 0]
+        self.current_data = {
+            1: Bar(10.0),
+            2: Bar(25.0),
+            3: Bar(1.5),
+            4: Bar(100.0),
+            5: Bar(3.0),
+        }
+        self.portfolio = Portfolio()
+        for sid, amount in [(1, 20), (2, 30), (4, -10)]:
+            self.portfolio.positions[sid].amount = amount
+
+    def expected(self, control):
+        rejected = []
+        for sid, amount in zip(self.sids, self.amounts):
+            try:
+                control.validate(sid, amount, self.portfolio, DT,
+                                 self.current_data)
+            except TradingControlViolation:
+                rejected.append(True)
+            else:
+                rejected.append(False)
+        return rejected
+
+    @parameterized.expand([
+        ('order_shares', MaxOrderSize(max_shares=30)),
+        ('order_notional', MaxOrderSize(max_notional=400)),
+        ('order_sid', MaxOrderSize(sid=3, max_shares=100)),
+        ('position_shares', MaxPositionSize(max_shares=25)),
+        ('position_notional', MaxPositionSize(max_notional=500,
+                                              max_shares=100)),
+        ('position_sid', MaxPositionSize(sid=2, max_notional=200)),
+        ('long_only', LongOnly()),
+    ])
+    def test_matches_validate(self, name, control):
+        expected = self.expected(control)
+        self.assertTrue(any(expected))
+        self.assertFalse(all(expected))
+
+        rejected = control.validate_batch(self.sids, np.array(self.amounts),
+                                          self.portfolio, DT,
+                                          self.current_data)
+        self.assertEqual(rejected.tolist(), expected)
+
+    def test_max_order_count(self):
+        control = MaxOrderCount(max_count=7)
+        control.validate(1, 10, self.portfolio, DT, self.current_data)
+
+        rejected = control.validate_batch(self.sids, self.amounts,
+                                          self.portfolio, DT,
+                                          self.current_data)
+        self.assertEqual(rejected.tolist(), [False] * 5)
+        # Orders are only counted once the batch is placed.
+        self.assertEqual(control.orders_placed, 1)
+        control.batch_placed(self.sids, self.amounts, DT)
+        self.assertEqual(control.orders_placed, 6)
+
+        rejected = control.validate_batch(self.sids, self.amounts,
+                                          self.portfolio, DT,
+                                          self.current_data)
+        self.assertEqual(rejected.tolist(), [False, True, True, True, True])
+        self.assertEqual(control.orders_placed, 6)
+
+        # The count starts over on the next day.
+        rejected = control.validate_batch(self.sids, self.amounts,
+                                          self.portfolio,
+                                          DT + timedelta(days=1),
+                                          self.current_data)
+        self.assertEqual(rejected.tolist(), [False] * 5)
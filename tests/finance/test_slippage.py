@@ -24,9 +24,16 @@ from unittest import TestCase
 
 from nose_parameterized import parameterized
 
+import numpy as np
 import pandas as pd
 
-from zipline.finance.slippage import VolumeShareSlippage
+from zipline.finance.commission import PerDollar, PerShare, PerTrade
+from zipline.finance.slippage import (
+    FixedSlippage,
+    VolumeShareSlippage,
+    transact_batch,
+    transact_partial,
+)
 
 from zipline.protocol import Event, DATASOURCE_TYPE
 from zipline.finance.blotter import Order
@@ -554,3 +561,51 @@ class SlippageTestCase(TestCase):
             })
         ]
         return events
+
+
+class BatchTransactTestCase(TestCase):
+
+    @parameterized.expand([
+        (slippage, commission)
+        for slippage in (VolumeShareSlippage(), FixedSlippage(spread=0.1))
+        for commission in (PerShare(), PerShare(min_trade_cost=1.0),
+                           PerTrade(), PerDollar())
+    ])
+    def test_matches_transact(self, slippage, commission):
+        dt = datetime.datetime(2006, 1, 5, 14, 31, tzinfo=pytz.utc)
+        trades = [
+            Event({'sid': 133, 'dt': dt, 'price': 3.0, 'volume': 200,
+                   'type': DATASOURCE_TYPE.TRADE}),
+            Event({'sid': 134, 'dt': dt, 'price': 10.0, 'volume': 1000,
+                   'type': DATASOURCE_TYPE.TRADE}),
+        ]
+        amounts = [[20, -15, 30, 100], [-300, 5]]
+
+        transact = transact_partial(slippage, commission)
+        expected = []
+        for trade, trade_amounts in zip(trades, amounts):
+            orders = [Order(dt=dt, sid=trade.sid, amount=amount)
+                      for amount in trade_amounts]
+            txns = {order.id: txn for order, txn in transact(trade, orders)}
+            expected.extend(
+                (txns[order.id].amount, txns[order.id].price,
+                 txns[order.id].commission)
+                if order.id in txns else (0, None, 0.0)
+                for order in orders
+            )
+
+        groups = np.array([0, 0, 0, 0, 1, 1])
+        fills, prices, commissions = transact_batch(
+            slippage,
+            commission,
+            np.array(sum(amounts, []), dtype=float),
+            np.array([trade.price for trade in trades])[groups],
+            np.array([trade.volume for trade in trades], dtype=float)[groups],
+            groups,
+        )
+
+        self.assertEqual(fills.tolist(), [amount for amount, _, _ in expected])
+        for i, (amount, price, cost) in enumerate(expected):
+            if amount:
+                self.assertAlmostEqual(prices[i], price)
+            self.assertAlmostEqual(commissions[i], cost)
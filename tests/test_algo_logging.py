@@ -0,0 +1,98 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from logbook import Logger, Processor, TestHandler
+
+from zipline.algorithm import TradingAlgorithm
+from zipline.utils import factory
+from zipline.utils.algo_logging import AlgoLogHandler
+
+log = Logger('test_algo_logging')
+
+
+def initialize(context):
+    pass
+
+
+def handle_data(context, data):
+    for i in range(3):
+        log.info('bar {0}', i)
+
+
+class TestAlgoLogHandler(TestCase):
+
+    def test_sample_every(self):
+        target = TestHandler()
+        handler = AlgoLogHandler(target, sample_every=3, threaded=False)
+        with handler.threadbound():
+            for i in range(10):
+                log.info('message {0}', i)
+            log.info('other site')
+
+        self.assertEqual([r.message for r in target.records],
+                         ['message 0', 'message 3', 'message 6',
+                          'message 9', 'other site'])
+        self.assertEqual(sum(handler.suppressed.values()), 6)
+
+    def test_rate_limit_per_simulated_day(self):
+        sim_params = factory.create_simulation_parameters(num_days=5)
+        _, df = factory.create_test_df_source(sim_params)
+
+        target = TestHandler()
+        handler = AlgoLogHandler(target, max_per_period=1)
+        algo = TradingAlgorithm(initialize=initialize,
+                                handle_data=handle_data,
+                                sim_params=sim_params)
+        algo.set_logger(log, handler)
+        self.assertEqual(handler.channel, log.name)
+        # zipline's own records are not throttled, and reach the handlers
+        # below the algorithm's.
+        outer = TestHandler()
+        with outer.applicationbound():
+            algo.run(df)
+
+        # Everything kept was written by the end of the run.
+        self.assertEqual([r.message for r in target.records],
+                         ['bar 0'] * len(df))
+        self.assertTrue(any(r.message.startswith('Simulated')
+                            for r in outer.records))
+        self.assertNotIn(log.name, [r.channel for r in outer.records])
+        self.assertEqual(sum(handler.suppressed.values()), 2 * len(df))
+        for record, dt in zip(target.records, df.index):
+            self.assertEqual(record.extra['algo_dt'], dt)
+        # The writer thread was stopped at the end of the run.
+        self.assertIsNone(handler._thread)
+
+    def test_rate_limit_without_algo_dt(self):
+        start = datetime(2014, 1, 2, 14, 30)
+        times = iter([start,
+                      start + timedelta(hours=1),
+                      start + timedelta(days=1),
+                      start + timedelta(days=1, hours=1)])
+
+        def set_time(record):
+            record.time = next(times)
+
+        target = TestHandler()
+        handler = AlgoLogHandler(target, max_per_period=1, threaded=False)
+        with Processor(set_time).threadbound(), handler.threadbound():
+            for i in range(4):
+                log.info('message {0}', i)
+
+        # Outside of a simulation, the periods are of wall clock time.
+        self.assertEqual([r.message for r in target.records],
+                         ['message 0', 'message 2'])
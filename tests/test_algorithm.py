@@ -14,11 +14,17 @@
 # limitations under the License.
 import datetime
 from datetime import timedelta
-from mock import MagicMock
+from hashlib import md5
+from mock import MagicMock, patch
+import os
 from nose_parameterized import parameterized
+from six import iteritems, itervalues
 from six.moves import range
 from textwrap import dedent
+import shutil
+import tempfile
 from unittest import TestCase
+import warnings
 
 import numpy as np
 import pandas as pd
@@ -31,6 +37,7 @@ import zipline.utils.factory as factory
 import zipline.utils.simfactory as simfactory
 
 from zipline.errors import (
+    BadOrderParameters,
     OrderDuringInitialize,
     RegisterTradingControlPostInit,
     TradingControlViolation,
@@ -55,6 +62,7 @@ from zipline.test_algorithms import (
     SetMaxPositionSizeAlgorithm,
     SetMaxOrderCountAlgorithm,
     SetMaxOrderSizeAlgorithm,
+    TestAlgorithm,
     api_algo,
     api_get_environment_algo,
     api_symbol_algo,
@@ -81,13 +89,35 @@ from zipline.sources import (SpecificEquityTrades,
                              DataPanelSource,
                              RandomWalkSource)
 
+from zipline.gens.recording import _update_with_pandas, stream_key
+from zipline.finance.blotter import ORDER_STATUS
+from zipline.finance.controls import TradingControl
 from zipline.finance.execution import LimitOrder
-from zipline.finance.trading import SimulationParameters
+from zipline.finance.slippage import SlippageModel, create_transaction
+from zipline.finance.performance import (
+    CallbackSink,
+    ChunkedFileSink,
+    DataFrameSink,
+    LazyDailyStats,
+    Results,
+    ResultsSink,
+)
+from zipline.finance.trading import EmissionPolicy, SimulationParameters
 from zipline.utils.api_support import set_algo_instance
 from zipline.utils.events import DateRuleFactory, TimeRuleFactory
 from zipline.algorithm import TradingAlgorithm
 
 
+class MessageKeepingSink(DataFrameSink):
+    def __init__(self):
+        super(MessageKeepingSink, self).__init__()
+        self.messages = []
+
+    def write(self, perf):
+        self.messages.append(perf)
+        super(MessageKeepingSink, self).write(perf)
+
+
 class TestRecordAlgorithm(TestCase):
     def setUp(self):
         self.sim_params = factory.create_simulation_parameters(num_days=4)
@@ -117,6 +147,193 @@ class TestRecordAlgorithm(TestCase):
         np.testing.assert_array_equal(output['name3'].values,
                                       range(1, len(output) + 1))
 
+    def test_recorded_vars_not_copied_into_messages(self):
+        algo = RecordAlgorithm(sim_params=self.sim_params)
+        sink = MessageKeepingSink()
+        algo.run(self.source, sink=sink)
+
+        self.assertTrue(sink.messages)
+        for message in sink.messages:
+            for key in ('daily_perf', 'minute_perf'):
+                self.assertNotIn('recorded_vars', message.get(key, {}))
+
+        np.testing.assert_array_equal(algo.recorder.frame()['incr'].values,
+                                      range(1, len(self.sim_params
+                                                   .trading_days) + 1))
+
+    def test_recorded_vars_in_generator_messages(self):
+        algo = RecordAlgorithm(sim_params=self.sim_params)
+        algo.set_sources([self.source])
+        daily = [message['daily_perf'] for message in algo.get_generator()
+                 if 'daily_perf' in message]
+
+        self.assertEqual([perf['recorded_vars']['incr'] for perf in daily],
+                         list(range(1, len(daily) + 1)))
+        self.assertEqual(len(algo.recorder), len(daily))
+
+
+class TestPerfSinks(TestCase):
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(num_days=6)
+        self.trade_history = factory.create_trade_history(
+            133,
+            [10.0, 10.0, 11.0, 11.0, 12.0, 12.0],
+            [100, 100, 100, 300, 100, 100],
+            timedelta(days=1),
+            self.sim_params
+        )
+        self.source = SpecificEquityTrades(event_list=self.trade_history)
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_callback_sink(self):
+        messages = []
+        algo = TradingAlgorithm(
+            script=dedent("""
+            analyzed = []
+
+            def initialize(context):
+                pass
+
+            def handle_data(context, data):
+                pass
+
+            def analyze(context, perf):
+                analyzed.append(perf)
+            """),
+            sim_params=self.sim_params,
+        )
+        output = algo.run(self.source, sink=CallbackSink(messages.append))
+
+        self.assertIsNone(output)
+        # There are no daily stats to analyze.
+        self.assertEqual(algo.namespace['analyzed'], [])
+        daily = [m for m in messages if 'daily_perf' in m]
+        self.assertEqual(len(daily), len(self.sim_params.trading_days))
+        # The risk report is the last message.
+        self.assertIn('one_month', messages[-1])
+
+    def test_chunked_file_sink(self):
+        expected = RecordAlgorithm(sim_params=self.sim_params).run(
+            self.source)
+
+        # The source is exhausted by the first run.
+        source = SpecificEquityTrades(event_list=self.trade_history)
+        algo = RecordAlgorithm(sim_params=self.sim_params)
+        sink = ChunkedFileSink(self.tempdir, chunk_size=4)
+        output = algo.run(source, sink=sink)
+
+        self.assertIsInstance(output, LazyDailyStats)
+        self.assertEqual(len(output.paths), 2)
+        self.assertEqual([len(chunk) for chunk in output.iter_chunks()],
+                         [4, 2])
+        self.assertIsNotNone(algo.risk_report)
+
+        np.testing.assert_array_equal(output.index, expected.index)
+        np.testing.assert_array_equal(output['incr'].values,
+                                      expected['incr'].values)
+        np.testing.assert_allclose(output['portfolio_value'].values,
+                                   expected['portfolio_value'].values)
+
+    def test_results_sink(self):
+        _, df = factory.create_test_df_source(self.sim_params)
+        expected = TestAlgorithm(0, 10, 3, sim_params=self.sim_params).run(
+            DataFrameSource(df))
+
+        algo = TestAlgorithm(0, 10, 3, sim_params=self.sim_params)
+        results = algo.run(DataFrameSource(df), sink=ResultsSink())
+
+        self.assertIsInstance(results, Results)
+        self.assertIsNotNone(results.risk_report)
+        self.assertEqual(len(results.daily), len(expected))
+        for name in ('portfolio_value', 'returns', 'pnl'):
+            self.assertNotEqual(results.daily[name].dtype, object)
+            np.testing.assert_allclose(results.daily[name].values,
+                                       expected[name].values)
+
+        for name in ('positions', 'transactions', 'orders'):
+            self.assertEqual(len(getattr(results, name)),
+                             expected[name].map(len).sum())
+
+        daily_stats = results.to_daily_stats()
+        np.testing.assert_array_equal(daily_stats.index, expected.index)
+        for name in ('positions', 'transactions', 'orders'):
+            np.testing.assert_array_equal(daily_stats[name].map(len).values,
+                                          expected[name].map(len).values)
+
+
+class TestStreamRecording(TestCase):
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(num_days=6)
+        self.source, self.df = \
+            factory.create_test_df_source(self.sim_params)
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def run_algo(self, df):
+        algo = TestAlgorithm(0, 10, 3, sim_params=self.sim_params,
+                             stream_cache=self.tempdir)
+        return algo, algo.run(DataFrameSource(df))
+
+    def test_replay(self):
+        algo, expected = self.run_algo(self.df)
+        self.assertTrue(os.path.isfile(algo.stream_recording))
+        self.assertEqual(os.listdir(self.tempdir),
+                         [os.path.basename(algo.stream_recording)])
+
+        # The sources are not run when the recording is replayed.
+        with patch.object(DataFrameSource, 'raw_data_gen',
+                          side_effect=AssertionError):
+            replay_algo, output = self.run_algo(self.df)
+
+        self.assertEqual(replay_algo.stream_recording,
+                         algo.stream_recording)
+        np.testing.assert_array_equal(output.index, expected.index)
+        np.testing.assert_allclose(output['portfolio_value'].values,
+                                   expected['portfolio_value'].values)
+        self.assertEqual(output['orders'].map(len).sum(),
+                         expected['orders'].map(len).sum())
+
+    def test_changed_data_is_recorded_again(self):
+        algo, _ = self.run_algo(self.df)
+        changed = self.df.copy()
+        changed.iloc[2, 0] += 1
+        changed_algo, _ = self.run_algo(changed)
+
+        self.assertNotEqual(changed_algo.stream_recording,
+                            algo.stream_recording)
+        self.assertEqual(len(os.listdir(self.tempdir)), 2)
+
+    def test_unidentified_sources_are_not_recorded(self):
+        source = RandomWalkSource(start=self.sim_params.period_start,
+                                  end=self.sim_params.period_end)
+        self.assertIsNone(stream_key([source], [], self.sim_params))
+
+    def test_emission_policy_is_not_hashed(self):
+        source = DataFrameSource(self.df)
+        keys = set()
+        for policy in (lambda dt: True, lambda dt: False):
+            self.sim_params.emission_policy = EmissionPolicy(minutes=policy)
+            keys.add(stream_key([source], [], self.sim_params))
+
+        self.assertEqual(len(keys), 1)
+
+    def test_object_columns_are_hashed_by_value(self):
+        def digest(names):
+            hasher = md5()
+            _update_with_pandas(hasher, pd.DataFrame({'name': names}))
+            return hasher.hexdigest()
+
+        # Equal strings built separately live at different addresses.
+        first = digest([''.join(['a', 'b']), ''.join(['c', 'd'])])
+        self.assertEqual(digest([''.join(['a', 'b']), ''.join(['c', 'd'])]),
+                         first)
+        self.assertNotEqual(digest(['ab', 'ce']), first)
+
 
 class TestMiscellaneousAPI(TestCase):
     def setUp(self):
@@ -189,7 +406,7 @@ class TestMiscellaneousAPI(TestCase):
                 all_orders = algo.get_open_orders()
                 self.assertEqual(list(all_orders.keys()), [2])
 
-                self.assertEqual([], algo.get_open_orders(1))
+                self.assertEqual((), algo.get_open_orders(1))
 
                 orders_2 = algo.get_open_orders(2)
                 self.assertEqual(all_orders[2], orders_2)
@@ -208,6 +425,47 @@ class TestMiscellaneousAPI(TestCase):
                                 sim_params=self.sim_params)
         algo.run(self.source)
 
+    def test_get_open_orders_cached(self):
+
+        def initialize(algo):
+            algo.minute = 0
+
+        def handle_data(algo, data):
+            if algo.minute == 0:
+                order_id = algo.order(2, 1, style=LimitOrder(0.01))
+                all_orders = algo.get_open_orders()
+
+                # Nothing changed, the same views are returned.
+                self.assertEqual(algo.get_open_orders(), all_orders)
+                self.assertIs(algo.get_open_orders(2), all_orders[2])
+
+                view = all_orders[2][0]
+                self.assertEqual(view.id, order_id)
+                with self.assertRaises(AttributeError):
+                    view.limit = 20
+
+                # Changing what was returned doesn't change the cache.
+                self.assertIsInstance(all_orders[2], tuple)
+                del all_orders[2]
+                self.assertIn(2, algo.get_open_orders())
+
+                cached = algo.get_open_orders(2)
+                algo.order(2, 1, style=LimitOrder(0.01))
+                self.assertIsNot(algo.get_open_orders(2), cached)
+                self.assertEqual(len(algo.get_open_orders(2)), 2)
+
+                algo.cancel_order(view)
+                self.assertEqual(len(algo.get_open_orders(2)), 1)
+                # The view reads through to the cancelled order.
+                self.assertEqual(view.status, ORDER_STATUS.CANCELLED)
+
+            algo.minute += 1
+
+        algo = TradingAlgorithm(initialize=initialize,
+                                handle_data=handle_data,
+                                sim_params=self.sim_params)
+        algo.run(self.source)
+
     def test_schedule_function(self):
         date_rules = DateRuleFactory
         time_rules = TimeRuleFactory
@@ -282,6 +540,343 @@ class TestMiscellaneousAPI(TestCase):
         self.assertIs(composer, zipline.utils.events.ComposedRule.lazy_and)
 
 
+class TestSkipIdleBars(TestCase):
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(
+            num_days=2,
+            sids=[1, 2],
+            data_frequency='minute',
+            emission_rate='daily',
+        )
+
+    def create_source(self):
+        return factory.create_minutely_trade_source(
+            [1, 2],
+            trade_count=780,
+            sim_params=self.sim_params,
+            concurrent=True,
+        )
+
+    def run_algo(self, skip_idle_bars):
+        def buy(algo, data):
+            algo.calls += 1
+            algo.order(1, 10)
+
+        def initialize(algo):
+            algo.calls = 0
+            algo.schedule_function(
+                func=buy,
+                date_rule=DateRuleFactory.every_day(),
+                time_rule=TimeRuleFactory.market_open(),
+            )
+
+        algo = TradingAlgorithm(
+            initialize=initialize,
+            handle_data=None if skip_idle_bars else handle_data_noop,
+            sim_params=self.sim_params,
+            skip_idle_bars=skip_idle_bars,
+        )
+        return algo, algo.run(self.create_source())
+
+    def test_matches_every_bar_run(self):
+        expected_algo, expected = self.run_algo(False)
+        algo, output = self.run_algo(True)
+
+        self.assertGreater(algo.calls, 0)
+        self.assertEqual(algo.calls, expected_algo.calls)
+
+        np.testing.assert_allclose(output['portfolio_value'].values,
+                                   expected['portfolio_value'].values)
+        self.assertEqual(algo.portfolio.positions[1].amount,
+                         10 * algo.calls)
+        self.assertEqual(algo.portfolio.positions[1].last_sale_price,
+                         expected_algo.portfolio.positions[1].last_sale_price)
+
+    def test_handle_data_is_rejected(self):
+        with self.assertRaises(ValueError):
+            TradingAlgorithm(
+                initialize=initialize_noop,
+                handle_data=handle_data_noop,
+                sim_params=self.sim_params,
+                skip_idle_bars=True,
+            )
+
+    def test_handle_data_is_optional(self):
+        def initialize(algo):
+            pass
+
+        algo = TradingAlgorithm(
+            initialize=initialize,
+            sim_params=self.sim_params,
+            skip_idle_bars=True,
+        )
+        output = algo.run(self.create_source())
+        self.assertEqual(len(output), 2)
+
+
+class TestBatchFills(TestCase):
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(
+            num_days=1,
+            sids=[1, 2],
+            data_frequency='minute',
+            emission_rate='daily',
+        )
+
+    def run_algo(self, batch_fills, slippage=None):
+        def handle_data(algo, data):
+            algo.bars += 1
+            algo.order(1, 30 * (-1) ** algo.bars)
+            algo.order(2, 50)
+            algo.order(2, -20, style=LimitOrder(data[2].price))
+
+        def initialize(algo):
+            algo.bars = 0
+            if slippage is not None:
+                algo.set_slippage(slippage)
+
+        algo = TradingAlgorithm(
+            initialize=initialize,
+            handle_data=handle_data,
+            sim_params=self.sim_params,
+            batch_fills=batch_fills,
+        )
+        source = factory.create_minutely_trade_source(
+            [1, 2],
+            trade_count=100,
+            sim_params=self.sim_params,
+            concurrent=True,
+        )
+        # The trades only cover the first minutes of the simulated day.
+        return algo, algo.run(source, overwrite_sim_params=False)
+
+    def test_matches_trade_by_trade_fills(self):
+        expected_algo, expected = self.run_algo(False)
+        algo, output = self.run_algo(True)
+
+        self.assertGreater(len(expected_algo.blotter.orders), 0)
+        np.testing.assert_allclose(output['portfolio_value'].values,
+                                   expected['portfolio_value'].values)
+
+        def fills(daily_stats):
+            return [sorted((txn['sid'], txn['amount'], round(txn['price'], 8),
+                            round(txn['commission'], 8)) for txn in txns)
+                    for txns in daily_stats['transactions']]
+
+        self.assertGreater(sum(map(len, fills(expected))), 0)
+        self.assertEqual(fills(output), fills(expected))
+
+    def test_warns_without_batch_models(self):
+        class TradeByTradeSlippage(SlippageModel):
+            def process_order(self, event, order):
+                return create_transaction(event, order, event.price,
+                                          order.amount)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.run_algo(True, slippage=TradeByTradeSlippage())
+        self.assertTrue(any('batch_fills' in str(w.message) for w in caught))
+
+
+class CountingControl(TradingControl):
+    """
+    Counts the orders it validates.
+    """
+    def __init__(self):
+        super(CountingControl, self).__init__()
+        self.count = 0
+
+    def validate(self, sid, amount, portfolio, algo_datetime,
+                 algo_current_data):
+        self.count += 1
+
+
+class TestOrderTargetPercents(TestCase):
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(
+            num_days=1,
+            sids=[1, 2],
+            data_frequency='minute',
+            emission_rate='daily',
+        )
+
+    def run_algo(self, handle_data, setup=None):
+        def initialize(algo):
+            algo.bars = 0
+            if setup is not None:
+                setup(algo)
+
+        def count_bars(algo, data):
+            algo.bars += 1
+            handle_data(algo, data)
+
+        algo = TradingAlgorithm(
+            initialize=initialize,
+            handle_data=count_bars,
+            sim_params=self.sim_params,
+        )
+        source = factory.create_minutely_trade_source(
+            [1, 2],
+            trade_count=20,
+            sim_params=self.sim_params,
+            concurrent=True,
+        )
+        # The trades only cover the first minutes of the simulated day.
+        algo.run(source, overwrite_sim_params=False)
+        return algo
+
+    @staticmethod
+    def placed(algo):
+        return sorted((order.sid, order.amount, order.created)
+                      for order in itervalues(algo.blotter.orders))
+
+    def test_matches_order_target_percent(self):
+        weights = {1: 0.3, 2: -0.2}
+
+        def one_by_one(algo, data):
+            if algo.bars in (1, 10):
+                for sid, weight in iteritems(weights):
+                    algo.order_target_percent(sid, weight)
+
+        def together(algo, data):
+            if algo.bars in (1, 10):
+                algo.order_target_percents(pd.Series(weights))
+
+        expected = self.placed(self.run_algo(one_by_one))
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(self.placed(self.run_algo(together)), expected)
+
+    def test_rebalance_closes_other_positions(self):
+        def handle_data(algo, data):
+            if algo.bars == 1:
+                algo.order_target_percents({1: 0.3, 2: 0.2})
+            elif algo.bars == 10:
+                algo.held = algo.portfolio.positions[2].amount
+                algo.order_ids = algo.rebalance({1: 0.3})
+
+        algo = self.run_algo(handle_data)
+
+        self.assertGreater(algo.held, 0)
+        closing = algo.blotter.orders[algo.order_ids[2]]
+        self.assertEqual(closing.amount, -algo.held)
+
+    def test_controls_reject_the_whole_batch(self):
+        def setup(algo):
+            algo.set_max_order_size(sid=2, max_shares=1)
+            algo.rejected = False
+
+        def handle_data(algo, data):
+            if algo.bars == 1:
+                try:
+                    algo.order_target_percents({1: 0.3, 2: 0.2})
+                except TradingControlViolation:
+                    algo.rejected = True
+
+        algo = self.run_algo(handle_data, setup)
+
+        self.assertTrue(algo.rejected)
+        self.assertEqual(len(algo.blotter.orders), 0)
+
+    def test_rejected_batch_is_not_counted(self):
+        def setup(algo):
+            algo.set_max_order_count(3)
+            algo.rejected = False
+
+        def handle_data(algo, data):
+            if algo.bars == 1:
+                algo.order_target_percents({1: 0.3, 2: 0.2})
+                try:
+                    algo.order_target_percents({1: 0.4, 2: 0.3})
+                except TradingControlViolation:
+                    algo.rejected = True
+                # The rejected batch didn't use up the last order.
+                algo.order(1, 1)
+
+        algo = self.run_algo(handle_data, setup)
+
+        self.assertTrue(algo.rejected)
+        self.assertEqual(len(algo.blotter.orders), 3)
+
+    def test_stateful_validate_runs_after_batch_controls(self):
+        def setup(algo):
+            # Registered first, but only validates orders one by one.
+            algo.counter = CountingControl()
+            algo.register_trading_control(algo.counter)
+            algo.set_max_order_size(sid=2, max_shares=1)
+            algo.rejected = False
+
+        def handle_data(algo, data):
+            if algo.bars == 1:
+                try:
+                    algo.order_target_percents({1: 0.3, 2: 0.2})
+                except TradingControlViolation:
+                    algo.rejected = True
+
+        algo = self.run_algo(handle_data, setup)
+
+        self.assertTrue(algo.rejected)
+        self.assertEqual(algo.counter.count, 0)
+
+    def test_non_finite_weights_are_rejected(self):
+        def setup(algo):
+            algo.rejected = False
+
+        def handle_data(algo, data):
+            if algo.bars == 1:
+                try:
+                    algo.order_target_percents({1: 0.3, 2: np.nan})
+                except BadOrderParameters:
+                    algo.rejected = True
+
+        algo = self.run_algo(handle_data, setup)
+
+        self.assertTrue(algo.rejected)
+        self.assertEqual(len(algo.blotter.orders), 0)
+
+
+class TestOrderRetention(TestCase):
+    def test_archives_old_orders(self):
+        sim_params = factory.create_simulation_parameters(
+            num_days=4,
+            sids=[1],
+            data_frequency='minute',
+            emission_rate='daily',
+        )
+
+        def initialize(algo):
+            algo.order_ids = []
+
+        def handle_data(algo, data):
+            if not algo.order_ids or \
+                    algo.get_order(algo.order_ids[-1]).created.date() != \
+                    algo.get_datetime().date():
+                algo.order_ids.append(algo.order(1, 10))
+            # Orders of earlier days can still be looked up by id.
+            for order_id in algo.order_ids:
+                self.assertEqual(algo.get_order(order_id).id, order_id)
+
+        algo = TradingAlgorithm(
+            initialize=initialize,
+            handle_data=handle_data,
+            sim_params=sim_params,
+            order_retention=1,
+        )
+        self.addCleanup(algo.blotter.archive.close)
+        source = factory.create_minutely_trade_source(
+            [1],
+            trade_count=4 * 390,
+            sim_params=sim_params,
+        )
+        algo.run(source)
+
+        self.assertEqual(len(algo.order_ids), 4)
+        # Only the orders of the last two days are kept in memory.
+        self.assertEqual(sorted(algo.blotter.orders), algo.order_ids[2:])
+        self.assertEqual(len(algo.blotter.archive), 2)
+        archived = algo.get_order(algo.order_ids[0])
+        self.assertEqual(archived.status, ORDER_STATUS.FILLED)
+
+
 class TestTransformAlgorithm(TestCase):
     def setUp(self):
         setup_logger(self)
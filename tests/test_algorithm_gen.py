@@ -214,6 +214,33 @@ class AlgorithmGeneratorTestCase(TestCase):
         results = list(gen)
         self.assertEqual(results[-2]['progress'], 1.0)
 
+    @timed(DEFAULT_TIMEOUT)
+    def test_minute_progress(self):
+        """
+        Progress follows the position of the bars in the trading calendar
+        when emitting minutely.
+        """
+        sim_params = factory.create_simulation_parameters(
+            num_days=2,
+            data_frequency='minute',
+            emission_rate='minute',
+        )
+        algo = TestAlgo(self, sim_params=sim_params)
+        trade_source = factory.create_minutely_trade_source(
+            [8229],
+            trade_count=100,
+            sim_params=sim_params,
+        )
+        algo.set_sources([trade_source])
+
+        progress = [message['progress'] for message in algo.get_generator()
+                    if 'progress' in message]
+
+        # The close of the first of the two days is half way.
+        self.assertIn(0.5, progress)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 1.0)
+
     def test_benchmark_times_match_market_close_for_minutely_data(self):
         """
         Benchmark dates should be adjusted so that benchmark events are
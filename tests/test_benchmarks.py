@@ -0,0 +1,50 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections import OrderedDict
+from unittest import TestCase
+
+from benchmarks.runner import compare, run_suite
+from benchmarks.suite import case_key
+
+
+def results(**medians):
+    return {'results': {key: {'median': value}
+                        for key, value in medians.items()}}
+
+
+class TestBenchmarkRunner(TestCase):
+
+    def test_case_key(self):
+        params = OrderedDict([('frequency', 'daily'), ('sids', 10)])
+        self.assertEqual(case_key('algorithm_run', params),
+                         'algorithm_run[frequency=daily,sids=10]')
+
+    def test_compare(self):
+        old = results(a=1.0, b=1.0, c=1.0, gone=1.0)
+        new = results(a=1.05, b=1.5, c=0.5, added=1.0)
+
+        rows, regressions = compare(old, new, threshold=0.1)
+
+        self.assertEqual([row[0] for row in rows], ['b', 'a', 'c'])
+        self.assertEqual([row[0] for row in regressions], ['b'])
+        self.assertAlmostEqual(regressions[0][3], 1.5)
+
+    def test_run_suite(self):
+        doc = run_suite(['risk_report'], repeat=1)
+
+        self.assertEqual(sorted(doc['results']),
+                         ['risk_report[days=1260]', 'risk_report[days=252]'])
+        for result in doc['results'].values():
+            self.assertEqual(len(result['times']), 1)
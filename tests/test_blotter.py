@@ -15,15 +15,24 @@
 
 import datetime
 from nose_parameterized import parameterized
+import os
+import pytz
+import shutil
+import tempfile
 from unittest import TestCase
 
-from zipline.finance.blotter import Blotter, ORDER_STATUS
+from six.moves import cPickle as pickle
+
+from zipline.finance.blotter import Blotter, Order, OrderView, ORDER_STATUS
 from zipline.finance.execution import (
     LimitOrder,
     MarketOrder,
     StopLimitOrder,
     StopOrder,
 )
+from zipline.finance.order_archive import OrderArchive
+from zipline.finance.order_book import OrderBook, SortedOrders
+from zipline.finance.slippage import check_order_triggers
 from zipline.sources.test_source import create_trade
 
 from zipline.utils.test_utils import(
@@ -169,3 +178,232 @@ class BlotterTestCase(TestCase):
             self.assertEqual(filled_order.status, expected_status)
             self.assertEqual(filled_order.filled, expected_filled)
             self.assertEqual(filled_order.open_amount, expected_open)
+
+    def test_fill_priority(self):
+        """
+        Orders fill by dt, then in the order they were placed, and only the
+        orders a trade touched are moved or dropped.
+        """
+        start = datetime.datetime(2006, 1, 3, 15)
+        blotter = Blotter()
+        blotter.current_dt = start + datetime.timedelta(minutes=1)
+        late_id = blotter.order(24, 10, MarketOrder())
+        blotter.current_dt = start
+        early_ids = [blotter.order(24, 10, MarketOrder()) for _ in range(3)]
+        resting_id = blotter.order(24, 10, LimitOrder(1))
+
+        blotter.cancel(early_ids[1])
+        self.assertNotIn(blotter.orders[early_ids[1]], blotter.open_orders[24])
+
+        trade = create_trade(24, 50.0, 80, start)
+        filled = [order.id for _, order in blotter.process_trade(trade)]
+        self.assertEqual(filled, [early_ids[0], early_ids[2]])
+
+        self.assertEqual([order.id for order in blotter.open_orders[24]],
+                         [resting_id, late_id])
+
+    def test_order_ids(self):
+        blotter = Blotter()
+        ids = [blotter.order(24, 100, MarketOrder()) for _ in range(3)]
+        self.assertEqual(ids, sorted(set(ids)))
+
+        order = blotter.orders[ids[0]]
+        self.assertFalse(hasattr(order, '__dict__'))
+        self.assertEqual(order.to_dict()['status'], ORDER_STATUS.OPEN)
+
+    def test_order_batch_over_max_shares(self):
+        blotter = Blotter()
+        with self.assertRaises(OverflowError):
+            blotter.order_batch([24, 25], [100, blotter.max_shares + 1],
+                                MarketOrder())
+
+        # The orders before the one over the limit aren't placed either.
+        self.assertEqual(blotter.orders, {})
+        self.assertEqual(len(blotter.open_orders[24]), 0)
+
+    def test_restore_open_orders(self):
+        # Orders carried over from a blotter, e.g. of another process, whose
+        # ids a new blotter would otherwise hand out again.
+        carried = Blotter()
+        carried_ids = [carried.order(24, 100, MarketOrder())
+                       for _ in range(3)]
+        orders = [carried.orders[order_id] for order_id in carried_ids]
+
+        blotter = Blotter()
+        blotter.restore_open_orders(orders)
+        new_id = blotter.order(24, 10, MarketOrder())
+        self.assertNotIn(new_id, carried_ids)
+        self.assertEqual(len(blotter.open_orders[24]), 4)
+
+        with self.assertRaises(ValueError):
+            blotter.restore_open_orders(orders[:1])
+        with self.assertRaises(ValueError):
+            blotter.order(24, 10, MarketOrder(), order_id=new_id)
+        with self.assertRaises(ValueError):
+            OrderBook(orders + orders[:1])
+
+    def test_order_view(self):
+        blotter = Blotter()
+        order_id = blotter.order(24, 100, LimitOrder(10))
+        order = blotter.orders[order_id]
+        view = OrderView(order)
+
+        self.assertEqual(view.to_dict(), order.to_dict())
+        self.assertEqual(view['limit'], 10)
+        self.assertEqual(view, OrderView(order))
+        with self.assertRaises(AttributeError):
+            view.amount = 50
+        with self.assertRaises(AttributeError):
+            view.direction
+
+        blotter.cancel(order_id)
+        self.assertEqual(view.status, ORDER_STATUS.CANCELLED)
+
+    def test_archive_orders(self):
+        archive = OrderArchive()
+        self.addCleanup(archive.close)
+        blotter = Blotter(retention=1, archive=archive)
+
+        day_one = datetime.datetime(2014, 1, 6, 15, tzinfo=pytz.utc)
+        day_two = datetime.datetime(2014, 1, 7, 15, tzinfo=pytz.utc)
+        blotter.set_date(day_one)
+        filled_id = blotter.order(24, 100, MarketOrder())
+        cancelled_id = blotter.order(24, 50, MarketOrder())
+        open_id = blotter.order(24, 10, LimitOrder(1))
+        blotter.cancel(cancelled_id)
+        list(blotter.process_trade(create_trade(24, 10.0, 10000, day_one)))
+
+        blotter.set_date(day_two)
+        late_id = blotter.order(24, -20, MarketOrder())
+        list(blotter.process_trade(create_trade(24, 10.0, 10000, day_two)))
+
+        moved = blotter.archive_orders(
+            datetime.datetime(2014, 1, 7, tzinfo=pytz.utc)
+        )
+        self.assertEqual(moved, 2)
+        self.assertEqual(set(blotter.orders), {open_id, late_id})
+        self.assertEqual(len(archive), 2)
+
+        archived = blotter.get_order(filled_id)
+        self.assertEqual(archived.status, ORDER_STATUS.FILLED)
+        self.assertEqual(archived.filled, 100)
+        self.assertEqual(blotter.get_order(cancelled_id).status,
+                         ORDER_STATUS.CANCELLED)
+        self.assertIs(blotter.get_order(open_id), blotter.orders[open_id])
+        self.assertIsNone(blotter.get_order(-1))
+
+        # Archived orders are terminal, cancelling them does nothing.
+        blotter.cancel(filled_id)
+        self.assertEqual(sorted(order.id for order in archive),
+                         sorted([filled_id, cancelled_id]))
+
+    def test_archive_files(self):
+        archive = OrderArchive()
+        path = archive.path
+        self.assertTrue(os.path.exists(path))
+        # A temporary archive is removed once it is no longer used.
+        del archive
+        self.assertFalse(os.path.exists(path))
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'orders.pickle')
+        archive = OrderArchive(path)
+        archive.append([Order(dt=None, sid=24, amount=10)])
+        archive.close()
+        self.assertTrue(os.path.exists(path))
+
+        # The orders of an earlier run aren't overwritten.
+        with self.assertRaises(OSError):
+            OrderArchive(path)
+        with open(path, 'rb') as f:
+            self.assertEqual(pickle.load(f).amount, 10)
+
+
+class OrderBookTestCase(TestCase):
+
+    def test_sorted_orders_blocks(self):
+        # Small blocks, so that they are split and emptied.
+        sorted_orders = SortedOrders(load=2)
+        values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5]
+        keys = [(value, seq) for seq, value in enumerate(values)]
+        for key in keys:
+            sorted_orders.insert(key, key)
+
+        expected = sorted(keys)
+        self.assertEqual(list(sorted_orders), expected)
+        self.assertEqual(sorted_orders[-1], expected[-1])
+        self.assertEqual(sorted_orders.through(3),
+                         [key for key in expected if key[0] <= 3])
+        self.assertEqual(sorted_orders.starting_at(5),
+                         [key for key in expected if key[0] >= 5])
+
+        for key in keys[::2]:
+            sorted_orders.remove(key)
+            expected.remove(key)
+        self.assertEqual(list(sorted_orders), expected)
+        self.assertEqual(len(sorted_orders), len(expected))
+        self.assertEqual(sorted_orders[2], expected[2])
+
+    def test_sorted_by_dt_and_placement(self):
+        start = datetime.datetime(2006, 1, 3, 15)
+        later = start + datetime.timedelta(minutes=1)
+        orders = [Order(dt=dt, sid=24, amount=10)
+                  for dt in (later, start, later, start)]
+        book = OrderBook(orders)
+
+        self.assertEqual(list(book), [orders[1], orders[3],
+                                      orders[0], orders[2]])
+        self.assertEqual(book.through(start), [orders[1], orders[3]])
+        self.assertEqual(len(book), 4)
+        self.assertIn(orders[0], book)
+
+        # A changed dt moves the order behind the others with that dt.
+        orders[1].dt = later
+        book.refresh([orders[1]])
+        self.assertEqual(list(book), [orders[3], orders[0],
+                                      orders[1], orders[2]])
+
+        # Orders that are no longer open are dropped.
+        orders[0].filled = orders[0].amount
+        book.refresh([orders[0]])
+        self.assertNotIn(orders[0], book)
+
+        self.assertTrue(book.remove(orders[2]))
+        self.assertFalse(book.remove(orders[2]))
+        self.assertEqual(list(book), [orders[3], orders[1]])
+
+    def test_fillable(self):
+        """
+        Only the triggered orders and the ones whose targets a price
+        reaches can fill.
+        """
+        dt = datetime.datetime(2006, 1, 3, 15)
+        orders = [Order(dt=dt, sid=24, amount=amount, stop=stop, limit=limit)
+                  for amount in (10, -10)
+                  for stop, limit in ((None, None), (9, None), (11, None),
+                                      (None, 9), (None, 11), (9, 10),
+                                      (11, 10), (9, 12), (11, 12))]
+        book = OrderBook(orders)
+
+        for price in (8, 9, 10, 11, 12):
+            trade = create_trade(24, price, 100, dt)
+            expected = [order for order in book.through(dt)
+                        if order.triggered or
+                        any(check_order_triggers(order, trade))]
+            self.assertEqual(book.fillable(price, dt), expected)
+
+        # Once triggered, an order fills at any price.
+        buy_stop = orders[1]
+        buy_stop.check_triggers(create_trade(24, 10, 100, dt))
+        self.assertTrue(buy_stop.triggered)
+        book.refresh([buy_stop])
+        self.assertIn(buy_stop, book.fillable(1, dt))
+
+        # A stop limit whose stop is reached waits for its limit.
+        stop_limit = orders[7]
+        stop_limit.check_triggers(create_trade(24, 13, 100, dt))
+        self.assertIsNone(stop_limit.stop)
+        book.refresh([stop_limit])
+        self.assertNotIn(stop_limit, book.fillable(13, dt))
+        self.assertIn(stop_limit, book.fillable(12, dt))
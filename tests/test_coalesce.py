@@ -0,0 +1,137 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest import TestCase
+
+import pandas as pd
+
+from zipline.gens.coalesce import LatencyStats, SnapshotCoalescer
+from zipline.protocol import DATASOURCE_TYPE, Event
+
+
+def bar(dt, source_id):
+    return Event({'dt': dt, 'source_id': source_id,
+                  'type': DATASOURCE_TYPE.TRADE})
+
+
+def benchmark(dt):
+    return Event({'dt': dt, 'source_id': 'benchmarks',
+                  'type': DATASOURCE_TYPE.BENCHMARK})
+
+
+class TestSnapshotCoalescer(TestCase):
+
+    def setUp(self):
+        self.dts = pd.date_range('2006-01-03 14:31', periods=4, freq='min',
+                                 tz='UTC')
+        self.coalescer = SnapshotCoalescer(['a', 'b'], max_delay=1.0)
+
+    def test_waits_for_every_feed(self):
+        dts = self.dts
+        coalescer = self.coalescer
+
+        coalescer.receive('a', bar(dts[0], 'a'), 0.0)
+        coalescer.receive('a', bar(dts[1], 'a'), 0.0)
+        # b hasn't sent anything yet.
+        self.assertEqual(coalescer.ready(0.5), [])
+
+        coalescer.receive('b', bar(dts[0], 'b'), 0.5)
+        self.assertEqual(coalescer.ready(0.5), [])
+
+        # Once b is past dts[0], that snapshot is complete.
+        coalescer.receive('b', bar(dts[1], 'b'), 0.5)
+        self.assertEqual(coalescer.ready(0.5), [dts[0]])
+
+        [(dt, snapshot, arrival)] = coalescer.release(dts[0])
+        self.assertEqual(dt, dts[0])
+        self.assertEqual([e.source_id for e in snapshot], ['a', 'b'])
+        self.assertEqual(arrival, 0.0)
+
+    def test_overdue_snapshots_are_released(self):
+        dts = self.dts
+        coalescer = self.coalescer
+
+        coalescer.receive('a', bar(dts[0], 'a'), 0.0)
+        coalescer.receive('a', bar(dts[1], 'a'), 0.25)
+        self.assertEqual(coalescer.timeout(0.5), 0.5)
+        self.assertEqual(coalescer.ready(0.5), [])
+        self.assertEqual(coalescer.ready(1.0), [dts[0]])
+        self.assertEqual(coalescer.ready(1.25), [dts[0], dts[1]])
+
+        coalescer.release(dts[0])
+        self.assertEqual(coalescer.timeout(0.5), 0.75)
+
+    def test_late_bars_are_dropped(self):
+        dts = self.dts
+        coalescer = self.coalescer
+
+        coalescer.receive('a', bar(dts[1], 'a'), 0.0)
+        coalescer.release(dts[1])
+
+        self.assertFalse(coalescer.receive('b', bar(dts[0], 'b'), 0.0))
+        self.assertFalse(coalescer.receive('b', bar(dts[1], 'b'), 0.0))
+        self.assertTrue(coalescer.receive('b', bar(dts[2], 'b'), 0.0))
+        self.assertEqual(coalescer.late_bars, 2)
+
+    def test_closed_feeds_are_not_waited_for(self):
+        dts = self.dts
+        coalescer = self.coalescer
+
+        coalescer.receive('a', bar(dts[0], 'a'), 0.0)
+        coalescer.close('b')
+        coalescer.receive('a', bar(dts[1], 'a'), 0.0)
+        self.assertEqual(coalescer.ready(0.0), [dts[0]])
+
+        coalescer.close('a')
+        self.assertEqual(coalescer.ready(0.0), [dts[0], dts[1]])
+
+        for dt in coalescer.ready(0.0):
+            coalescer.release(dt)
+        self.assertTrue(coalescer.done)
+        self.assertIsNone(coalescer.timeout(0.0))
+
+    def test_benchmarks(self):
+        dts = self.dts
+        coalescer = SnapshotCoalescer(
+            ['a'], [benchmark(dt) for dt in reversed(dts)])
+
+        coalescer.receive('a', bar(dts[2], 'a'), 0.0)
+        steps = coalescer.release(dts[2])
+
+        # The earlier benchmarks get snapshots of their own.
+        self.assertEqual([dt for dt, _, _ in steps], list(dts[:3]))
+        self.assertEqual([arrival for _, _, arrival in steps],
+                         [None, None, 0.0])
+        self.assertEqual([e.source_id for e in steps[-1][1]],
+                         ['a', 'benchmarks'])
+
+        remaining = coalescer.remaining_benchmarks()
+        self.assertEqual([dt for dt, _, _ in remaining], [dts[3]])
+        self.assertEqual(coalescer.remaining_benchmarks(), [])
+
+
+class TestLatencyStats(TestCase):
+
+    def test_summary(self):
+        stats = LatencyStats(maxlen=2)
+        self.assertEqual(stats.summary()['count'], 0)
+
+        for seconds in (3.0, 1.0, 2.0):
+            stats.record(seconds)
+
+        summary = stats.summary()
+        self.assertEqual(summary['count'], 3)
+        # Only the last samples are kept.
+        self.assertEqual(summary['max'], 2.0)
+        self.assertEqual(summary['mean'], 1.5)
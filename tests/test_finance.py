@@ -253,7 +253,9 @@ class FinanceTestCase(TestCase):
         oo = blotter.open_orders
         self.assertEqual(len(oo), 1)
         self.assertTrue(sid in oo)
-        order_list = oo[sid]
+        # Filled orders are dropped from the book, keep a copy to compare
+        # the transactions against.
+        order_list = list(oo[sid])
         self.assertEqual(order_count, len(order_list))
 
         for i in range(order_count):
@@ -400,6 +400,49 @@ def handle_data(context, data):
             expected = df.iloc[i:i + bar_count]
             assert_frame_equal(expected, received)
 
+    def test_history_primed_by_warmup(self):
+        bar_count = 3
+        algo_text = """
+from zipline.api import history, add_history
+
+def initialize(context):
+    add_history(bar_count={bar_count}, frequency='1d', field='price')
+    context.history_trace = []
+
+def handle_data(context, data):
+    prices = history(bar_count={bar_count}, frequency='1d', field='price')
+    context.history_trace.append(prices)
+""".format(bar_count=bar_count).strip()
+
+        # The data starts a week before the simulation, so the window is
+        # already full on the first bar.
+        data_params = factory.create_simulation_parameters(
+            start=pd.Timestamp('2006-03-13', tz='UTC'),
+            end=pd.Timestamp('2006-03-30', tz='UTC'),
+            data_frequency='daily')
+        _, df = factory.create_test_df_source(data_params)
+        df = df.astype(np.float64)
+        source = DataFrameSource(df, sids=[0])
+
+        sim_params = factory.create_simulation_parameters(
+            start=pd.Timestamp('2006-03-20', tz='UTC'),
+            end=pd.Timestamp('2006-03-30', tz='UTC'),
+            data_frequency='daily')
+
+        test_algo = TradingAlgorithm(
+            script=algo_text,
+            data_frequency='daily',
+            sim_params=sim_params
+        )
+        test_algo.run(source, overwrite_sim_params=False)
+
+        history_trace = test_algo.history_trace
+        self.assertEqual(len(history_trace), len(sim_params.trading_days))
+
+        for day, received in zip(sim_params.trading_days, history_trace):
+            expected = df[:day].iloc[-bar_count:]
+            assert_frame_equal(expected, received)
+
     def test_history_daily_data_1m_window(self):
         algo_text = """
 from zipline.api import history, add_history
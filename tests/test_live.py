@@ -0,0 +1,125 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from datetime import timedelta
+import sys
+from unittest import TestCase, skipIf
+
+import numpy as np
+
+from zipline.sources import SpecificEquityTrades
+from zipline.test_algorithms import TestAlgorithm
+from zipline.utils import factory
+
+# zipline.gens.live uses async/await, which can't even be parsed before
+# Python 3.5.  This module must stay free of that syntax, so that it can be
+# collected on every version.
+HAS_LIVE = sys.version_info >= (3, 5)
+
+if HAS_LIVE:
+    import asyncio
+    from zipline.gens.live import (
+        LiveDriver,
+        QueueFeed,
+        TCPFeed,
+        serve_events,
+    )
+
+
+@skipIf(not HAS_LIVE, "zipline.gens.live requires Python 3.5")
+class TestLiveDriver(TestCase):
+
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(num_days=6)
+        self.sim_params.sids = {133}
+        self.loop = asyncio.new_event_loop()
+        # Queues created outside of the loop bind to the current loop.
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def trades(self):
+        return factory.create_trade_history(
+            133,
+            [10.0, 10.0, 11.0, 11.0, 12.0, 12.0],
+            [100, 100, 100, 300, 100, 100],
+            timedelta(days=1),
+            self.sim_params,
+        )
+
+    def algo(self):
+        return TestAlgorithm(133, 10, 3, sim_params=self.sim_params)
+
+    def queue_feed(self, events):
+        queue = asyncio.Queue()
+        for event in events:
+            queue.put_nowait(event)
+        queue.put_nowait(None)
+        return QueueFeed(queue)
+
+    def assert_same_results(self, output, expected):
+        np.testing.assert_array_equal(output.index, expected.index)
+        np.testing.assert_allclose(output['portfolio_value'].values,
+                                   expected['portfolio_value'].values)
+
+    def test_matches_batch_run(self):
+        expected = self.algo().run(SpecificEquityTrades(
+            event_list=self.trades()), overwrite_sim_params=False)
+
+        algo = self.algo()
+        driver = LiveDriver(algo, [self.queue_feed(self.trades())])
+        output = self.loop.run_until_complete(driver.run())
+
+        self.assert_same_results(output, expected)
+        self.assertEqual(driver.snapshot_latency.count, 6)
+        self.assertEqual(driver.order_latency.count, 3)
+        self.assertEqual(driver.latency_report().loc['order', 'count'], 3)
+        self.assertIsNotNone(algo.risk_report)
+
+    def test_tcp_feed(self):
+        expected = self.algo().run(SpecificEquityTrades(
+            event_list=self.trades()), overwrite_sim_params=False)
+
+        server = self.loop.run_until_complete(serve_events(self.trades()))
+        port = server.sockets[0].getsockname()[1]
+        try:
+            driver = LiveDriver(self.algo(), [TCPFeed('127.0.0.1', port)])
+            output = self.loop.run_until_complete(driver.run())
+        finally:
+            server.close()
+            self.loop.run_until_complete(server.wait_closed())
+
+        self.assert_same_results(output, expected)
+
+    def test_slow_feed_does_not_block(self):
+        slow = asyncio.Queue()
+        # The slow feed sends nothing until the other feed is done, so
+        # its bar is late.
+        trades = self.trades()
+        fast_feed = self.queue_feed(trades[1:])
+
+        driver = LiveDriver(self.algo(), [fast_feed, QueueFeed(slow)],
+                            max_delay=0.01)
+
+        def release():
+            slow.put_nowait(trades[0])
+            slow.put_nowait(None)
+
+        self.loop.call_later(0.2, release)
+        output = self.loop.run_until_complete(driver.run())
+        self.assertEqual(len(output), 6)
+        self.assertEqual(driver.late_bars, 1)
+        self.assertEqual(driver.snapshot_latency.count, 5)
@@ -0,0 +1,201 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest import TestCase
+
+from mock import patch
+import numpy as np
+import pandas as pd
+
+from zipline.algorithm import TradingAlgorithm
+from zipline.sources import DataFrameSource
+from zipline.test_algorithms import NoopAlgorithm, TestAlgorithm
+from zipline.utils import factory
+from zipline.utils.parallel import (
+    ChunkResult,
+    ChunkTask,
+    chunk_date_ranges,
+    reconcile_chunks,
+    run_chunked,
+)
+
+HISTORY_SCRIPT = """
+from zipline.api import add_history, history, record
+
+def initialize(context):
+    add_history(bar_count=3, frequency='1d', field='price')
+
+def handle_data(context, data):
+    prices = history(bar_count=3, frequency='1d', field='price')
+    record(full=int(not prices.isnull().values.any()))
+"""
+
+
+# The factories are module level classes, so that they can be sent to the
+# worker processes.
+
+class DataFrameSlices(object):
+    def __init__(self, df):
+        self.df = df
+
+    def __call__(self, start, end):
+        return DataFrameSource(self.df.loc[start:end])
+
+
+class BuyAndHold(object):
+    def __init__(self, sid):
+        self.sid = sid
+
+    def __call__(self, sim_params):
+        return TestAlgorithm(self.sid, 10, 100, sim_params=sim_params)
+
+
+class HistoryAlgorithm(object):
+    def __call__(self, sim_params):
+        return TradingAlgorithm(script=HISTORY_SCRIPT,
+                                sim_params=sim_params,
+                                data_frequency='daily')
+
+
+class TestChunkedRun(TestCase):
+
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(num_days=20)
+        _, self.df = factory.create_test_df_source(self.sim_params)
+        self.sid = self.df.columns[0]
+        self.sim_params.sids = set(self.df.columns)
+
+    def source_factory(self, start, end):
+        return DataFrameSource(self.df.loc[start:end])
+
+    def test_chunk_date_ranges(self):
+        ranges = chunk_date_ranges(self.sim_params, 3)
+        self.assertEqual(len(ranges), 3)
+
+        days = self.sim_params.trading_days
+        self.assertEqual(ranges[0][0], days[0])
+        self.assertEqual(ranges[-1][1], days[-1])
+
+        covered = sum(len(days[(days >= start) & (days <= end)])
+                      for start, end in ranges)
+        self.assertEqual(covered, len(days))
+
+    def test_flat_chunks_are_kept(self):
+        def algo_factory(sim_params):
+            return NoopAlgorithm(sim_params=sim_params)
+
+        stats = run_chunked(algo_factory, self.source_factory,
+                            self.sim_params, chunks=4, processes=1)
+
+        self.assertEqual(len(stats), len(self.sim_params.trading_days))
+        np.testing.assert_allclose(stats['portfolio_value'].values,
+                                   self.sim_params.capital_base)
+
+    def test_open_positions_match_sequential_run(self):
+        def algo_factory(sim_params):
+            return TestAlgorithm(self.sid, 10, 100, sim_params=sim_params)
+
+        expected = algo_factory(self.sim_params).run(
+            self.source_factory(self.sim_params.period_start,
+                                self.sim_params.period_end),
+            overwrite_sim_params=False,
+        )
+        stats = run_chunked(algo_factory, self.source_factory,
+                            self.sim_params, chunks=4, processes=1)
+
+        np.testing.assert_array_equal(stats.index, expected.index)
+        np.testing.assert_allclose(stats['portfolio_value'].values,
+                                   expected['portfolio_value'].values)
+        np.testing.assert_allclose(stats['ending_cash'].values,
+                                   expected['ending_cash'].values)
+
+    def test_pool(self):
+        algo_factory = BuyAndHold(self.sid)
+        source_factory = DataFrameSlices(self.df)
+
+        expected = run_chunked(algo_factory, source_factory, self.sim_params,
+                               chunks=4, processes=1)
+        stats = run_chunked(algo_factory, source_factory, self.sim_params,
+                            chunks=4, processes=2)
+
+        np.testing.assert_array_equal(stats.index, expected.index)
+        np.testing.assert_allclose(stats['portfolio_value'].values,
+                                   expected['portfolio_value'].values)
+
+    def test_warmup_days(self):
+        # The data starts a week before the simulation.
+        data_params = factory.create_simulation_parameters(num_days=25)
+        _, df = factory.create_test_df_source(data_params)
+        df = df.astype(np.float64)
+        sim_params = factory.create_simulation_parameters(
+            start=data_params.trading_days[5], num_days=20)
+        sim_params.sids = set(df.columns)
+
+        def run(warmup_days):
+            return run_chunked(HistoryAlgorithm(), DataFrameSlices(df),
+                               sim_params, chunks=4, processes=1,
+                               warmup_days=warmup_days)
+
+        # Without a warm-up, the first window of each chunk isn't full.
+        self.assertEqual(run(0)['full'].sum(), 20 - 2 * 4)
+        self.assertTrue(run(2)['full'].all())
+
+
+class TestReconcileChunks(TestCase):
+
+    def setUp(self):
+        days = factory.create_simulation_parameters(num_days=2).trading_days
+        self.tasks = [ChunkTask(None, None, None, day, day, 0, None)
+                      for day in days]
+
+        def stats(day, cash):
+            return pd.DataFrame({
+                'starting_cash': [1000.0],
+                'ending_cash': [cash],
+                'starting_value': [0.0],
+                'ending_value': [0.0],
+                'portfolio_value': [cash],
+                'pnl': [cash - 1000.0],
+                'returns': [(cash - 1000.0) / 1000.0],
+                'gross_leverage': [0.0],
+            }, index=[day])
+
+        # The first chunk ends flat, with more cash than it started with.
+        self.results = [
+            ChunkResult(stats(days[0], 1100.0), (1000.0, {}, []),
+                        (1100.0, {}, [])),
+            ChunkResult(stats(days[1], 1000.0), (1000.0, {}, []),
+                        (1000.0, {}, [])),
+        ]
+        self.rerun = ChunkResult(stats(days[1], 1100.0), (1100.0, {}, []),
+                                 (1100.0, {}, []))
+
+    def test_cash_dependent_chunks_are_rerun(self):
+        with patch('zipline.utils.parallel.run_chunk',
+                   return_value=self.rerun) as run_chunk:
+            stats = reconcile_chunks(self.tasks, self.results)
+
+        self.assertEqual(run_chunk.call_count, 1)
+        self.assertEqual(run_chunk.call_args[0][0].initial_state,
+                         (1100.0, {}, []))
+        self.assertEqual(stats['ending_cash'].tolist(), [1100.0, 1100.0])
+
+    def test_cash_independent_chunks_are_shifted(self):
+        with patch('zipline.utils.parallel.run_chunk') as run_chunk:
+            stats = reconcile_chunks(self.tasks, self.results,
+                                     cash_independent=True)
+
+        self.assertFalse(run_chunk.called)
+        self.assertEqual(stats['ending_cash'].tolist(), [1100.0, 1100.0])
+        self.assertEqual(stats['returns'].tolist(), [0.1, 0.0])
@@ -901,6 +901,42 @@ class TestPositionPerformance(unittest.TestCase):
                       net_leverage=-0.25,
                       net_liquidation=800.0)
 
+    def test_get_positions_only_refreshes_changed(self):
+        trades_1 = factory.create_trade_history(
+            1, [10, 11], [100, 100], onesec, self.sim_params
+        )
+        trades_2 = factory.create_trade_history(
+            2, [10, 12], [100, 100], onesec, self.sim_params
+        )
+
+        pp = perf.PerformancePeriod(1000.0)
+        pp.execute_transaction(create_txn(trades_1[0], 10.0, 100))
+        pp.execute_transaction(create_txn(trades_2[0], 10.0, 100))
+
+        positions = pp.get_positions()
+        self.assertEqual(positions[1].amount, 100)
+        self.assertEqual(positions[2].amount, 100)
+        self.assertEqual(pp._dirty_sids, set())
+
+        # Nothing changed, so the same object comes back untouched.
+        self.assertIs(pp.get_positions(), positions)
+
+        pp.update_last_sale(trades_1[1])
+        self.assertEqual(pp._dirty_sids, {1})
+        pp.calculate_performance()
+        self.assertEqual(pp.ending_value, 1100.0 + 1000.0)
+
+        positions = pp.get_positions()
+        self.assertEqual(positions[1].last_sale_price, 11)
+        self.assertEqual(positions[2].last_sale_price, 10)
+
+        # Closing a position removes it.
+        pp.execute_transaction(create_txn(trades_2[1], 12.0, -100))
+        positions = pp.get_positions()
+        self.assertNotIn(2, positions)
+        pp.calculate_performance()
+        self.assertEqual(pp.as_portfolio().positions_value, 1100.0)
+
     def test_levered_long_position(self):
         """
             start with $1,000, then buy 1000 shares at $10.
@@ -1759,3 +1795,44 @@ class TestPerformanceTracker(unittest.TestCase):
             # In the second bar we can start establishing a sharpe ratio.
             self.assertIsNone(msg_1['cumulative_risk_metrics']['sharpe'])
             self.assertIsNotNone(msg_2['cumulative_risk_metrics']['sharpe'])
+
+
+class TestRecordedVariables(unittest.TestCase):
+
+    def test_columns(self):
+        recorder = perf.RecordedVariables(capacity=2)
+        dts = pd.date_range('2006-01-03', periods=5, tz='UTC')
+
+        recorder.current['count'] = 0
+        for i, dt in enumerate(dts):
+            recorder.current['count'] = i
+            if i == 1:
+                recorder.current['late'] = 1
+            if i == 3:
+                recorder.current['count'] = 3.5
+                recorder.current['label'] = 'x'
+            recorder.append_row(dt)
+
+        frame = recorder.frame()
+        self.assertEqual(len(recorder), 5)
+        np.testing.assert_array_equal(frame.index, dts)
+
+        # The int column became float when a float was recorded.
+        self.assertEqual(frame['count'].dtype, np.float64)
+        np.testing.assert_array_equal(frame['count'].values,
+                                      [0, 1, 2, 3.5, 4])
+        # Rows before the first record are NaN.
+        np.testing.assert_array_equal(frame['late'].values,
+                                      [np.nan, 1, 1, 1, 1])
+        self.assertEqual(frame['label'].dtype, object)
+        self.assertEqual(frame['label'].tolist()[3:], ['x', 'x'])
+
+    def test_clear_rows(self):
+        recorder = perf.RecordedVariables()
+        recorder.current['a'] = 1
+        recorder.append_row(pd.Timestamp('2006-01-03', tz='UTC'))
+        recorder.clear_rows()
+
+        self.assertEqual(len(recorder), 0)
+        self.assertEqual(recorder.current, {'a': 1})
+        self.assertEqual(recorder.columns(), [])
@@ -0,0 +1,121 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from datetime import timedelta
+from unittest import TestCase, skipIf
+
+import numpy as np
+
+from zipline.errors import PipelineWorkerError
+from zipline.gens.pipeline import (
+    SharedArray,
+    can_pipeline,
+    decode_block,
+    encode_block,
+    share_block,
+)
+from zipline.protocol import DATASOURCE_TYPE, Event
+from zipline.sources import DataFrameSource, SpecificEquityTrades
+from zipline.test_algorithms import TestAlgorithm
+from zipline.utils import factory
+
+
+class FailingSource(SpecificEquityTrades):
+
+    def create_fresh_generator(self):
+        def gen():
+            yield next(super(FailingSource, self).create_fresh_generator())
+            raise ValueError('source failed')
+        return gen()
+
+
+class TestBlocks(TestCase):
+
+    def setUp(self):
+        sim_params = factory.create_simulation_parameters(num_days=3)
+        trades = factory.create_trade_history(
+            1, [10.0, 11.0, 12.0], [100, 200, 300], timedelta(days=1),
+            sim_params)
+        benchmark = Event({'dt': trades[1].dt,
+                           'returns': 0.01,
+                           'type': DATASOURCE_TYPE.BENCHMARK,
+                           'source_id': 'benchmarks'})
+        trades[2].extra = {'mavg': 1.5}
+        self.snapshots = [
+            (trades[0].dt, [trades[0]]),
+            (trades[1].dt, [benchmark, trades[1]]),
+            (trades[2].dt, [trades[2]]),
+        ]
+
+    def assert_decoded(self, decoded):
+        snapshots = self.snapshots
+        self.assertEqual([dt for dt, _ in decoded],
+                         [dt for dt, _ in snapshots])
+        for (_, events), (_, expected) in zip(decoded, snapshots):
+            self.assertEqual(events, expected)
+
+        trade = decoded[2][1][0]
+        self.assertIs(type(trade), Event)
+        self.assertIs(type(trade.volume), int)
+        self.assertIs(type(trade.price), float)
+        self.assertEqual(trade.extra, {'mavg': 1.5})
+
+    def test_round_trip(self):
+        self.assert_decoded(decode_block(encode_block(self.snapshots)))
+
+    def test_shared_round_trip(self):
+        buffer = np.zeros(1 << 16, dtype=np.uint8)
+        shared = share_block(encode_block(self.snapshots), buffer)
+        self.assertIsInstance(shared['dts'], SharedArray)
+
+        decoded = decode_block(shared, buffer)
+        # The decoded events don't depend on the slot.
+        buffer[:] = 0
+        self.assert_decoded(decoded)
+
+    def test_block_larger_than_slot(self):
+        buffer = np.zeros(16, dtype=np.uint8)
+        self.assertIsNone(share_block(encode_block(self.snapshots), buffer))
+
+
+@skipIf(not can_pipeline(), "fork is not available")
+class TestPipelinedRun(TestCase):
+
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(num_days=20)
+        self.sim_params.sids = {0}
+        _, self.df = factory.create_test_df_source(self.sim_params)
+
+    def run_algo(self, pipelined, source):
+        algo = TestAlgorithm(0, 10, 5, sim_params=self.sim_params,
+                             pipelined=pipelined)
+        return algo.run(source, overwrite_sim_params=False)
+
+    def test_matches_in_process_run(self):
+        expected = self.run_algo(False, DataFrameSource(self.df))
+        output = self.run_algo(True, DataFrameSource(self.df))
+
+        np.testing.assert_array_equal(output.index, expected.index)
+        np.testing.assert_allclose(output['portfolio_value'].values,
+                                   expected['portfolio_value'].values)
+        self.assertEqual(output['transactions'].map(len).sum(),
+                         expected['transactions'].map(len).sum())
+
+    def test_worker_error(self):
+        trades = factory.create_trade_history(
+            0, [10.0, 11.0, 12.0], [100, 200, 300], timedelta(days=1),
+            self.sim_params)
+        with self.assertRaises(PipelineWorkerError) as ctx:
+            self.run_algo(True, FailingSource(event_list=trades))
+        self.assertIn('source failed', str(ctx.exception))
@@ -0,0 +1,191 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from datetime import timedelta
+from functools import partial
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from zipline.finance.blotter import Blotter
+from zipline.finance.commission import PerShare
+from zipline.finance.slippage import (
+    VolumeShareSlippage,
+    batch_models,
+    transact_partial,
+)
+from zipline.sources import SpecificEquityTrades
+from zipline.test_algorithms import TestAlgorithm
+from zipline.utils import factory
+from zipline.utils.memory import sizeof, tracemalloc
+from zipline.utils.profiling import Profiler, uninstrumented
+
+
+class Counter(object):
+    def __init__(self):
+        self.count = 0
+
+    def incr(self):
+        self.count += 1
+        return self.count
+
+    def values(self, n):
+        for i in range(n):
+            yield self.incr()
+
+
+class TestProfiler(TestCase):
+
+    def test_instrument(self):
+        profiler = Profiler()
+        counter = Counter()
+        profiler.instrument(counter, 'incr', 'incr')
+        profiler.instrument(counter, 'values', 'values', generator=True)
+
+        self.assertEqual(list(counter.values(3)), [1, 2, 3])
+
+        report = profiler.report()
+        self.assertEqual(report.phases.loc['incr', 'calls'], 3)
+        # One call per value, plus the call that raised StopIteration.
+        self.assertEqual(report.phases.loc['values', 'calls'], 4)
+
+        # The nested calls to incr are excluded from the time of values.
+        values = report.phases.loc['values']
+        self.assertLessEqual(values['wall'], values['total_wall'])
+
+    def test_reinstrument(self):
+        counter = Counter()
+        original = counter.incr
+        Profiler().instrument(counter, 'incr', 'incr')
+
+        profiler = Profiler()
+        profiler.instrument(counter, 'incr', 'incr')
+        self.assertEqual(uninstrumented(counter.incr), original)
+
+        counter.incr()
+        self.assertEqual(profiler.report().phases.loc['incr', 'calls'], 1)
+
+    def test_instrument_partial(self):
+        counter = Counter()
+        counter.add = partial(lambda counter, n: counter.count + n, counter)
+        profiler = Profiler()
+        profiler.instrument(counter, 'add', 'add')
+
+        self.assertEqual(counter.add(2), 2)
+        self.assertEqual(profiler.report().phases.loc['add', 'calls'], 1)
+
+    def test_batch_models(self):
+        blotter = Blotter()
+        blotter.transact = transact_partial(VolumeShareSlippage(),
+                                            PerShare())
+        Profiler().instrument(blotter, 'transact', 'slippage',
+                              generator=True)
+        self.assertIsNotNone(batch_models(blotter.transact))
+
+    def test_restore(self):
+        counter = Counter()
+        original = partial(lambda n: n)
+        counter.add = original
+        profiler = Profiler()
+        profiler.instrument(counter, 'incr', 'incr')
+        profiler.instrument(counter, 'add', 'add')
+
+        profiler.restore()
+        self.assertNotIn('incr', vars(counter))
+        self.assertIs(counter.add, original)
+
+
+class TestSizeof(TestCase):
+
+    def test_containers(self):
+        array = np.zeros(1000)
+        self.assertGreaterEqual(sizeof([array]), array.nbytes)
+        # Shared objects are only counted once.
+        self.assertLess(sizeof([array, array]), 2 * array.nbytes)
+
+        series = pd.Series(np.zeros(1000))
+        self.assertGreaterEqual(sizeof({'s': series}), 2 * 8000)
+
+        seen = set()
+        sizeof(array, seen)
+        self.assertEqual(sizeof(array, seen), 0)
+
+
+class TestProfiledRun(TestCase):
+
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(num_days=4)
+        trade_history = factory.create_trade_history(
+            133,
+            [10.0, 10.0, 11.0, 11.0],
+            [100, 100, 100, 300],
+            timedelta(days=1),
+            self.sim_params
+        )
+        self.source = SpecificEquityTrades(event_list=trade_history)
+
+    def test_profile_report(self):
+        algo = TestAlgorithm(133, 10, 100, sim_params=self.sim_params,
+                             profile=True)
+        algo.run(self.source)
+
+        phases = algo.profile_report.phases
+        for phase in ('bar', 'sources', 'update_universe',
+                      'blotter.process_trade', 'perf_tracker.process_event',
+                      'risk.update', 'events'):
+            self.assertIn(phase, phases.index)
+
+        self.assertEqual(phases.loc['bar', 'calls'],
+                         algo.profile_report.bar_latency.sum())
+
+        # The simulation isn't timed once the run is over.
+        self.assertNotIn('process_trade', algo.blotter.__dict__)
+        self.assertFalse(hasattr(algo.blotter.transact, '__profiled__'))
+
+    def test_batch_fills(self):
+        algo = TestAlgorithm(133, 10, 100, sim_params=self.sim_params,
+                             profile=True, batch_fills=True)
+        algo.run(self.source)
+
+        phases = algo.profile_report.phases
+        self.assertIn('blotter.process_trades', phases.index)
+        self.assertNotIn('process_trades', algo.blotter.__dict__)
+
+    def test_memory_report(self):
+        algo = TestAlgorithm(133, 10, 100, sim_params=self.sim_params,
+                             profile=True, profile_memory=2,
+                             trace_allocations=4)
+        algo.run(self.source)
+
+        memory = algo.profile_report.memory
+        self.assertEqual(len(memory), 2)
+        for component in ('blotter.orders', 'risk.cumulative',
+                          'processed_transactions', 'sink'):
+            self.assertIn(component, memory.columns)
+            self.assertTrue((memory[component] > 0).all())
+
+        allocations = algo.profile_report.allocations
+        if tracemalloc is None:
+            self.assertEqual(len(allocations), 0)
+        else:
+            self.assertGreater(len(allocations), 0)
+            self.assertFalse(tracemalloc.is_tracing())
+
+    def test_disabled_by_default(self):
+        algo = TestAlgorithm(133, 10, 100, sim_params=self.sim_params)
+        algo.run(self.source)
+
+        self.assertIsNone(algo.profile_report)
+        self.assertNotIn('process_trade', algo.blotter.__dict__)
@@ -0,0 +1,97 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest import TestCase
+
+from zipline.sources import DataFrameSource
+from zipline.test_algorithms import TestAlgorithm
+from zipline.utils import factory
+from zipline.utils.progress import ProgressReporter
+
+
+class FakeClock(object):
+    """
+    A clock advancing one second every time it is read.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+
+class Stall(Exception):
+    pass
+
+
+class TestProgressReporter(TestCase):
+
+    def setUp(self):
+        self.sim_params = factory.create_simulation_parameters(num_days=10)
+        self.sim_params.sids = {0}
+        _, self.df = factory.create_test_df_source(self.sim_params)
+        self.reports = []
+
+    def run_algo(self, reporter):
+        algo = TestAlgorithm(0, 10, 3, sim_params=self.sim_params,
+                             progress=reporter)
+        algo.run(DataFrameSource(self.df), overwrite_sim_params=False)
+        return algo
+
+    def test_reports(self):
+        reporter = ProgressReporter(self.reports.append, interval=3.0,
+                                    clock=FakeClock())
+        self.run_algo(reporter)
+
+        # One report per 3 bars, plus the final report.
+        self.assertEqual(len(self.reports), 10 // 3 + 1)
+
+        progress = [report.progress for report in self.reports]
+        self.assertEqual(progress, sorted(progress))
+
+        first = self.reports[0]
+        self.assertEqual(first.bars, 3)
+        self.assertEqual(first.bars_per_second, 1.0)
+        self.assertEqual(first.elapsed, 3.0)
+        self.assertGreater(first.progress, 0.0)
+        self.assertAlmostEqual(
+            first.remaining, 3.0 * (1 - first.progress) / first.progress)
+        self.assertIsNotNone(first.eta)
+
+        last = self.reports[-1]
+        self.assertEqual(last.progress, 1.0)
+        self.assertEqual(last.bars, 10)
+        self.assertEqual(last.remaining, 0.0)
+        self.assertGreater(last.events, last.bars)
+        self.assertGreater(last.transactions, 0)
+
+    def test_function(self):
+        algo = self.run_algo(self.reports.append)
+        self.assertIsInstance(algo.progress, ProgressReporter)
+        # Only the final report within the default interval.
+        self.assertEqual(len(self.reports), 1)
+        self.assertEqual(self.reports[0].progress, 1.0)
+
+    def test_callback_ends_run(self):
+        def callback(report):
+            if report.bars_per_second < 2:
+                raise Stall()
+
+        reporter = ProgressReporter(callback, interval=5.0,
+                                    clock=FakeClock())
+        with self.assertRaises(Stall):
+            self.run_algo(reporter)
+        self.assertEqual(reporter.last.bars, 5)
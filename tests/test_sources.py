@@ -26,6 +26,11 @@ from zipline.sources import (DataFrameSource,
                              DataPanelSource,
                              RandomWalkSource)
 from zipline.utils import tradingcalendar as calendar_nyse
+from zipline.finance import trading
+from zipline.sources.benchmark_source import (
+    benchmark_events,
+    benchmark_slice,
+)
 
 
 class TestDataFrameSource(TestCase):
@@ -126,3 +131,38 @@ class TestRandomWalkSource(TestCase):
             self.assertGreater(event.price, 0,
                                "price should never go negative.")
             self.assertEqual(event.dt.hour, 0)
+
+
+class TestBenchmarkSource(TestCase):
+
+    def expected_events(self, sim_params):
+        env = trading.environment
+        minute = (sim_params.data_frequency == 'minute' or
+                  sim_params.emission_rate == 'minute')
+        return [
+            (env.get_open_and_close(dt)[1] if minute else dt, ret)
+            for dt, ret in env.benchmark_returns.iteritems()
+            if sim_params.period_start.date() <= dt.date()
+            <= sim_params.period_end.date()
+        ]
+
+    def test_matches_full_scan(self):
+        for frequency in ('daily', 'minute'):
+            sim_params = factory.create_simulation_parameters(
+                num_days=10, data_frequency=frequency)
+            events = benchmark_events(sim_params)
+
+            self.assertEqual([(e.dt, e.returns) for e in events],
+                             self.expected_events(sim_params))
+            for event in events:
+                self.assertEqual(event.source_id, 'benchmarks')
+
+    def test_slices_are_cached(self):
+        sim_params = factory.create_simulation_parameters(num_days=10)
+        self.assertIs(benchmark_slice(sim_params),
+                      benchmark_slice(sim_params))
+
+        # Every call creates new events.
+        first, second = benchmark_events(sim_params), \
+            benchmark_events(sim_params)
+        self.assertIsNot(first[0], second[0])
@@ -18,6 +18,10 @@ from nose_parameterized import parameterized
 from six.moves import range
 from unittest import TestCase
 from zipline import TradingAlgorithm
+from zipline.errors import UnsupportedEmissionPolicy
+from zipline.finance.performance import CallbackSink
+from zipline.finance.trading import EmissionPolicy
+from zipline.sources import DataFrameSource
 from zipline.test_algorithms import NoopAlgorithm
 from zipline.utils import factory
 
@@ -64,3 +68,92 @@ class TestTradeSimulation(TestCase):
             pd.DatetimeIndex(algo.before_trading_at)),
             "Expected %s but was %s."
             % (params.trading_days, algo.before_trading_at))
+
+    def test_warmup_splits_apply_to_initial_positions(self):
+        # The data, and a 2:1 split, start a week before the simulation.
+        data_params = factory.create_simulation_parameters(
+            start=pd.Timestamp('2006-03-13', tz='UTC'),
+            end=pd.Timestamp('2006-03-24', tz='UTC'))
+        sim_params = factory.create_simulation_parameters(
+            start=pd.Timestamp('2006-03-20', tz='UTC'),
+            end=pd.Timestamp('2006-03-24', tz='UTC'))
+        _, df = factory.create_test_df_source(data_params)
+        sid = df.columns[0]
+        sim_params.sids = set(df.columns)
+        split = factory.create_split(sid, 0.5,
+                                     pd.Timestamp('2006-03-15', tz='UTC'))
+
+        algo = NoopAlgorithm(sim_params=sim_params,
+                             initial_state=(1000.0, {sid: (100, 10.0, 10.0)},
+                                            []))
+        algo.run([DataFrameSource(df), [split]], overwrite_sim_params=False)
+
+        _, positions, _ = algo.get_state()
+        amount, cost_basis, _ = positions[sid]
+        self.assertEqual(amount, 200)
+        self.assertEqual(cost_basis, 5.0)
+
+
+class TestEmissionPolicy(TestCase):
+
+    def run_minutely(self, policy):
+        params = factory.create_simulation_parameters(
+            num_days=2, sids=[1], data_frequency='minute',
+            emission_rate='minute', emission_policy=policy)
+        # A trade in every market minute of the two days.
+        source = factory.create_minutely_trade_source(
+            [1], trade_count=2 * 390, sim_params=params)
+        messages = []
+        algo = NoopAlgorithm(sim_params=params)
+        algo.run([source], sink=CallbackSink(messages.append))
+        return algo, messages
+
+    @staticmethod
+    def minute_messages(messages):
+        return [m for m in messages if 'minute_perf' in m]
+
+    @staticmethod
+    def daily_messages(messages):
+        return [m for m in messages if 'daily_perf' in m]
+
+    def test_default_emits_at_the_close(self):
+        # One minute message and one daily rollup per day, as without an
+        # emission policy.
+        _, messages = self.run_minutely(None)
+        self.assertEqual(len(self.minute_messages(messages)), 2)
+        self.assertEqual(len(self.daily_messages(messages)), 2)
+        self.assertEqual(len(messages), 5)
+
+    def test_trade_minutes(self):
+        _, messages = self.run_minutely(EmissionPolicy(minutes='trades'))
+        self.assertEqual(len(self.minute_messages(messages)), 2 * 390)
+        self.assertEqual(len(self.daily_messages(messages)), 2)
+
+    def test_daily_only(self):
+        algo, messages = self.run_minutely(EmissionPolicy.daily_only())
+        self.assertEqual(self.minute_messages(messages), [])
+        self.assertEqual(len(self.daily_messages(messages)), 2)
+        # The minute closes are still processed.
+        self.assertEqual(algo.perf_tracker.day_count, 2.0)
+
+    def test_on_demand(self):
+        policy = EmissionPolicy.on_demand(lambda dt: dt.minute == 0)
+        _, messages = self.run_minutely(policy)
+        # 15:00 through 21:00 UTC on both days.
+        self.assertEqual(len(self.minute_messages(messages)), 2 * 7)
+
+    def test_fields_subset(self):
+        policy = EmissionPolicy(minutes='none', fields=['positions'])
+        _, messages = self.run_minutely(policy)
+        for message in self.daily_messages(messages):
+            self.assertNotIn('cumulative_perf', message)
+            self.assertNotIn('cumulative_risk_metrics', message)
+            self.assertIn('positions', message['daily_perf'])
+            self.assertNotIn('transactions', message['daily_perf'])
+            self.assertNotIn('orders', message['daily_perf'])
+
+    def test_invalid_policy(self):
+        with self.assertRaises(UnsupportedEmissionPolicy):
+            EmissionPolicy(minutes='hourly')
+        with self.assertRaises(UnsupportedEmissionPolicy):
+            EmissionPolicy(fields=['positions', 'bogus'])
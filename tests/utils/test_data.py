@@ -0,0 +1,44 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from zipline.utils.data import GrowableColumns
+
+
+class TestGrowableColumns(TestCase):
+
+    def test_missing_values_and_datetimes(self):
+        columns = GrowableColumns(capacity=1)
+        dts = pd.date_range('2006-01-03', periods=3, tz='UTC')
+
+        columns.append(dts[0], {'sid': 1, 'opened': dts[0]})
+        columns.append(dts[1], {'sid': 2})
+        columns.append(dts[2], {'sid': 3, 'opened': dts[2]})
+
+        frame = columns.frame()
+        self.assertEqual(frame['sid'].dtype, np.int64)
+        np.testing.assert_array_equal(frame['sid'].values, [1, 2, 3])
+        # A missing value makes the column an object column of NaN.
+        self.assertTrue(pd.isnull(frame['opened'].iloc[1]))
+        self.assertEqual(frame['opened'].iloc[2], dts[2])
+
+        columns = GrowableColumns()
+        for dt in pd.date_range('2006-01-03', periods=3):
+            columns.append(dt, {'opened': dt})
+        self.assertTrue(
+            np.issubdtype(columns.frame()['opened'].dtype, np.datetime64))
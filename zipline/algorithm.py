@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from copy import copy
+import os
 import warnings
 
 import pytz
@@ -25,12 +26,15 @@ from itertools import groupby, chain
 from six.moves import filter
 from six import (
     exec_,
+    get_unbound_function,
     iteritems,
+    itervalues,
     string_types,
 )
 from operator import attrgetter
 
 from zipline.errors import (
+    BadOrderParameters,
     OrderDuringInitialize,
     OverrideCommissionPostInit,
     OverrideSlippagePostInit,
@@ -40,14 +44,15 @@ from zipline.errors import (
     UnsupportedSlippageModel,
 )
 
-from zipline.finance import trading
-from zipline.finance.blotter import Blotter
+from zipline.finance.blotter import Blotter, OrderView
+from zipline.finance.order_archive import OrderArchive
 from zipline.finance.commission import PerShare, PerTrade, PerDollar
 from zipline.finance.controls import (
     LongOnly,
     MaxOrderCount,
     MaxOrderSize,
     MaxPositionSize,
+    validates_batches,
 )
 from zipline.finance.execution import (
     LimitOrder,
@@ -55,19 +60,33 @@ from zipline.finance.execution import (
     StopLimitOrder,
     StopOrder,
 )
-from zipline.finance.performance import PerformanceTracker
+from zipline.finance.performance import (
+    PerformanceTracker,
+    RecordedVariables,
+)
+from zipline.finance.performance.sinks import DataFrameSink
 from zipline.finance.slippage import (
     VolumeShareSlippage,
     SlippageModel,
+    batch_models,
     transact_partial
 )
 from zipline.gens.composites import (
     date_sorted_sources,
     sequential_transforms,
 )
+from zipline.gens.pipeline import can_pipeline, pipelined_stream
+from zipline.gens.recording import (
+    record_stream,
+    recording_path,
+    replay_stream,
+    stream_key,
+)
 from zipline.gens.tradesimulation import AlgorithmSimulator
 from zipline.sources import DataFrameSource, DataPanelSource
+from zipline.sources.benchmark_source import benchmark_events
 from zipline.transforms.utils import StatefulTransform
+from zipline.utils.algo_logging import AlgoLogHandler
 from zipline.utils.api_support import ZiplineAPI, api_method
 import zipline.utils.events
 from zipline.utils.events import (
@@ -77,9 +96,11 @@ from zipline.utils.events import (
     TimeRuleFactory,
 )
 from zipline.utils.factory import create_simulation_parameters
+from zipline.utils.memory import MemoryProfiler
+from zipline.utils.profiling import Profiler, uninstrumented
+from zipline.utils.progress import ProgressReporter
 
 import zipline.protocol
-from zipline.protocol import Event
 
 from zipline.history import HistorySpec
 from zipline.history.history_container import HistoryContainer
@@ -137,8 +158,51 @@ class TradingAlgorithm(object):
                How much capital to start with.
             instant_fill : bool <default: False>
                Whether to fill orders immediately or on next bar.
+            skip_idle_bars : bool <default: False>
+               Don't call handle_data on every bar; only functions added
+               with schedule_function are called.  The universe, history
+               and scheduled function rules are still updated on every
+               bar, but the trades of sids without open orders skip the
+               blotter and the perf tracker: only their last sale prices
+               are kept, and applied to the positions when the portfolio
+               is next needed.  handle_data can't be given in this mode.
+            batch_fills : bool <default: False>
+               Fill the orders of all the trades of a bar at once, with the
+               vectorized fill_batch and calculate_batch of the slippage
+               and commission models.  Falls back to filling trade by trade
+               with models that don't support it.
+            initial_state : tuple <default: None>
+               Starting cash, positions and open orders, as returned by
+               get_state on the algorithm of a previous run.  The splits
+               in the data before sim_params.period_start are applied to
+               it, so it should be the state as of the start of the data.
+            stream_cache : str <default: None>
+               Directory in which to record the snapshot stream built from
+               the sources and transforms.  Later runs over the same
+               sources, transforms and sim_params replay the recording,
+               skipping the data preparation.  Only runs whose sources are
+               pandas sources, or define content_fingerprint, are recorded.
+            pipelined : bool <default: False>
+               Run the sources, transforms and benchmark merge in a forked
+               worker process, concurrently with the simulation.  Ignored
+               on platforms without fork.  Phases of the worker are not
+               included in the profile report.
             environment : str <default: 'zipline'>
                The environment that this algorithm is running in.
+            profile : bool <default: False>
+               Time each phase of the simulation.  After run, the timings
+               are available as profile_report.
+            profile_memory : int <default: None>
+               With profile, measure the memory held by each component of
+               the simulation every this many market days.
+            trace_allocations : int <default: None>
+               With profile, take a tracemalloc snapshot of the largest
+               allocations every this many market days.  Ignored on Pythons
+               without tracemalloc.
+            progress : ProgressReporter or function <default: None>
+               Report the progress and throughput of the simulation.  A
+               function is called with a Progress every 10 seconds, see
+               zipline.utils.progress.
         """
         self.datetime = None
 
@@ -149,12 +213,15 @@ class TradingAlgorithm(object):
         # List of trading controls to be used to validate orders.
         self.trading_controls = []
 
-        self._recorded_vars = {}
+        # The values passed to record, and one row of them per day.
+        self.recorder = RecordedVariables()
+        self._recorded_vars = self.recorder.current
         self.namespace = kwargs.get('namespace', {})
 
         self._platform = kwargs.pop('platform', 'zipline')
 
         self.logger = None
+        self.log_handler = None
 
         self.benchmark_return_source = None
 
@@ -164,6 +231,32 @@ class TradingAlgorithm(object):
 
         self.instant_fill = kwargs.pop('instant_fill', False)
 
+        self.skip_idle_bars = kwargs.pop('skip_idle_bars', False)
+
+        self.batch_fills = kwargs.pop('batch_fills', False)
+
+        self.profile = kwargs.pop('profile', False)
+        self.profile_memory = kwargs.pop('profile_memory', None)
+        self.trace_allocations = kwargs.pop('trace_allocations', None)
+        self.profiler = None
+        self.profile_report = None
+
+        self.progress = kwargs.pop('progress', None)
+        if self.progress is not None and \
+                not isinstance(self.progress, ProgressReporter):
+            self.progress = ProgressReporter(self.progress)
+
+        # Directory of recorded snapshot streams, see zipline.gens.recording.
+        # When set, a run whose inputs were recorded by an earlier run
+        # replays the recording instead of running the sources and
+        # transforms.
+        self.stream_cache = kwargs.pop('stream_cache', None)
+        self.stream_recording = None
+
+        # Produce the snapshot stream in a worker process, see
+        # zipline.gens.pipeline.
+        self.pipelined = kwargs.pop('pipelined', False)
+
         # set the capital base
         self.capital_base = kwargs.pop('capital_base', DEFAULT_CAPITAL_BASE)
 
@@ -174,9 +267,30 @@ class TradingAlgorithm(object):
             )
         self.perf_tracker = PerformanceTracker(self.sim_params)
 
+        # Optional (cash, positions, open_orders) to start the simulation
+        # from, as returned by get_state, used when a run continues from the
+        # end of a previous one.
+        self.initial_state = kwargs.pop('initial_state', None)
+
+        # Market days after which orders that are no longer open are moved
+        # from the blotter to an OrderArchive at @order_archive, a path or
+        # OrderArchive, or a temporary file by default.  A path must not
+        # exist yet; a temporary file is removed along with the algorithm.
+        order_retention = kwargs.pop('order_retention', None)
+        order_archive = kwargs.pop('order_archive', None)
+
         self.blotter = kwargs.pop('blotter', None)
         if not self.blotter:
             self.blotter = Blotter()
+        # The views returned by get_open_orders, and the blotter and
+        # open_orders_version they were built from.
+        self._open_orders = {}
+        self._open_orders_key = (None, None)
+        if order_retention is not None:
+            if not isinstance(order_archive, OrderArchive):
+                order_archive = OrderArchive(order_archive)
+            self.blotter.retention = order_retention
+            self.blotter.archive = order_archive
 
         self.portfolio_needs_update = True
         self.account_needs_update = True
@@ -205,31 +319,52 @@ class TradingAlgorithm(object):
             code = compile(self.algoscript, filename, 'exec')
             exec_(code, self.namespace)
             self._initialize = self.namespace.get('initialize')
-            if 'handle_data' not in self.namespace:
-                raise ValueError('You must define a handle_data function.')
-            else:
+            if self.skip_idle_bars:
+                self._handle_data = None
+                if 'handle_data' in self.namespace:
+                    raise ValueError(
+                        'handle_data is never called with skip_idle_bars.'
+                    )
+            elif 'handle_data' in self.namespace:
                 self._handle_data = self.namespace['handle_data']
+            else:
+                raise ValueError('You must define a handle_data function.')
 
             self._before_trading_start = \
                 self.namespace.get('before_trading_start')
             # Optional analyze function, gets called after run
             self._analyze = self.namespace.get('analyze')
 
-        elif kwargs.get('initialize') and kwargs.get('handle_data'):
+        elif kwargs.get('initialize') and (kwargs.get('handle_data') or
+                                           self.skip_idle_bars):
             if self.algoscript is not None:
                 raise ValueError('You can not set script and \
                 initialize/handle_data.')
             self._initialize = kwargs.pop('initialize')
-            self._handle_data = kwargs.pop('handle_data')
+            self._handle_data = kwargs.pop('handle_data', None)
+            if self.skip_idle_bars and self._handle_data is not None:
+                raise ValueError(
+                    'handle_data is never called with skip_idle_bars.'
+                )
             self._before_trading_start = kwargs.pop('before_trading_start',
                                                     None)
 
+        # When skipping idle bars, the user's handle_data isn't called, but
+        # history still has to see every bar.
+        if self.skip_idle_bars and \
+                get_unbound_function(type(self).handle_data) is not \
+                get_unbound_function(TradingAlgorithm.handle_data):
+            raise ValueError(
+                'handle_data is never called with skip_idle_bars.'
+            )
+        on_bar = self.update_bar_data if self.skip_idle_bars \
+            else self.handle_data
         self.event_manager.add_event(
             zipline.utils.events.Event(
                 zipline.utils.events.Always(),
-                # We pass handle_data.__func__ to get the unbound method.
+                # We pass on_bar.__func__ to get the unbound method.
                 # We will explicitly pass the algorithm to bind it again.
-                self.handle_data.__func__,
+                on_bar.__func__,
             ),
             prepend=True,
         )
@@ -268,12 +403,14 @@ class TradingAlgorithm(object):
         self._before_trading_start(self)
 
     def handle_data(self, data):
+        self.update_bar_data(data)
+        self._handle_data(self, data)
+
+    def update_bar_data(self, data):
         self._most_recent_data = data
         if self.history_container:
             self.history_container.update(data, self.datetime)
 
-        self._handle_data(self, data)
-
     def analyze(self, perf):
         if self._analyze is None:
             return
@@ -320,40 +457,48 @@ class TradingAlgorithm(object):
         if sim_params is None:
             sim_params = self.sim_params
 
+        self.stream_recording = None
+        if self.stream_cache is not None and source_filter is None:
+            key = stream_key(self.sources, self.transforms, sim_params,
+                             self.benchmark_return_source)
+            if key is not None:
+                self.stream_recording = recording_path(self.stream_cache,
+                                                       key)
+                if os.path.isfile(self.stream_recording):
+                    return replay_stream(self.stream_recording)
+
         if self.benchmark_return_source is None:
-            env = trading.environment
-            if (sim_params.data_frequency == 'minute'
-                    or sim_params.emission_rate == 'minute'):
-                update_time = lambda date: env.get_open_and_close(date)[1]
-            else:
-                update_time = lambda date: date
-            benchmark_return_source = [
-                Event({'dt': update_time(dt),
-                       'returns': ret,
-                       'type': zipline.protocol.DATASOURCE_TYPE.BENCHMARK,
-                       'source_id': 'benchmarks'})
-                for dt, ret in
-                trading.environment.benchmark_returns.iteritems()
-                if dt.date() >= sim_params.period_start.date()
-                and dt.date() <= sim_params.period_end.date()
-            ]
+            benchmark_return_source = benchmark_events(sim_params)
         else:
             benchmark_return_source = self.benchmark_return_source
 
-        date_sorted = date_sorted_sources(*self.sources)
+        sources = self.sources
+        if self.profiler is not None:
+            sources = [self.profiler.timed_iter('sources', source)
+                       for source in sources]
+            benchmark_return_source = self.profiler.timed_iter(
+                'sources', benchmark_return_source)
+
+        date_sorted = date_sorted_sources(*sources)
 
         if source_filter:
             date_sorted = filter(source_filter, date_sorted)
 
         with_tnfms = sequential_transforms(date_sorted,
                                            *self.transforms)
+        if self.profiler is not None and self.transforms:
+            with_tnfms = self.profiler.timed_iter('transforms', with_tnfms)
 
         with_benchmarks = date_sorted_sources(benchmark_return_source,
                                               with_tnfms)
 
         # Group together events with the same dt field. This depends on the
         # events already being sorted.
-        return groupby(with_benchmarks, attrgetter('dt'))
+        snapshots = groupby(with_benchmarks, attrgetter('dt'))
+
+        if self.stream_recording is not None:
+            return record_stream(snapshots, self.stream_recording)
+        return snapshots
 
     def _create_generator(self, sim_params, source_filter=None):
         """
@@ -369,20 +514,73 @@ class TradingAlgorithm(object):
             # HACK: When running with the `run` method, we set perf_tracker to
             # None so that it will be overwritten here.
             self.perf_tracker = PerformanceTracker(sim_params)
+            if self.initial_state is not None:
+                cash, positions, open_orders = self.initial_state
+                self.perf_tracker.set_initial_state(cash, positions)
+                self.blotter.restore_open_orders(open_orders)
 
         self.portfolio_needs_update = True
         self.account_needs_update = True
         self.performance_needs_update = True
 
-        self.data_gen = self._create_data_generator(source_filter, sim_params)
+        self.profiler = Profiler() if self.profile else None
+        if self.profiler is not None and (self.profile_memory or
+                                          self.trace_allocations):
+            self.profiler.memory = MemoryProfiler(self.profile_memory,
+                                                  self.trace_allocations)
+
+        self.recorder.clear_rows()
+
+        if self.pipelined and can_pipeline():
+            self.data_gen = pipelined_stream(self, sim_params, source_filter)
+        else:
+            self.data_gen = self._create_data_generator(source_filter,
+                                                        sim_params)
 
         self.trading_client = AlgorithmSimulator(self, sim_params)
 
         transact_method = transact_partial(self.slippage, self.commission)
         self.set_transact(transact_method)
+        if self.batch_fills and batch_models(self.blotter.transact) is None:
+            warnings.warn("batch_fills is set, but the slippage and "
+                          "commission models can't fill orders in batches. "
+                          "The orders are filled trade by trade.",
+                          UserWarning)
+
+        if self.profiler is not None:
+            self._instrument(self.profiler)
 
         return self.trading_client.transform(self.data_gen)
 
+    def _instrument(self, profiler):
+        """
+        Time the phases of the simulation built by _create_generator.
+        """
+        instrument = profiler.instrument
+        simulator = self.trading_client
+
+        instrument(simulator, '_process_snapshot', 'bar', histogram=True)
+        instrument(simulator, 'update_universe', 'update_universe')
+        instrument(simulator, 'get_message', 'perf_message')
+        instrument(self.blotter, 'process_trade', 'blotter.process_trade',
+                   generator=True)
+        instrument(self.blotter, 'process_trades', 'blotter.process_trades')
+        instrument(self.blotter, 'transact', 'slippage', generator=True)
+        instrument(self.perf_tracker, 'process_event',
+                   'perf_tracker.process_event')
+        instrument(self.perf_tracker.cumulative_risk_metrics, 'update',
+                   'risk.update')
+        instrument(self.event_manager, 'handle_data', 'events')
+        if getattr(self, '_handle_data', None) is not None:
+            instrument(self, '_handle_data', 'handle_data')
+
+        # History containers can be created after this point, e.g. by the
+        # first call to history() or at the end of the warmup.
+        if self.history_container is not None:
+            instrument(self.history_container, 'update', 'history.update')
+        self.history_container_class = profiler.instrument_factory(
+            self.history_container_class, 'update', 'history.update')
+
     def get_generator(self):
         """
         Override this method to add new logic to the construction
@@ -395,7 +593,7 @@ class TradingAlgorithm(object):
     # the run method to the subclass, and refactor to put the
     # generator creation logic into get_generator.
     def run(self, source, overwrite_sim_params=True,
-            benchmark_return_source=None):
+            benchmark_return_source=None, sink=None):
         """Run the algorithm.
 
         :Arguments:
@@ -411,9 +609,20 @@ class TradingAlgorithm(object):
                * index must be DatetimeIndex
                * array contents should be price info.
 
+        :Optional:
+            sink : PerfSink <default: DataFrameSink()>
+               Consumer of the perf messages as they are produced.  See
+               zipline.finance.performance.sinks.  Pass a ResultsSink to
+               get a columnar Results instead of daily_stats.
+
         :Returns:
             daily_stats : pandas.DataFrame
               Daily performance metrics such as returns, alpha etc.
+              If a sink was given, whatever its result method returns.
+              analyze is only called when that isn't None.
+              With profile, the timings aren't part of the result, so
+              that its type doesn't depend on profiling; they are stored
+              in profile_report.
 
         """
         if isinstance(source, list):
@@ -473,41 +682,61 @@ class TradingAlgorithm(object):
         # create transforms and zipline
         self.gen = self._create_generator(self.sim_params)
 
-        with ZiplineAPI(self):
-            # loop through simulated_trading, each iteration returns a
-            # perf dictionary
-            perfs = []
-            for perf in self.gen:
-                perfs.append(perf)
-
-            # convert perf dict to pandas dataframe
-            daily_stats = self._create_daily_stats(perfs)
-
-        self.analyze(daily_stats)
+        if sink is None:
+            sink = DataFrameSink()
+
+        if sink.columnar_recorded_vars:
+            # The sink reads the recorded variables from the recorder, so
+            # they don't need to be copied into every message.
+            sink.recorder = self.recorder
+            self.trading_client.emit_recorded_vars = False
+        if sink.columnar_results:
+            self.perf_tracker.results = sink.builder
+
+        memory = self.profiler.memory if self.profiler is not None else None
+        if memory is not None:
+            memory.start()
+
+        try:
+            with ZiplineAPI(self):
+                # loop through simulated_trading, each iteration returns a
+                # perf dictionary, which is consumed by the sink right away.
+                for perf in self.gen:
+                    sink.write(perf)
+                    if memory is not None and 'daily_perf' in perf:
+                        memory.day(perf['daily_perf']['period_close'],
+                                   self, sink)
+
+                daily_stats = sink.result()
+                self.risk_report = sink.risk_report
+        finally:
+            if memory is not None:
+                memory.stop()
+            if self.profiler is not None:
+                self.profiler.restore()
+                self.history_container_class = uninstrumented(
+                    self.history_container_class)
+
+        if self.profiler is not None:
+            self.profile_report = self.profiler.report()
+
+        if daily_stats is not None:
+            self.analyze(daily_stats)
 
         return daily_stats
 
-    def _create_daily_stats(self, perfs):
-        # create daily and cumulative stats dataframe
-        daily_perfs = []
-        # TODO: the loop here could overwrite expected properties
-        # of daily_perf. Could potentially raise or log a
-        # warning.
-        for perf in perfs:
-            if 'daily_perf' in perf:
-
-                perf['daily_perf'].update(
-                    perf['daily_perf'].pop('recorded_vars')
-                )
-                daily_perfs.append(perf['daily_perf'])
-            else:
-                self.risk_report = perf
-
-        daily_dts = [np.datetime64(perf['period_close'], utc=True)
-                     for perf in daily_perfs]
-        daily_stats = pd.DataFrame(daily_perfs, index=daily_dts)
-
-        return daily_stats
+    def get_state(self):
+        """
+        Return a (cash, positions, open_orders) tuple describing the book at
+        the current point of the simulation.  Passing it as `initial_state`
+        to a new algorithm lets that algorithm pick up where this one left
+        off.
+        """
+        cash, positions = self.perf_tracker.get_state()
+        open_orders = [order
+                       for orders in itervalues(self.blotter.open_orders)
+                       for order in orders]
+        return cash, positions, open_orders
 
     @api_method
     def add_transform(self, transform, days=None):
@@ -673,6 +902,64 @@ class TradingAlgorithm(object):
         Raises an UnsupportedOrderParameters if invalid arguments are found.
         """
 
+        self._validate_order_style(limit_price, stop_price, style)
+
+        if not self.trading_controls:
+            return
+
+        # The portfolio can't change while the controls run, so materialize
+        # it once rather than once per control.
+        portfolio = self.updated_portfolio()
+        algo_datetime = self.get_datetime()
+        current_data = self.trading_client.current_data
+        for control in self.trading_controls:
+            control.validate(sid,
+                             amount,
+                             portfolio,
+                             algo_datetime,
+                             current_data)
+
+    def validate_batch_order_params(self,
+                                    sids,
+                                    amounts,
+                                    limit_price,
+                                    stop_price,
+                                    style):
+        """
+        validate_order_params for the orders of @sids and @amounts, placed
+        together with the same execution style.
+
+        Each trading control validates the whole batch at once; the first
+        order rejected by a control raises its TradingControlViolation.
+        Only once no control rejected an order are the controls told that
+        the batch is placed.  The controls that don't override
+        validate_batch, whose validate may have side effects, are run last.
+        """
+        self._validate_order_style(limit_price, stop_price, style)
+
+        if not self.trading_controls or not len(sids):
+            return
+
+        portfolio = self.updated_portfolio()
+        algo_datetime = self.get_datetime()
+        current_data = self.trading_client.current_data
+        # sorted is stable, so the controls otherwise keep their order.
+        controls = sorted(self.trading_controls,
+                          key=lambda control: not validates_batches(control))
+        for control in controls:
+            rejected = control.validate_batch(sids,
+                                              amounts,
+                                              portfolio,
+                                              algo_datetime,
+                                              current_data)
+            if rejected.any():
+                i = np.flatnonzero(rejected)[0]
+                control.fail(sids[i], amounts[i])
+
+        for control in self.trading_controls:
+            control.batch_placed(sids, amounts, algo_datetime)
+
+    def _validate_order_style(self, limit_price, stop_price, style):
         if not self.initialized:
             raise OrderDuringInitialize(
                 msg="order() can only be called from within handle_data()"
@@ -689,13 +976,6 @@ class TradingAlgorithm(object):
                     msg="Passing both stop_price and style is not supported."
                 )
 
-        for control in self.trading_controls:
-            control.validate(sid,
-                             amount,
-                             self.updated_portfolio(),
-                             self.get_datetime(),
-                             self.trading_client.current_data)
-
     @staticmethod
     def __convert_order_params_for_blotter(limit_price, stop_price, style):
         """
@@ -777,8 +1057,18 @@ class TradingAlgorithm(object):
             self.performance_needs_update = False
         return self._account
 
-    def set_logger(self, logger):
+    def set_logger(self, logger, handler=None):
+        """
+        Set the logger for the algorithm's messages.  @handler, e.g. an
+        zipline.utils.algo_logging.AlgoLogHandler, is bound while the
+        simulation runs, so it receives every record logged from the
+        algorithm.  An AlgoLogHandler without a channel only handles the
+        records of @logger.
+        """
         self.logger = logger
+        if isinstance(handler, AlgoLogHandler) and handler.channel is None:
+            handler.channel = logger.name
+        self.log_handler = handler
 
     def on_dt_changed(self, dt):
         """
@@ -940,27 +1230,135 @@ class TradingAlgorithm(object):
                                        style=style)
 
     @api_method
-    def get_open_orders(self, sid=None):
-        if sid is None:
-            return {
-                key: [order.to_api_obj() for order in orders]
-                for key, orders in iteritems(self.blotter.open_orders)
+    def order_target_percents(self, weights,
+                              limit_price=None, stop_price=None, style=None):
+        """
+        Place the orders adjusting the positions in the securities of
+        @weights, a Series or dict from sid to target percent of the current
+        portfolio value, to their targets.
+
+        The share amounts of all the orders are computed at once, and the
+        trading controls validate all of them before any is placed, so that
+        either all the orders are placed or none is.
+
+        Returns a dict from sid to the id of the order placed for it.
+        Securities already at their target, or without a price, get no
+        order.  Raises BadOrderParameters if a weight isn't finite.
+        """
+        if not isinstance(weights, pd.Series):
+            weights = pd.Series(weights)
+        if not len(weights):
+            return {}
+
+        portfolio = self.updated_portfolio()
+        positions = portfolio.positions
+        current_data = self.trading_client.current_data
+
+        sids = list(weights.index)
+        prices = np.array([current_data[sid].price for sid in sids],
+                          dtype=float)
+        held = np.array([positions[sid].amount if sid in positions else 0
+                         for sid in sids], dtype=float)
+
+        target_values = portfolio.portfolio_value * weights.values
+        invalid = ~np.isfinite(target_values)
+        if invalid.any():
+            raise BadOrderParameters(
+                msg="Can't order a target percent of {pct} for {sids}".format(
+                    pct=weights.values[invalid].tolist(),
+                    sids=[sids[i] for i in np.flatnonzero(invalid)]))
+
+        priced = np.isfinite(prices) & ~np.isclose(prices, 0)
+        if self.logger and not priced.all():
+            zero_message = "Price of {price} for {psid}; can't infer value"
+            for i in np.flatnonzero(~priced):
+                self.logger.debug(zero_message.format(price=prices[i],
+                                                      psid=sids[i]))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            amounts = target_values / prices - held
+
+        # Truncate like order does: 3.9999 -> 4; 5.5 -> 5; -5.5 -> -5
+        rounded = np.round(amounts)
+        amounts = np.where(np.abs(amounts - rounded) <= 1e-4,
+                           rounded, amounts)
+        amounts = np.where(priced, np.trunc(amounts), 0).astype(int)
+
+        placed = amounts != 0
+        sids = [sid for sid, is_placed in zip(sids, placed) if is_placed]
+        amounts = amounts[placed]
+
+        # Before the trading controls count the batch as placed.
+        self.blotter.check_amounts(amounts)
+        self.validate_batch_order_params(sids, amounts,
+                                         limit_price, stop_price, style)
+
+        style = self.__convert_order_params_for_blotter(limit_price,
+                                                        stop_price,
+                                                        style)
+        order_ids = self.blotter.order_batch(sids, amounts.tolist(), style)
+        return dict(zip(sids, order_ids))
+
+    @api_method
+    def rebalance(self, weights,
+                  limit_price=None, stop_price=None, style=None):
+        """
+        Adjust the portfolio to @weights, a Series or dict from sid to
+        target percent of the current portfolio value, closing the positions
+        in securities that aren't in @weights.  See order_target_percents.
+        """
+        if not isinstance(weights, pd.Series):
+            weights = pd.Series(weights)
+        closed = [sid for sid, position in iteritems(self.portfolio.positions)
+                  if position.amount and sid not in weights.index]
+        if closed:
+            weights = weights.append(pd.Series(0.0, index=closed))
+        return self.order_target_percents(weights,
+                                          limit_price=limit_price,
+                                          stop_price=stop_price,
+                                          style=style)
+
+    def _open_order_views(self):
+        """
+        The views of the blotter's open orders by sid, rebuilt only when the
+        blotter's open orders have changed since the last call.
+        """
+        blotter = self.blotter
+        version = blotter.open_orders_version
+        cached_blotter, cached_version = self._open_orders_key
+        if cached_blotter is not blotter or cached_version != version:
+            self._open_orders = {
+                key: tuple(OrderView(order) for order in orders)
+                for key, orders in iteritems(blotter.open_orders)
                 if orders
             }
-        if sid in self.blotter.open_orders:
-            orders = self.blotter.open_orders[sid]
-            return [order.to_api_obj() for order in orders]
-        return []
+            self._open_orders_key = (blotter, version)
+        return self._open_orders
+
+    @api_method
+    def get_open_orders(self, sid=None):
+        """
+        The open orders of @sid, or a dict of the open orders of every sid
+        that has any, as tuples of read-only OrderViews.
+
+        The same tuples are returned until the open orders change; the dict
+        is a copy.
+        """
+        open_orders = self._open_order_views()
+        if sid is None:
+            return dict(open_orders)
+        return open_orders.get(sid, ())
 
     @api_method
     def get_order(self, order_id):
-        if order_id in self.blotter.orders:
-            return self.blotter.orders[order_id].to_api_obj()
+        order = self.blotter.get_order(order_id)
+        if order is not None:
+            return OrderView(order)
 
     @api_method
     def cancel_order(self, order_param):
         order_id = order_param
-        if isinstance(order_param, zipline.protocol.Order):
+        if isinstance(order_param, (zipline.protocol.Order, OrderView)):
             order_id = order_param.id
 
         self.blotter.cancel(order_id)
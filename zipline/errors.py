@@ -170,3 +170,22 @@ class IncompatibleHistoryFrequency(ZiplineError):
 Requested history at frequency '{frequency}' cannot be created with data
 at frequency '{data_frequency}'.
 """.strip()
+
+
+class UnsupportedEmissionPolicy(ZiplineError):
+    """
+    Raised if an EmissionPolicy is created with an unknown minute mode or
+    unknown optional fields.
+    """
+    msg = "{msg}"
+
+
+class PipelineWorkerError(ZiplineError):
+    """
+    Raised when the worker process producing the snapshots of a pipelined
+    run fails.
+    """
+    msg = """
+The pipeline worker failed:
+{traceback}
+""".strip()
@@ -12,24 +12,29 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from itertools import count
+from numbers import Integral
 import math
-import uuid
 
-from copy import copy
+import numpy as np
 from logbook import Logger
 from collections import defaultdict
 
-from six import text_type
+from six import itervalues, text_type
 
 import zipline.errors
 import zipline.protocol as zp
 
 from zipline.finance.slippage import (
+    Transaction,
     VolumeShareSlippage,
+    batch_models,
+    transact_batch,
     transact_partial,
     check_order_triggers
 )
 from zipline.finance.commission import PerShare
+from zipline.finance.order_book import OrderBook
 
 log = Logger('Blotter')
 
@@ -43,15 +48,47 @@ ORDER_STATUS = Enum(
     'HELD',
 )
 
+# The fields of an order seen by algorithms, through its to_dict and its
+# OrderView.
+ORDER_FIELDS = (
+    'id',
+    'dt',
+    'reason',
+    'created',
+    'sid',
+    'amount',
+    'filled',
+    'commission',
+    'status',
+    'stop',
+    'limit',
+    'stop_reached',
+    'limit_reached',
+)
+
+# Ids of the orders created without an id, outside of a Blotter.
+_order_ids = count(1)
+
 
 class Blotter(object):
 
-    def __init__(self):
+    def __init__(self, retention=None, archive=None):
         self.transact = transact_partial(VolumeShareSlippage(), PerShare())
         # these orders are aggregated by sid
-        self.open_orders = defaultdict(list)
+        self.open_orders = defaultdict(OrderBook)
         # keep a dict of orders by their own id
         self.orders = {}
+        # Orders no longer open are moved from self.orders to the archive,
+        # an OrderArchive, retention market days after they last changed.
+        self.retention = retention
+        self.archive = archive
+        # Incremented whenever an order is added to, removed from or moved
+        # within open_orders, so that views of the open orders can tell
+        # when they are stale.
+        self.open_orders_version = 0
+        # Ids of the orders placed by this blotter.  Ids are only unique per
+        # blotter, so restore_open_orders moves past the ids it restores.
+        self._order_ids = count(1)
         # holding orders that have come in since the last
         # event.
         self.new_orders = []
@@ -73,6 +110,26 @@ class Blotter(object):
                    new_orders=self.new_orders,
                    current_dt=self.current_dt)
 
+    @property
+    def new_orders(self):
+        return self._new_orders
+
+    @new_orders.setter
+    def new_orders(self, orders):
+        self._new_orders = orders
+        self._new_order_ids = set(order.id for order in orders)
+
+    def _relay(self, order):
+        """
+        Move @order to the end of new_orders, so that its new status is
+        relayed out along with newly placed orders.
+        """
+        if order.id in self._new_order_ids:
+            self._new_orders.remove(order)
+        else:
+            self._new_order_ids.add(order.id)
+        self._new_orders.append(order)
+
     def set_date(self, dt):
         self.current_dt = dt
 
@@ -94,11 +151,12 @@ class Blotter(object):
         if amount == 0:
             # Don't bother placing orders for 0 shares.
             return
-        elif amount > self.max_shares:
-            # Arbitrary limit of 100 billion (US) shares will never be
-            # exceeded except by a buggy algorithm.
-            raise OverflowError("Can't order more than %d shares" %
-                                self.max_shares)
+        self._check_max_shares(amount)
+
+        if order_id is None:
+            order_id = next(self._order_ids)
+        elif order_id in self.orders:
+            raise ValueError("Order {0} already exists.".format(order_id))
 
         is_buy = (amount > 0)
         order = Order(
@@ -110,12 +168,88 @@ class Blotter(object):
             id=order_id
         )
 
-        self.open_orders[order.sid].append(order)
+        self.open_orders[order.sid].add(order)
+        self.open_orders_version += 1
         self.orders[order.id] = order
-        self.new_orders.append(order)
+        self._relay(order)
 
         return order.id
 
+    def _check_max_shares(self, amount):
+        if amount > self.max_shares:
+            # Arbitrary limit of 100 billion (US) shares will never be
+            # exceeded except by a buggy algorithm.
+            raise OverflowError("Can't order more than %d shares" %
+                                self.max_shares)
+
+    def check_amounts(self, amounts):
+        """
+        Raise OverflowError if any of @amounts is over max_shares.
+        """
+        for amount in amounts:
+            self._check_max_shares(amount)
+
+    def order_batch(self, sids, amounts, style):
+        """
+        Place an order for each of @sids and @amounts, all with the
+        execution style @style.  Returns the ids of the orders.
+
+        The amounts are all checked first, so if one of them is over
+        max_shares none of the orders is placed.
+        """
+        amounts = list(amounts)
+        self.check_amounts(amounts)
+        return [self.order(sid, amount, style)
+                for sid, amount in zip(sids, amounts)]
+
+    def restore_open_orders(self, orders):
+        """
+        Re-open orders carried over from another blotter, e.g. the open
+        orders left at the end of a simulation over an earlier date range.
+
+        The orders placed afterwards get ids past those of @orders.  Raises
+        ValueError if the id of an order is already taken.
+        """
+        last_id = 0
+        for order in orders:
+            if order.id in self.orders:
+                raise ValueError(
+                    "Order {0} already exists.".format(order.id))
+            self.open_orders[order.sid].add(order)
+            self.orders[order.id] = order
+            if isinstance(order.id, Integral):
+                last_id = max(last_id, order.id)
+        self.open_orders_version += 1
+
+        next_id = next(self._order_ids)
+        self._order_ids = count(max(next_id, last_id + 1))
+
+    def get_order(self, order_id):
+        """
+        The order with @order_id, in memory or archived, or None.
+        """
+        order = self.orders.get(order_id)
+        if order is None and self.archive is not None:
+            order = self.archive.get(order_id)
+        return order
+
+    def archive_orders(self, before):
+        """
+        Move the orders that are no longer open and haven't changed since
+        before the datetime @before to the archive.  Returns the number of
+        orders moved.
+        """
+        if self.archive is None:
+            return 0
+
+        expired = [order for order in itervalues(self.orders)
+                   if order.dt < before and not order.open]
+        if expired:
+            self.archive.append(expired)
+            for order in expired:
+                del self.orders[order.id]
+        return len(expired)
+
     def cancel(self, order_id):
         if order_id not in self.orders:
             return
@@ -123,17 +257,13 @@ class Blotter(object):
         cur_order = self.orders[order_id]
 
         if cur_order.open:
-            order_list = self.open_orders[cur_order.sid]
-            if cur_order in order_list:
-                order_list.remove(cur_order)
-
-            if cur_order in self.new_orders:
-                self.new_orders.remove(cur_order)
+            self.open_orders[cur_order.sid].remove(cur_order)
+            self.open_orders_version += 1
             cur_order.cancel()
             cur_order.dt = self.current_dt
             # we want this order's new status to be relayed out
             # along with newly placed orders.
-            self.new_orders.append(cur_order)
+            self._relay(cur_order)
 
     def reject(self, order_id, reason=''):
         """
@@ -147,17 +277,13 @@ class Blotter(object):
 
         cur_order = self.orders[order_id]
 
-        order_list = self.open_orders[cur_order.sid]
-        if cur_order in order_list:
-            order_list.remove(cur_order)
-
-        if cur_order in self.new_orders:
-            self.new_orders.remove(cur_order)
+        self.open_orders[cur_order.sid].remove(cur_order)
+        self.open_orders_version += 1
         cur_order.reject(reason=reason)
         cur_order.dt = self.current_dt
         # we want this order's new status to be relayed out
         # along with newly placed orders.
-        self.new_orders.append(cur_order)
+        self._relay(cur_order)
 
     def hold(self, order_id, reason=''):
         """
@@ -170,21 +296,24 @@ class Blotter(object):
 
         cur_order = self.orders[order_id]
         if cur_order.open:
-            if cur_order in self.new_orders:
-                self.new_orders.remove(cur_order)
             cur_order.hold(reason=reason)
             cur_order.dt = self.current_dt
+            self.open_orders[cur_order.sid].refresh([cur_order])
+            self.open_orders_version += 1
             # we want this order's new status to be relayed out
             # along with newly placed orders.
-            self.new_orders.append(cur_order)
+            self._relay(cur_order)
 
     def process_split(self, split_event):
         if split_event.sid not in self.open_orders:
             return
 
-        orders_to_modify = self.open_orders[split_event.sid]
+        orders_to_modify = list(self.open_orders[split_event.sid])
         for order in orders_to_modify:
             order.handle_split(split_event)
+        # the split moved the orders' price targets.
+        self.open_orders[split_event.sid].refresh(orders_to_modify)
+        self.open_orders_version += 1
 
     def process_trade(self, trade_event):
         if trade_event.type != zp.DATASOURCE_TYPE.TRADE:
@@ -198,22 +327,88 @@ class Blotter(object):
             # less frequently than once per minute.
             return
 
-        orders = self.open_orders[trade_event.sid]
-        orders = sorted(orders, key=lambda o: o.dt)
-        # Only use orders for the current day or before
-        current_orders = filter(
-            lambda o: o.dt <= trade_event.dt,
-            orders)
+        book = self.open_orders[trade_event.sid]
+        # Only use orders for the current day or before, and skip the stop
+        # and limit orders whose targets the trade's price doesn't reach.
+        current_orders = book.fillable(trade_event.price, trade_event.dt)
 
         for txn, order in self.process_transactions(trade_event,
                                                     current_orders):
             yield txn, order
 
-        # update the open orders for the trade_event's sid
-        self.open_orders[trade_event.sid] = \
-            [order for order
-             in self.open_orders[trade_event.sid]
-             if order.open]
+        # drop the filled orders from the sid's open orders, and move the
+        # ones whose dt changed.
+        book.refresh(current_orders)
+        if current_orders:
+            self.open_orders_version += 1
+
+    def process_trades(self, trade_events):
+        """
+        Fill the open orders against @trade_events, trades of distinct sids
+        at the same dt.  Returns a list with the (txn, order) pairs of every
+        trade, as process_trade would yield them.
+
+        When the slippage and commission models support it, the fills of
+        all the trades are computed at once, see transact_batch.
+        """
+        models = batch_models(self.transact)
+        if models is None:
+            return [list(self.process_trade(event)) for event in trade_events]
+
+        fills = [[] for _ in trade_events]
+        orders = []
+        groups = []
+        touched = []
+
+        for i, event in enumerate(trade_events):
+            if (event.type != zp.DATASOURCE_TYPE.TRADE
+                    or event.sid not in self.open_orders
+                    or event.volume < 1):
+                continue
+
+            book = self.open_orders[event.sid]
+            current_orders = book.fillable(event.price, event.dt)
+            touched.append((book, current_orders))
+            for order in current_orders:
+                order.check_triggers(event)
+                if order.triggered:
+                    orders.append(order)
+                    groups.append(i)
+
+        if orders:
+            groups = np.array(groups)
+            prices = np.array([event.price for event in trade_events],
+                              dtype=float)[groups]
+            volumes = np.array([event.volume for event in trade_events],
+                               dtype=float)[groups]
+            amounts = np.array([order.open_amount for order in orders],
+                               dtype=float)
+
+            amounts, prices, commissions = transact_batch(
+                models[0], models[1], amounts, prices, volumes, groups)
+
+            for k in np.flatnonzero(amounts).tolist():
+                order = orders[k]
+                event = trade_events[groups[k]]
+                txn = Transaction(
+                    sid=event.sid,
+                    amount=int(amounts[k]),
+                    dt=event.dt,
+                    price=float(prices[k]),
+                    order_id=order.id,
+                    commission=float(commissions[k]),
+                )
+                order.filled += txn.amount
+                order.commission = (order.commission or 0.0) + txn.commission
+                order.dt = txn.dt
+                fills[groups[k]].append((txn, order))
+
+        for book, current_orders in touched:
+            book.refresh(current_orders)
+            if current_orders:
+                self.open_orders_version += 1
+
+        return fills
 
     def process_transactions(self, trade_event, current_orders):
         for order, txn in self.transact(trade_event, current_orders):
@@ -242,6 +437,29 @@ class Blotter(object):
 
 
 class Order(object):
+    # Orders are kept for the whole simulation, so they have no __dict__.
+    # source_id is only set on orders fed to the performance tracker as
+    # events.
+    __slots__ = (
+        'id',
+        'dt',
+        'reason',
+        'created',
+        'sid',
+        'amount',
+        'filled',
+        'commission',
+        '_status',
+        'stop',
+        'limit',
+        'stop_reached',
+        'limit_reached',
+        'direction',
+        'source_id',
+    )
+
+    type = zp.DATASOURCE_TYPE.ORDER
+
     def __init__(self, dt, sid, amount, stop=None, limit=None, filled=0,
                  commission=None, id=None):
         """
@@ -252,8 +470,7 @@ class Order(object):
                   a negative sign indicates a sell
         @filled - how many shares of the order have been filled so far
         """
-        # get a string representation of the uuid.
-        self.id = id or self.make_id()
+        self.id = id if id is not None else self.make_id()
         self.dt = dt
         self.reason = None
         self.created = dt
@@ -267,17 +484,12 @@ class Order(object):
         self.stop_reached = False
         self.limit_reached = False
         self.direction = math.copysign(1, self.amount)
-        self.type = zp.DATASOURCE_TYPE.ORDER
 
     def make_id(self):
-        return uuid.uuid4().hex
+        return next(_order_ids)
 
     def to_dict(self):
-        py = copy(self.__dict__)
-        for field in ['type', 'direction', '_status']:
-            del py[field]
-        py['status'] = self.status
-        return py
+        return {field: getattr(self, field) for field in ORDER_FIELDS}
 
     def to_api_obj(self):
         pydict = self.to_dict()
@@ -378,3 +590,55 @@ class Order(object):
         Unicode representation for this object.
         """
         return text_type(repr(self))
+
+
+class OrderView(object):
+    """
+    A read-only view of an Order, as returned to algorithms by get_order and
+    get_open_orders.
+
+    The view reads through to its order instead of copying it, so it sees
+    the fills and status changes of the order after it was returned.
+    """
+
+    __slots__ = ('_order',)
+
+    def __init__(self, order):
+        object.__setattr__(self, '_order', order)
+
+    def __getattr__(self, name):
+        if name in ORDER_FIELDS:
+            return getattr(self._order, name)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "Can't set {0} of a read-only order.".format(name)
+        )
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            "Can't delete {0} of a read-only order.".format(name)
+        )
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def keys(self):
+        return list(ORDER_FIELDS)
+
+    def __contains__(self, name):
+        return name in ORDER_FIELDS
+
+    def __eq__(self, other):
+        return isinstance(other, OrderView) and \
+            self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def to_dict(self):
+        return self._order.to_dict()
+
+    def __repr__(self):
+        return "Order({0})".format(self.to_dict())
@@ -13,6 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import numpy as np
+
+
+def _per_share(commissions, amounts):
+    """
+    @commissions spread over the shares of @amounts, zero where nothing was
+    traded.
+    """
+    shares = np.abs(amounts)
+    return np.where(shares > 0,
+                    commissions / np.where(shares > 0, shares, 1.0),
+                    0.0)
+
 
 class PerShare(object):
     """
@@ -50,6 +63,17 @@ class PerShare(object):
             commission = max(commission, self.min_trade_cost)
             return abs(commission / transaction.amount), commission
 
+    def calculate_batch(self, amounts, prices):
+        """
+        Vectorized calculate, for the transactions of @amounts shares at
+        @prices.  Returns the arrays of the per share and total commissions.
+        """
+        commissions = np.abs(amounts * self.cost)
+        if self.min_trade_cost is None:
+            return np.full(len(amounts), self.cost), commissions
+        commissions = np.maximum(commissions, self.min_trade_cost)
+        return _per_share(commissions, amounts), commissions
+
 
 class PerTrade(object):
     """
@@ -77,6 +101,14 @@ class PerTrade(object):
 
         return abs(self.cost / transaction.amount), self.cost
 
+    def calculate_batch(self, amounts, prices):
+        """
+        Vectorized calculate, for the transactions of @amounts shares at
+        @prices.  Returns the arrays of the per share and total commissions.
+        """
+        commissions = np.where(amounts != 0, self.cost, 0.0)
+        return _per_share(commissions, amounts), commissions
+
 
 class PerDollar(object):
     """
@@ -103,3 +135,11 @@ class PerDollar(object):
         """
         cost_per_share = transaction.price * self.cost
         return cost_per_share, abs(transaction.amount) * cost_per_share
+
+    def calculate_batch(self, amounts, prices):
+        """
+        Vectorized calculate, for the transactions of @amounts shares at
+        @prices.  Returns the arrays of the per share and total commissions.
+        """
+        cost_per_share = prices * self.cost
+        return cost_per_share, np.abs(amounts) * cost_per_share
@@ -14,7 +14,8 @@
 # limitations under the License.
 import abc
 
-from six import with_metaclass
+import numpy as np
+from six import get_unbound_function, with_metaclass
 
 from zipline.errors import TradingControlViolation
 
@@ -52,6 +53,50 @@ class TradingControl(with_metaclass(abc.ABCMeta)):
         """
         raise NotImplementedError
 
+    def validate_batch(self,
+                       sids,
+                       amounts,
+                       portfolio,
+                       algo_datetime,
+                       algo_current_data):
+        """
+        validate for the orders of @sids and @amounts, placed together.
+
+        Returns a boolean array that is True for the orders this
+        TradingControl rejects, rather than raising.  Each order is validated
+        on its own against @portfolio, as though the other orders of the
+        batch weren't placed.
+
+        Overrides should have no side effects, since another control may
+        still reject the batch; controls that keep track of the orders
+        placed do it in batch_placed, so a stateful control has to override
+        both methods.
+
+        The default implementation calls validate once per order, so a
+        stateful validate changes the state as the batch is checked.
+        TradingAlgorithm runs the controls that rely on it only after every
+        control overriding validate_batch accepted the batch.
+        """
+        rejected = np.zeros(len(sids), dtype=bool)
+        for i, (sid, amount) in enumerate(zip(sids, amounts)):
+            try:
+                self.validate(sid,
+                              amount,
+                              portfolio,
+                              algo_datetime,
+                              algo_current_data)
+            except TradingControlViolation:
+                rejected[i] = True
+        return rejected
+
+    def batch_placed(self, sids, amounts, algo_datetime):
+        """
+        Called once every control accepted the orders of @sids and
+        @amounts with validate_batch, before they are placed.  Controls
+        that keep track of the orders placed do it here.
+        """
+        pass
+
     def fail(self, sid, amount):
         """
         Raise a TradingControlViolation with information about the failure.
@@ -65,6 +110,42 @@ class TradingControl(with_metaclass(abc.ABCMeta)):
                                         attrs=self.__fail_args)
 
 
+def validates_batches(control):
+    """
+    Whether @control overrides TradingControl.validate_batch.
+    """
+    return get_unbound_function(type(control).validate_batch) is not \
+        get_unbound_function(TradingControl.validate_batch)
+
+
+def _applies(control_sid, sids):
+    """
+    Whether a control restricted to @control_sid applies to each of @sids.
+    """
+    if control_sid is None:
+        return np.ones(len(sids), dtype=bool)
+    return np.array([sid == control_sid for sid in sids], dtype=bool)
+
+
+def _prices(sids, algo_current_data, applies):
+    """
+    The current prices of those of @sids that a control applies to, NaN for
+    the others.
+    """
+    return np.array([algo_current_data[sid].price if applied else np.nan
+                     for sid, applied in zip(sids, applies)], dtype=float)
+
+
+def _held(sids, portfolio, applies):
+    """
+    The shares held of those of @sids that a control applies to, 0 for the
+    others.
+    """
+    positions = portfolio.positions
+    return np.array([positions[sid].amount if applied else 0
+                     for sid, applied in zip(sids, applies)], dtype=float)
+
+
 class MaxOrderCount(TradingControl):
     """
     TradingControl representing a limit on the number of orders that can be
@@ -98,6 +179,30 @@ class MaxOrderCount(TradingControl):
             self.fail(sid, amount)
         self.orders_placed += 1
 
+    def validate_batch(self,
+                       sids,
+                       amounts,
+                       _portfolio,
+                       algo_datetime,
+                       _algo_current_data):
+        """
+        Reject the orders past the self.max_count placed today.
+        """
+        algo_date = algo_datetime.date()
+
+        if self.current_date and self.current_date != algo_date:
+            self.orders_placed = 0
+        self.current_date = algo_date
+
+        remaining = max(self.max_count - self.orders_placed, 0)
+        return np.arange(len(sids)) >= remaining
+
+    def batch_placed(self, sids, amounts, algo_datetime):
+        """
+        Count the orders of a batch that every control accepted.
+        """
+        self.orders_placed += len(sids)
+
 
 class MaxOrderSize(TradingControl):
     """
@@ -155,6 +260,30 @@ class MaxOrderSize(TradingControl):
         if too_much_value:
             self.fail(sid, amount)
 
+    def validate_batch(self,
+                       sids,
+                       amounts,
+                       _portfolio,
+                       _algo_datetime,
+                       algo_current_data):
+        """
+        Reject the orders whose magnitudes exceed either self.max_shares or
+        self.max_notional.
+        """
+        applies = _applies(self.sid, sids)
+        amounts = np.asarray(amounts, dtype=float)
+        rejected = np.zeros(len(sids), dtype=bool)
+
+        if self.max_shares is not None:
+            rejected |= np.abs(amounts) > self.max_shares
+
+        if self.max_notional is not None:
+            prices = _prices(sids, algo_current_data, applies)
+            with np.errstate(invalid='ignore'):
+                rejected |= np.abs(amounts * prices) > self.max_notional
+
+        return rejected & applies
+
 
 class MaxPositionSize(TradingControl):
     """
@@ -217,6 +346,33 @@ class MaxPositionSize(TradingControl):
         if too_much_value:
             self.fail(sid, amount)
 
+    def validate_batch(self,
+                       sids,
+                       amounts,
+                       portfolio,
+                       _algo_datetime,
+                       algo_current_data):
+        """
+        Reject the orders that would make the magnitude of our positions
+        greater in shares than self.max_shares or greater in dollar value
+        than self.max_notional.
+        """
+        applies = _applies(self.sid, sids)
+        shares_post_order = (_held(sids, portfolio, applies) +
+                             np.asarray(amounts, dtype=float))
+        rejected = np.zeros(len(sids), dtype=bool)
+
+        if self.max_shares is not None:
+            rejected |= np.abs(shares_post_order) > self.max_shares
+
+        if self.max_notional is not None:
+            prices = _prices(sids, algo_current_data, applies)
+            with np.errstate(invalid='ignore'):
+                rejected |= (np.abs(shares_post_order * prices) >
+                             self.max_notional)
+
+        return rejected & applies
+
 
 class LongOnly(TradingControl):
     """
@@ -235,3 +391,15 @@ class LongOnly(TradingControl):
         """
         if portfolio.positions[sid].amount + amount < 0:
             self.fail(sid, amount)
+
+    def validate_batch(self,
+                       sids,
+                       amounts,
+                       portfolio,
+                       _algo_datetime,
+                       _algo_current_data):
+        """
+        Reject the orders after which we would hold negative shares.
+        """
+        held = _held(sids, portfolio, _applies(None, sids))
+        return held + np.asarray(amounts, dtype=float) < 0
@@ -0,0 +1,115 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+An append-only file of orders that are no longer needed in memory.
+
+A Blotter with a retention period moves its filled, cancelled and rejected
+orders to an OrderArchive once they are old enough, so that the orders it
+keeps in memory are bounded by the orders of the last few days.  Archived
+orders are pickled one after another; only the offset of each order in the
+file is kept in memory, so an archived order can still be read back by id.
+"""
+
+import os
+import tempfile
+
+from six.moves import cPickle as pickle
+
+
+class OrderArchive(object):
+    """
+    Orders appended to the file at @path, readable by id.
+
+    The file is only open while orders are appended or read.  @path must
+    not exist yet, so that the orders of an earlier run aren't overwritten.
+    Without a @path, the orders are written to a temporary file that is
+    removed when the archive is closed or garbage collected.
+    """
+
+    def __init__(self, path=None):
+        self.temporary = path is None
+        if self.temporary:
+            fd, path = tempfile.mkstemp(prefix='zipline-orders-',
+                                        suffix='.pickle')
+        else:
+            directory = os.path.dirname(path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            # Raises OSError if the file exists.
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        os.close(fd)
+
+        self.path = path
+        # order id -> offset of the pickled order in the file
+        self._offsets = {}
+        self.closed = False
+
+    def append(self, orders):
+        """
+        Write @orders at the end of the archive.
+        """
+        if self.closed:
+            raise ValueError("Can't append to a closed OrderArchive.")
+        with open(self.path, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            for order in orders:
+                self._offsets[order.id] = f.tell()
+                pickle.dump(order, f, pickle.HIGHEST_PROTOCOL)
+
+    def __getitem__(self, order_id):
+        offset = self._offsets[order_id]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return pickle.load(f)
+
+    def get(self, order_id, default=None):
+        if order_id not in self._offsets:
+            return default
+        return self[order_id]
+
+    def __iter__(self):
+        """
+        Read back all the archived orders, in the order they were archived.
+        """
+        with open(self.path, 'rb') as f:
+            for _ in range(len(self._offsets)):
+                yield pickle.load(f)
+
+    def __contains__(self, order_id):
+        return order_id in self._offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def close(self):
+        """
+        Stop archiving.  A temporary archive is removed along with its
+        orders.
+        """
+        if not self.closed:
+            self.closed = True
+            if self.temporary:
+                os.remove(self.path)
+
+    def __del__(self):
+        # An archive that failed to initialize has no closed attribute.
+        if not getattr(self, 'closed', True):
+            self.close()
+
+    def __repr__(self):
+        return "{0}({1!r}, orders={2})".format(self.__class__.__name__,
+                                               self.path,
+                                               len(self))
@@ -0,0 +1,282 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+The open orders of a single sid.
+
+Orders are filled in the order of their dt, and among orders with the same
+dt, in the order they were placed.  An OrderBook keeps its orders sorted that
+way, so that a trade doesn't have to sort them again, and indexed by id, so
+that an order can be found and removed with a binary search rather than a
+scan.  The sorted orders are split in blocks, so that adding or removing an
+order doesn't move every order behind it.
+
+Stop and limit orders whose price targets haven't been reached are also kept
+sorted by their target, per side.  A trade only has to look at the orders
+that can fill, i.e. the triggered ones, plus the ones whose target its price
+crosses, rather than check the triggers of every order resting in the book.
+"""
+
+from bisect import bisect_left, bisect_right
+
+# Sort before and after any placement sequence number.
+_FIRST = float('-inf')
+_LAST = float('inf')
+
+
+class SortedOrders(object):
+    """
+    Orders sorted by a key, a tuple ending with a sequence number that is
+    unique per order.
+
+    The orders are stored in blocks of at most 2 * load orders, along with
+    the largest key of each block, so an insert or remove only shifts the
+    items of one block rather than of the whole book.
+    """
+
+    __slots__ = ['load', '_maxes', '_keys', '_orders', '_len']
+
+    def __init__(self, load=256):
+        self.load = load
+        # The largest key of each block, and the keys and orders of each.
+        self._maxes = []
+        self._keys = []
+        self._orders = []
+        self._len = 0
+
+    def insert(self, key, order):
+        maxes = self._maxes
+        if not maxes:
+            maxes.append(key)
+            self._keys.append([key])
+            self._orders.append([order])
+            self._len = 1
+            return
+
+        i = min(bisect_right(maxes, key), len(maxes) - 1)
+        keys = self._keys[i]
+        orders = self._orders[i]
+        j = bisect_right(keys, key)
+        keys.insert(j, key)
+        orders.insert(j, order)
+        maxes[i] = keys[-1]
+        self._len += 1
+
+        if len(keys) > 2 * self.load:
+            # Split the block in halves.
+            half = self.load
+            self._keys.insert(i + 1, keys[half:])
+            self._orders.insert(i + 1, orders[half:])
+            del keys[half:]
+            del orders[half:]
+            maxes.insert(i, keys[-1])
+
+    def remove(self, key):
+        i = bisect_left(self._maxes, key)
+        keys = self._keys[i]
+        j = bisect_left(keys, key)
+        del keys[j]
+        del self._orders[i][j]
+        self._len -= 1
+
+        if keys:
+            self._maxes[i] = keys[-1]
+        else:
+            del self._maxes[i]
+            del self._keys[i]
+            del self._orders[i]
+
+    def through(self, bound):
+        """
+        The orders whose keys start with a value at most @bound.
+        """
+        key = (bound, _LAST)
+        i = bisect_right(self._maxes, key)
+        result = [order for orders in self._orders[:i] for order in orders]
+        if i < len(self._maxes):
+            result.extend(self._orders[i][:bisect_right(self._keys[i], key)])
+        return result
+
+    def starting_at(self, bound):
+        """
+        The orders whose keys start with a value at least @bound.
+        """
+        key = (bound, _FIRST)
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return []
+        result = self._orders[i][bisect_left(self._keys[i], key):]
+        result.extend(order for orders in self._orders[i + 1:]
+                      for order in orders)
+        return result
+
+    def __iter__(self):
+        for orders in self._orders:
+            for order in orders:
+                yield order
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        for orders in self._orders:
+            if index < len(orders):
+                return orders[index]
+            index -= len(orders)
+
+    def __len__(self):
+        return self._len
+
+
+class OrderBook(object):
+    """
+    The open orders of one sid, in the order they are filled.
+
+    Supports the read-only list operations; orders are added with add,
+    removed with remove, and refresh has to be called with the orders whose
+    dt, status or price targets may have changed.
+    """
+
+    def __init__(self, orders=()):
+        self._sorted = SortedOrders()
+        # order id -> the order's key in _sorted
+        self._keys = {}
+        self._seq = 0
+
+        # Orders that fill on any trade: market orders and the stop and
+        # limit orders that have been triggered, keyed like _sorted.
+        self._active = SortedOrders()
+        # Untriggered orders keyed by the price that triggers them.
+        self._buy_stops = SortedOrders()
+        self._sell_stops = SortedOrders()
+        self._buy_limits = SortedOrders()
+        self._sell_limits = SortedOrders()
+        # order id -> (structure, key) of the order among the above
+        self._places = {}
+
+        for order in orders:
+            self.add(order)
+
+    def _place(self, order, seq):
+        """
+        The structure and key that @order belongs under.
+        """
+        if order.stop is not None and not order.stop_reached:
+            if order.amount > 0:
+                return self._buy_stops, (order.stop, seq)
+            return self._sell_stops, (order.stop, seq)
+
+        if order.limit is not None and not order.limit_reached:
+            if order.amount > 0:
+                return self._buy_limits, (order.limit, seq)
+            return self._sell_limits, (order.limit, seq)
+
+        return self._active, (order.dt, seq)
+
+    def add(self, order):
+        if order.id in self._keys:
+            raise ValueError(
+                "Order {0} is already in the book.".format(order.id))
+        key = (order.dt, self._seq)
+        self._seq += 1
+        self._keys[order.id] = key
+        self._sorted.insert(key, order)
+
+        place = self._places[order.id] = self._place(order, key[1])
+        place[0].insert(place[1], order)
+
+    def remove(self, order):
+        """
+        Remove @order, returning whether it was in the book.
+        """
+        key = self._keys.pop(order.id, None)
+        if key is None:
+            return False
+        self._sorted.remove(key)
+
+        structure, place_key = self._places.pop(order.id)
+        structure.remove(place_key)
+        return True
+
+    def refresh(self, orders):
+        """
+        Remove those of @orders that are no longer open, and move the others
+        to the places their dt and price targets put them.
+        """
+        for order in orders:
+            key = self._keys.get(order.id)
+            if key is None:
+                continue
+            if not order.open:
+                self.remove(order)
+                continue
+
+            if order.dt != key[0]:
+                self._sorted.remove(key)
+                key = self._keys[order.id] = (order.dt, key[1])
+                self._sorted.insert(key, order)
+
+            old = self._places[order.id]
+            new = self._place(order, key[1])
+            if new[0] is not old[0] or new[1] != old[1]:
+                old[0].remove(old[1])
+                new[0].insert(new[1], order)
+                self._places[order.id] = new
+
+    def through(self, dt):
+        """
+        The orders whose dt is at most @dt, in the order they are filled.
+        """
+        return self._sorted.through(dt)
+
+    def fillable(self, price, dt):
+        """
+        The orders whose dt is at most @dt that a trade at @price can fill,
+        in the order they are filled: the triggered orders, and the
+        untriggered ones whose price targets @price reaches.
+        """
+        orders = self._active.through(dt)
+
+        crossed = (self._buy_stops.through(price) +
+                   self._sell_stops.starting_at(price) +
+                   self._buy_limits.starting_at(price) +
+                   self._sell_limits.through(price))
+        if not crossed:
+            return orders
+
+        keys = self._keys
+        orders.extend(order for order in crossed if keys[order.id][0] <= dt)
+        orders.sort(key=lambda order: keys[order.id])
+        return orders
+
+    def __contains__(self, order):
+        return getattr(order, 'id', None) in self._keys
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def __iter__(self):
+        return iter(self._sorted)
+
+    def __getitem__(self, index):
+        return self._sorted[index]
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__,
+                                   list(self._sorted))
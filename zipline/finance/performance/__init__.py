@@ -16,9 +16,27 @@
 from . tracker import PerformanceTracker
 from . period import PerformancePeriod
 from . position import Position
+from . recorded import RecordedVariables
+from . results import Results, ResultsBuilder, ResultsSink
+from . sinks import (
+    CallbackSink,
+    ChunkedFileSink,
+    DataFrameSink,
+    LazyDailyStats,
+    PerfSink,
+)
 
 __all__ = [
     'PerformanceTracker',
     'PerformancePeriod',
     'Position',
+    'RecordedVariables',
+    'PerfSink',
+    'DataFrameSink',
+    'CallbackSink',
+    'ChunkedFileSink',
+    'LazyDailyStats',
+    'Results',
+    'ResultsBuilder',
+    'ResultsSink',
 ]
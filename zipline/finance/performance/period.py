@@ -117,6 +117,12 @@ class PerformancePeriod(object):
         self._position_amounts = pd.Series()
         self._position_last_sale_prices = pd.Series()
 
+        # Sids whose position changed since the last call to get_positions.
+        self._dirty_sids = set()
+        # Cached (net, long, short) value of the positions, None when the
+        # positions changed since it was computed.
+        self._exposures = None
+
         self.calculate_performance()
 
         # An object to recycle via assigning new values
@@ -140,7 +146,31 @@ class PerformancePeriod(object):
         self.orders_by_modified = defaultdict(OrderedDict)
         self.orders_by_id = OrderedDict()
 
+    def set_initial_state(self, cash, positions):
+        """
+        Start this period from an existing book instead of from cash only.
+
+        @positions maps sid -> (amount, cost_basis, last_sale_price).  The
+        resulting state is treated as the period's starting point, so pnl and
+        returns are measured from it.
+        """
+        self.starting_cash = cash
+        for sid, (amount, cost_basis, last_sale_price) in \
+                iteritems(positions):
+            self.update_position(sid,
+                                 amount=amount,
+                                 last_sale_price=last_sale_price,
+                                 cost_basis=cost_basis)
+        self.calculate_performance()
+        self.rollover()
+        self.calculate_performance()
+
+    def _position_changed(self, sid):
+        self._dirty_sids.add(sid)
+        self._exposures = None
+
     def set_position_amount(self, sid, amount):
+        self._position_changed(sid)
         try:
             self._position_amounts[sid] = amount
         except (KeyError, IndexError):
@@ -148,6 +178,7 @@ class PerformancePeriod(object):
                 self._position_amounts.append(pd.Series({sid: amount}))
 
     def set_position_last_sale_price(self, sid, last_sale_price):
+        self._position_changed(sid)
         try:
             self._position_last_sale_prices[sid] = last_sale_price
         except (KeyError, IndexError):
@@ -253,6 +284,7 @@ class PerformancePeriod(object):
         if commission.sid in self.positions:
             self.positions[commission.sid].\
                 adjust_commission_cost_basis(commission)
+            self._dirty_sids.add(commission.sid)
 
     def adjust_cash(self, amount):
         self.period_cash_flow += amount
@@ -260,8 +292,16 @@ class PerformancePeriod(object):
     def adjust_field(self, field, value):
         setattr(self, field, value)
 
-    def calculate_performance(self):
-        self.ending_value = self.calculate_positions_value()
+    def calculate_performance(self, ending_value=None):
+        """
+        Recalculate the period's value, pnl and returns.
+
+        @ending_value can be passed to reuse the value of an identical set of
+        positions, e.g. held by another period of the same tracker.
+        """
+        if ending_value is None:
+            ending_value = self.calculate_positions_value()
+        self.ending_value = ending_value
 
         total_at_start = self.starting_cash + self.starting_value
         self.ending_cash = self.starting_cash + self.period_cash_flow
@@ -300,6 +340,7 @@ class PerformancePeriod(object):
             pos.last_sale_date = last_sale_date
         if cost_basis is not None:
             pos.cost_basis = cost_basis
+            self._dirty_sids.add(sid)
 
     def execute_transaction(self, txn):
         # Update Position
@@ -317,18 +358,28 @@ class PerformancePeriod(object):
         if self.keep_transactions:
             self.processed_transactions[txn.dt].append(txn)
 
+    def _position_values(self):
+        """
+        The (net, long, short) value of the positions, cached until a
+        position changes.
+        """
+        if self._exposures is None:
+            amounts = self._position_amounts.values
+            prices = self._position_last_sale_prices.values
+            pos_values = amounts * prices
+            self._exposures = (np.dot(amounts, prices),
+                               pos_values[pos_values > 0].sum(),
+                               pos_values[pos_values < 0].sum())
+        return self._exposures
+
     def calculate_positions_value(self):
-        return np.dot(self._position_amounts, self._position_last_sale_prices)
+        return self._position_values()[0]
 
     def _long_value(self):
-        pos_values = self._position_amounts * self._position_last_sale_prices
-        longs = pos_values[pos_values > 0]
-        return longs.sum()
+        return self._position_values()[1]
 
     def _short_value(self):
-        pos_values = self._position_amounts * self._position_last_sale_prices
-        shorts = pos_values[pos_values < 0]
-        return shorts.sum()
+        return self._position_values()[2]
 
     def _gross_exposure(self):
         return self._long_value() + abs(self._short_value())
@@ -366,7 +417,10 @@ class PerformancePeriod(object):
             self.update_position(event.sid, last_sale_price=event.price,
                                  last_sale_date=event.dt)
 
-    def __core_dict(self):
+    def core_dict(self):
+        """
+        The scalar metrics of this period.
+        """
         rval = {
             'ending_value': self.ending_value,
             # this field is renamed to capital_used for backward
@@ -385,22 +439,27 @@ class PerformancePeriod(object):
 
         return rval
 
-    def to_dict(self, dt=None):
+    def to_dict(self, dt=None, fields=None):
         """
         Creates a dictionary representing the state of this performance
         period. See header comments for a detailed description.
 
         Kwargs:
             dt (datetime): If present, only return transactions for the dt.
+            fields (set): If present, only include the optional positions,
+                transactions and orders payloads named in the set.
         """
-        rval = self.__core_dict()
+        rval = self.core_dict()
+
+        def wanted(field):
+            return fields is None or field in fields
 
-        if self.serialize_positions:
+        if self.serialize_positions and wanted('positions'):
             positions = self.get_positions_list()
             rval['positions'] = positions
 
         # we want the key to be absent, not just empty
-        if self.keep_transactions:
+        if self.keep_transactions and wanted('transactions'):
             if dt:
                 # Only include transactions for given dt
                 transactions = [x.to_dict()
@@ -412,7 +471,7 @@ class PerformancePeriod(object):
                      for y in x]
             rval['transactions'] = transactions
 
-        if self.keep_orders:
+        if self.keep_orders and wanted('orders'):
             if dt:
                 # only include orders modified as of the given dt.
                 orders = [x.to_dict()
@@ -493,10 +552,19 @@ class PerformancePeriod(object):
         return account
 
     def get_positions(self):
-
+        """
+        Update and return the recycled Positions object.  Only the positions
+        that changed since the last call are copied.
+        """
         positions = self._positions_store
 
-        for sid, pos in iteritems(self.positions):
+        dirty = self._dirty_sids
+        if not dirty:
+            return positions
+        self._dirty_sids = set()
+
+        for sid in dirty:
+            pos = self.positions[sid]
 
             if pos.amount == 0:
                 # Clear out the position if it has become empty since the last
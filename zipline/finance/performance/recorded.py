@@ -0,0 +1,36 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from zipline.utils.data import GrowableColumns
+
+
+class RecordedVariables(GrowableColumns):
+    """
+    The variables passed to TradingAlgorithm.record.
+
+    `current` holds the latest value of every variable.  Each call to
+    append_row stores the current values as a row, in one numpy array per
+    variable, so the rows never have to be copied into dicts.
+    """
+
+    def __init__(self, capacity=256):
+        super(RecordedVariables, self).__init__(capacity)
+        self.current = {}
+
+    def append_row(self, dt):
+        """
+        Store the current values as the row for @dt.
+        """
+        self.append(dt, self.current)
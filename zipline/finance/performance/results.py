@@ -0,0 +1,157 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Columnar results of a simulation.
+
+The daily_stats DataFrame built from the daily perf messages has one row
+per day, with the positions, transactions and orders of the day stored as
+lists of dicts in object columns.  A ResultsBuilder is filled by the
+PerformanceTracker at every market close instead.  The scalar metrics of
+each day go in typed arrays, and the positions, transactions and orders go
+in tables of their own, with one row per position, transaction or order,
+indexed by the close of the day they belong to.
+"""
+
+from six import itervalues
+
+from zipline.utils.data import GrowableColumns
+
+from . sinks import PerfSink, daily_stats_frame
+
+TABLES = ('positions', 'transactions', 'orders')
+
+
+class Results(object):
+    """
+    The results of a simulation.
+
+    daily is a DataFrame of the scalar daily metrics and recorded
+    variables.  positions, transactions and orders are DataFrames with one
+    row per position held at, transaction made on, or order modified on
+    the day at their index.  risk_report is the final risk report message.
+    """
+
+    def __init__(self, daily, positions, transactions, orders,
+                 risk_report=None):
+        self.daily = daily
+        self.positions = positions
+        self.transactions = transactions
+        self.orders = orders
+        self.risk_report = risk_report
+
+    def to_daily_stats(self):
+        """
+        The results in the layout of daily_stats, as returned by
+        TradingAlgorithm.run with the default sink.
+        """
+        rows = [dict(zip(self.daily.columns, values))
+                for values in self.daily.itertuples(index=False)]
+        for row in rows:
+            for name in TABLES:
+                row[name] = []
+
+        index = self.daily.index
+        for name in TABLES:
+            table = getattr(self, name)
+            if table is None:
+                continue
+            columns = list(table.columns)
+            for dt, values in zip(table.index,
+                                  table.itertuples(index=False)):
+                rows[index.get_loc(dt)][name].append(
+                    dict(zip(columns, values)))
+
+        for name in TABLES:
+            if getattr(self, name) is None:
+                for row in rows:
+                    del row[name]
+
+        return daily_stats_frame(rows)
+
+
+class ResultsBuilder(object):
+    """
+    Collects the results of a simulation, one market day at a time.
+    """
+
+    def __init__(self):
+        self.daily = GrowableColumns()
+        self.positions = GrowableColumns()
+        self.transactions = GrowableColumns()
+        self.orders = GrowableColumns()
+        # The tables that were kept, per the period's settings.
+        self.tables = set()
+
+    def add_day(self, period):
+        """
+        Add the day covered by the PerformancePeriod @period.
+        """
+        values = period.core_dict()
+        dt = values['period_close']
+        self.daily.append(dt, values)
+
+        if period.serialize_positions:
+            self.tables.add('positions')
+            for position in period.get_positions_list():
+                self.positions.append(dt, position)
+
+        if period.keep_transactions:
+            self.tables.add('transactions')
+            for transactions in itervalues(period.processed_transactions):
+                for txn in transactions:
+                    self.transactions.append(dt, txn.to_dict())
+
+        if period.keep_orders:
+            self.tables.add('orders')
+            for order in itervalues(period.orders_by_id):
+                self.orders.append(dt, order.to_dict())
+
+    def results(self, recorder=None, risk_report=None):
+        """
+        Build the Results, adding the recorded variables of @recorder to
+        the daily metrics.
+        """
+        daily = self.daily.frame()
+        if recorder is not None:
+            for name, values in recorder.columns():
+                daily[name] = values
+
+        tables = {
+            name: getattr(self, name).frame() if name in self.tables
+            else None
+            for name in TABLES
+        }
+        return Results(daily, risk_report=risk_report, **tables)
+
+
+class ResultsSink(PerfSink):
+    """
+    Has TradingAlgorithm.run return a Results, filled by the perf tracker
+    rather than from the perf messages.
+    """
+
+    columnar_recorded_vars = True
+    columnar_results = True
+
+    def __init__(self):
+        super(ResultsSink, self).__init__()
+        self.builder = ResultsBuilder()
+
+    def write_daily(self, daily_perf):
+        pass
+
+    def result(self):
+        return self.builder.results(self.recorder, self.risk_report)
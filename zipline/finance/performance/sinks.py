@@ -0,0 +1,230 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Performance Sinks
+=================
+
+Sinks consume the perf messages produced by TradingAlgorithm.run as they are
+generated, instead of accumulating every message until the end of the run.
+
+    +------------------+---------------------------------------------------+
+    | sink             | result of TradingAlgorithm.run                    |
+    +==================+===================================================+
+    | DataFrameSink    | The daily_stats DataFrame, built from the daily   |
+    |                  | messages only.  This is the default.              |
+    +------------------+---------------------------------------------------+
+    | ChunkedFileSink  | A LazyDailyStats, backed by chunks of daily rows  |
+    |                  | written to disk every `chunk_size` days.          |
+    +------------------+---------------------------------------------------+
+    | CallbackSink     | None.  Every message is handed to a callback.     |
+    +------------------+---------------------------------------------------+
+    | ResultsSink      | A Results, with typed daily metrics and separate  |
+    |                  | positions, transactions and orders tables, built  |
+    |                  | by the perf tracker.  See results.py.             |
+    +------------------+---------------------------------------------------+
+
+"""
+
+import abc
+import os
+
+import numpy as np
+import pandas as pd
+from six import with_metaclass
+
+
+def daily_stats_frame(daily_perfs):
+    """
+    Build the daily_stats DataFrame from a list of daily perf dicts.
+    """
+    daily_dts = [np.datetime64(perf['period_close'], utc=True)
+                 for perf in daily_perfs]
+    return pd.DataFrame(daily_perfs, index=daily_dts)
+
+
+class PerfSink(with_metaclass(abc.ABCMeta)):
+    """
+    Abstract base class for consumers of perf messages.
+
+    The default `write` splits the stream into daily messages, minute
+    messages and the final risk report.  Recorded variables are merged into
+    the daily message before it is passed to `write_daily`.
+
+    Sinks that set `columnar_recorded_vars` are given the algorithm's
+    RecordedVariables as `recorder` instead, and the messages they receive
+    don't carry the recorded variables.  Sinks that set `columnar_results`
+    have a ResultsBuilder as `builder`, which the perf tracker fills at
+    every market close.
+    """
+
+    columnar_recorded_vars = False
+    columnar_results = False
+
+    def __init__(self):
+        self.risk_report = None
+        self.recorder = None
+
+    def write(self, perf):
+        if 'daily_perf' in perf:
+            daily_perf = perf['daily_perf']
+            daily_perf.update(daily_perf.pop('recorded_vars', {}))
+            self.write_daily(daily_perf)
+        elif 'minute_perf' in perf:
+            self.write_minute(perf)
+        else:
+            self.risk_report = perf
+
+    @abc.abstractmethod
+    def write_daily(self, daily_perf):
+        raise NotImplementedError
+
+    def write_minute(self, perf):
+        """
+        Minute messages are dropped unless a sink overrides this.
+        """
+        pass
+
+    @abc.abstractmethod
+    def result(self):
+        """
+        Called once the simulation is done.  The return value is returned
+        from TradingAlgorithm.run.
+        """
+        raise NotImplementedError
+
+
+class DataFrameSink(PerfSink):
+    """
+    Keeps the daily messages in memory and builds the daily_stats DataFrame
+    at the end of the run.  The recorded variables are added from the
+    recorder's columns.
+    """
+
+    columnar_recorded_vars = True
+
+    def __init__(self):
+        super(DataFrameSink, self).__init__()
+        self.daily_perfs = []
+
+    def write_daily(self, daily_perf):
+        self.daily_perfs.append(daily_perf)
+
+    def result(self):
+        daily_stats = daily_stats_frame(self.daily_perfs)
+        if self.recorder is not None:
+            for name, values in self.recorder.columns():
+                daily_stats[name] = values
+        return daily_stats
+
+
+class CallbackSink(PerfSink):
+    """
+    Hands every perf message, unmodified, to @callback.
+    """
+
+    def __init__(self, callback):
+        super(CallbackSink, self).__init__()
+        self.callback = callback
+
+    def write(self, perf):
+        self.callback(perf)
+
+    def write_daily(self, daily_perf):
+        pass
+
+    def result(self):
+        return None
+
+
+class ChunkedFileSink(PerfSink):
+    """
+    Writes the daily rows to @directory as pickled DataFrames of at most
+    @chunk_size rows each, so that only one chunk is held in memory while the
+    simulation runs.
+    """
+
+    FILENAME_TEMPLATE = 'daily_stats-{n:05d}.pickle'
+
+    def __init__(self, directory, chunk_size=252):
+        super(ChunkedFileSink, self).__init__()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.paths = []
+        self._rows = []
+
+    def write_daily(self, daily_perf):
+        self._rows.append(daily_perf)
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        path = os.path.join(
+            self.directory,
+            self.FILENAME_TEMPLATE.format(n=len(self.paths)),
+        )
+        daily_stats_frame(self._rows).to_pickle(path)
+        self.paths.append(path)
+        self._rows = []
+
+    def result(self):
+        self.flush()
+        return LazyDailyStats(self.paths)
+
+
+class LazyDailyStats(object):
+    """
+    daily_stats stored as a sequence of pickled DataFrame chunks.  Nothing is
+    read until the frame is used; attribute and item access load and cache
+    the concatenated frame.  Use iter_chunks to process the chunks one at a
+    time instead.
+    """
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._frame = None
+
+    def iter_chunks(self):
+        for path in self.paths:
+            yield pd.read_pickle(path)
+
+    def load(self):
+        if self._frame is None:
+            if self.paths:
+                self._frame = pd.concat(list(self.iter_chunks()))
+            else:
+                self._frame = pd.DataFrame()
+        return self._frame
+
+    def __getattr__(self, name):
+        # Don't recurse into load() for our own attributes, e.g. while
+        # unpickling.
+        if name.startswith('_') or name == 'paths':
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __len__(self):
+        return len(self.load())
+
+    def __repr__(self):
+        return "{name}({paths})".format(name=self.__class__.__name__,
+                                        paths=self.paths)
@@ -63,6 +63,7 @@ import logbook
 import numpy as np
 import pandas as pd
 from pandas.tseries.tools import normalize_date
+from six import iteritems, itervalues
 
 import zipline.protocol as zp
 import zipline.finance.risk as risk
@@ -90,6 +91,7 @@ class PerformanceTracker(object):
         self.total_days = self.sim_params.days_in_period
         self.capital_base = self.sim_params.capital_base
         self.emission_rate = sim_params.emission_rate
+        self.emission_policy = sim_params.emission_policy
 
         all_trading_days = trading.environment.trading_days
         mask = ((all_trading_days >= normalize_date(self.period_start)) &
@@ -174,6 +176,12 @@ class PerformanceTracker(object):
         self.txn_count = 0
         self.event_count = 0
 
+        # Latest deferred trade per sid, see defer_last_sale.
+        self._pending_last_sales = {}
+
+        # ResultsBuilder to add every completed day to, if any.
+        self.results = None
+
     def __repr__(self):
         return "%s(%r)" % (
             self.__class__.__name__,
@@ -182,8 +190,16 @@ class PerformanceTracker(object):
     @property
     def progress(self):
         if self.emission_rate == 'minute':
-            # Fake a value
-            return 1.0
+            # The completed days, plus the part of the current session
+            # that has elapsed.
+            session = (self.market_close - self.market_open).total_seconds()
+            elapsed = (self.saved_dt - self.market_open).total_seconds()
+            if session > 0:
+                day_fraction = min(max(elapsed / session, 0.0), 1.0)
+            else:
+                day_fraction = 0.0
+            return min((self.day_count + day_fraction) / self.total_days,
+                       1.0)
         elif self.emission_rate == 'daily':
             return self.day_count / self.total_days
 
@@ -224,10 +240,38 @@ class PerformanceTracker(object):
         self.dividend_frame = other.dividend_frame
         self._dividend_count = other._dividend_count
 
+    def set_initial_state(self, cash, positions):
+        """
+        Seed every performance period with an existing cash balance and set
+        of positions, e.g. the ending state of a previous simulation over an
+        adjacent date range.  Must be called before any events are processed.
+        """
+        for perf_period in self.perf_periods:
+            perf_period.set_initial_state(cash, positions)
+
+    def get_state(self):
+        """
+        Return the (cash, positions) of the cumulative period, in the form
+        accepted by set_initial_state.
+        """
+        self.flush_last_sales()
+        perf = self.cumulative_performance
+        positions = {
+            sid: (pos.amount, pos.cost_basis, pos.last_sale_price)
+            for sid, pos in iteritems(perf.positions)
+            if pos.amount != 0
+        }
+        return perf.ending_cash, positions
+
     def update_performance(self):
+        self.flush_last_sales()
+        # Every period sees the same events, so they all hold the same
+        # positions: value them once and share the result.
+        ending_value = \
+            self.cumulative_performance.calculate_positions_value()
         # calculate performance as of last trade
         for perf_period in self.perf_periods:
-            perf_period.calculate_performance()
+            perf_period.calculate_performance(ending_value)
 
     def get_portfolio(self, performance_needs_update):
         if performance_needs_update:
@@ -246,27 +290,59 @@ class PerformanceTracker(object):
         """
         if not emission_type:
             emission_type = self.emission_rate
+        policy = self.emission_policy
+        fields = policy.fields
+
         _dict = {
             'period_start': self.period_start,
             'period_end': self.period_end,
             'capital_base': self.capital_base,
-            'cumulative_perf': self.cumulative_performance.to_dict(),
             'progress': self.progress,
-            'cumulative_risk_metrics': self.cumulative_risk_metrics.to_dict()
         }
+        if policy.includes('cumulative_perf'):
+            _dict['cumulative_perf'] = \
+                self.cumulative_performance.to_dict(fields=fields)
+        if policy.includes('cumulative_risk_metrics'):
+            _dict['cumulative_risk_metrics'] = \
+                self.cumulative_risk_metrics.to_dict()
+
         if emission_type == 'daily':
-            _dict.update({'daily_perf': self.todays_performance.to_dict()})
+            _dict['daily_perf'] = \
+                self.todays_performance.to_dict(fields=fields)
         elif emission_type == 'minute':
-            _dict.update({
-                'intraday_risk_metrics': self.intraday_risk_metrics.to_dict(),
-                'minute_perf': self.todays_performance.to_dict(self.saved_dt)
-            })
+            if policy.includes('intraday_risk_metrics'):
+                _dict['intraday_risk_metrics'] = \
+                    self.intraday_risk_metrics.to_dict()
+            _dict['minute_perf'] = \
+                self.todays_performance.to_dict(self.saved_dt, fields=fields)
 
         return _dict
 
+    def defer_last_sale(self, event):
+        """
+        Record a trade whose only effect is to update the last sale price of
+        its sid.  Only the latest deferred trade per sid is kept, and it is
+        applied by flush_last_sales before any other event is processed or
+        performance is calculated.
+        """
+        self.event_count += 1
+        self._pending_last_sales[event.sid] = event
+
+    def flush_last_sales(self):
+        pending = self._pending_last_sales
+        if not pending:
+            return
+        self._pending_last_sales = {}
+        for event in itervalues(pending):
+            for perf_period in self.perf_periods:
+                perf_period.update_last_sale(event)
+
     def process_event(self, event):
         self.event_count += 1
 
+        if self._pending_last_sales:
+            self.flush_last_sales()
+
         if event.type == zp.DATASOURCE_TYPE.TRADE:
             # update last sale
             for perf_period in self.perf_periods:
@@ -424,6 +500,8 @@ class PerformanceTracker(object):
         # increment the day counter before we move markers forward.
         self.day_count += 1.0
 
+        self.record_results()
+
         # Take a snapshot of our current performance to return to the
         # browser.
         daily_update = self.to_dict()
@@ -447,6 +525,14 @@ class PerformanceTracker(object):
 
         return daily_update
 
+    def record_results(self):
+        """
+        Add today's performance to the results builder, if there is one.
+        Called once per day, at the market close.
+        """
+        if self.results is not None:
+            self.results.add_day(self.todays_performance)
+
     def handle_simulation_end(self):
         """
         When the simulation is complete, run the full period risk report
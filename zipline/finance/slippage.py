@@ -21,9 +21,11 @@ import math
 from copy import copy
 from functools import partial
 
+import numpy as np
 from six import with_metaclass
 
 from zipline.protocol import DATASOURCE_TYPE
+from zipline.utils.profiling import uninstrumented
 
 SELL = 1 << 0
 BUY = 1 << 1
@@ -109,6 +111,56 @@ def transact_partial(slippage, commission):
     return partial(transact_stub, slippage, commission)
 
 
+def batch_models(transact):
+    """
+    The (slippage, commission) models enclosed by @transact, if it was
+    created by transact_partial and both models can fill orders in batches,
+    otherwise None.  A @transact instrumented by a Profiler is recognized.
+    """
+    transact = uninstrumented(transact)
+    if getattr(transact, 'func', None) is not transact_stub:
+        return None
+    slippage, commission = transact.args
+    if not (hasattr(slippage, 'fill_batch') and
+            hasattr(commission, 'calculate_batch')):
+        return None
+    return slippage, commission
+
+
+def transact_batch(slippage, commission, amounts, prices, volumes, groups):
+    """
+    Fill a batch of orders, the vectorized equivalent of transact_stub.
+
+    @amounts are the open amounts of the orders, and @prices and @volumes
+    the price and volume of the trade each order is filled against.
+    @groups numbers the trades; the orders of a trade are contiguous and in
+    the order they are filled.
+
+    Returns the arrays of the filled amounts, zero for the orders that
+    weren't filled, the prices including the commission per share, and the
+    commissions.
+    """
+    fills, fill_prices = slippage.fill_batch(amounts, prices, volumes, groups)
+    per_share, commissions = commission.calculate_batch(fills, fill_prices)
+
+    filled = fills != 0
+    fill_prices = np.where(filled, fill_prices + per_share * np.sign(fills),
+                           fill_prices)
+    commissions = np.where(filled, commissions, 0.0)
+    return fills, fill_prices, commissions
+
+
+def _group_cumsum(values, groups):
+    """
+    The running totals of @values, restarting at every change of @groups.
+    """
+    totals = np.cumsum(values)
+    starts = np.ones(len(groups), dtype=bool)
+    starts[1:] = groups[1:] != groups[:-1]
+    offsets = (totals - values)[starts]
+    return totals - offsets[np.cumsum(starts) - 1]
+
+
 class Transaction(object):
 
     def __init__(self, sid, amount, dt, price, order_id, commission=None):
@@ -239,6 +291,31 @@ class VolumeShareSlippage(SlippageModel):
             math.copysign(cur_volume, order.direction)
         )
 
+    def fill_batch(self, amounts, prices, volumes, groups):
+        """
+        Vectorized process_order; see transact_batch for the arguments.
+
+        The orders of a trade share its volume in turn, so the volume filled
+        through an order is the running total of the open amounts, capped
+        at the volume limit.
+        """
+        sizes = np.floor(np.abs(amounts))
+        totals = _group_cumsum(sizes, groups)
+        max_volumes = np.floor(self.volume_limit * volumes)
+
+        filled_through = np.minimum(totals, max_volumes)
+        filled_before = np.minimum(totals - sizes, max_volumes)
+        fills = filled_through - filled_before
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volume_share = np.minimum(filled_through / volumes,
+                                      self.volume_limit)
+        simulated_impact = volume_share ** 2 \
+            * np.copysign(self.price_impact, amounts) \
+            * prices
+
+        return np.copysign(fills, amounts), prices + simulated_impact
+
 
 class FixedSlippage(SlippageModel):
 
@@ -257,3 +334,10 @@ class FixedSlippage(SlippageModel):
             event.price + (self.spread / 2.0 * order.direction),
             order.amount,
         )
+
+    def fill_batch(self, amounts, prices, volumes, groups):
+        """
+        Vectorized process_order; see transact_batch for the arguments.
+        """
+        fills = np.trunc(amounts)
+        return fills, prices + self.spread / 2.0 * np.sign(amounts)
@@ -22,6 +22,7 @@ import pandas as pd
 import numpy as np
 
 from zipline.data.loader import load_market_data
+from zipline.errors import UnsupportedEmissionPolicy
 from zipline.utils import tradingcalendar
 from zipline.utils.tradingcalendar import get_early_closes
 
@@ -381,12 +382,102 @@ Last successful date: %s" % self.last_trading_day)
             return self.trading_days.searchsorted(ndt) - 1
 
 
+class EmissionPolicy(object):
+    """
+    Controls which perf messages the simulation builds, and what goes in them.
+
+    :Arguments:
+        minutes : str or callable <default: 'all'>
+            Only used with a minute emission rate.
+            'all' builds a message for every minute that closes with a
+            benchmark event, i.e. at each market close.  'trades' also
+            builds one for every minute with a trade; the benchmark returns
+            of those minutes are NaN.  'none' only builds the daily rollup
+            at each market close.  A callable is called with the dt of
+            every minute with a trade or a benchmark event, and a message is
+            built when it returns True.
+        fields : iterable <default: None>
+            The optional payloads to build, any of OPTIONAL_FIELDS.  None
+            builds all of them.  Fields not listed are left out of the
+            message entirely.
+    """
+
+    MINUTE_MODES = ('all', 'trades', 'none')
+
+    OPTIONAL_FIELDS = frozenset([
+        # per period payloads
+        'positions',
+        'transactions',
+        'orders',
+        # tracker payloads
+        'cumulative_perf',
+        'cumulative_risk_metrics',
+        'intraday_risk_metrics',
+    ])
+
+    def __init__(self, minutes='all', fields=None):
+        if not callable(minutes) and minutes not in self.MINUTE_MODES:
+            raise UnsupportedEmissionPolicy(
+                msg="minutes must be one of {modes} or a callable, "
+                    "got {minutes!r}.".format(modes=self.MINUTE_MODES,
+                                              minutes=minutes))
+        if fields is not None:
+            fields = frozenset(fields)
+            unknown = fields - self.OPTIONAL_FIELDS
+            if unknown:
+                raise UnsupportedEmissionPolicy(
+                    msg="Unknown perf message fields: {unknown}.".format(
+                        unknown=sorted(unknown)))
+
+        self.minutes = minutes
+        self.fields = fields
+
+    @classmethod
+    def daily_only(cls, fields=None):
+        """
+        Only build the daily rollups of a minute emission simulation.
+        """
+        return cls(minutes='none', fields=fields)
+
+    @classmethod
+    def on_demand(cls, predicate, fields=None):
+        """
+        Only build the minute messages for which @predicate(dt) is True.
+        """
+        return cls(minutes=predicate, fields=fields)
+
+    @property
+    def trade_minutes(self):
+        """
+        Whether minutes with a trade but no benchmark event can get a
+        message.
+        """
+        return self.minutes == 'trades' or callable(self.minutes)
+
+    def emit_minute(self, dt):
+        if self.minutes in ('all', 'trades'):
+            return True
+        elif self.minutes == 'none':
+            return False
+        return bool(self.minutes(dt))
+
+    def includes(self, field):
+        return self.fields is None or field in self.fields
+
+    def __repr__(self):
+        return "{name}(minutes={minutes!r}, fields={fields!r})".format(
+            name=self.__class__.__name__,
+            minutes=self.minutes,
+            fields=None if self.fields is None else sorted(self.fields))
+
+
 class SimulationParameters(object):
     def __init__(self, period_start, period_end,
                  capital_base=10e3,
                  emission_rate='daily',
                  data_frequency='daily',
-                 sids=None):
+                 sids=None,
+                 emission_policy=None):
 
         self.period_start = period_start
         self.period_end = period_end
@@ -396,6 +487,10 @@ class SimulationParameters(object):
         self.data_frequency = data_frequency
         self.sids = sids
 
+        if emission_policy is None:
+            emission_policy = EmissionPolicy()
+        self.emission_policy = emission_policy
+
         # copied to algorithm's environment for runtime access
         self.arena = 'backtest'
 
@@ -463,6 +558,7 @@ class SimulationParameters(object):
     capital_base={capital_base},
     data_frequency={data_frequency},
     emission_rate={emission_rate},
+    emission_policy={emission_policy},
     first_open={first_open},
     last_close={last_close})\
 """.format(class_name=self.__class__.__name__,
@@ -471,6 +567,7 @@ class SimulationParameters(object):
            capital_base=self.capital_base,
            data_frequency=self.data_frequency,
            emission_rate=self.emission_rate,
+           emission_policy=self.emission_policy,
            first_open=self.first_open,
            last_close=self.last_close)
 
@@ -0,0 +1,174 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Coalescing of the bars of several feeds into snapshots.
+
+This is the synchronous part of zipline.gens.live, which needs Python 3.5.
+It is kept apart so that it can be imported, and tested, on every version.
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from six import itervalues
+
+
+class LatencyStats(object):
+    """
+    Keeps the last @maxlen latencies, in seconds, recorded for a stage.
+    """
+
+    def __init__(self, maxlen=100000):
+        self.samples = deque(maxlen=maxlen)
+        self.count = 0
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        samples = np.array(self.samples)
+        if not len(samples):
+            return pd.Series({'count': 0})
+        return pd.Series({
+            'count': self.count,
+            'mean': samples.mean(),
+            'p50': np.percentile(samples, 50),
+            'p99': np.percentile(samples, 99),
+            'max': samples.max(),
+        })
+
+
+class SnapshotCoalescer(object):
+    """
+    Groups the bars received from @feeds into one snapshot per dt.
+
+    A snapshot is ready once every open feed has sent a bar with a later dt,
+    or once @max_delay seconds have passed since its first bar arrived.
+    Bars for a dt that was already released are counted in late_bars and
+    dropped.  @benchmarks are merged into the snapshots as they are
+    released.
+    """
+
+    def __init__(self, feeds, benchmarks=(), max_delay=1.0):
+        self.max_delay = max_delay
+        self.late_bars = 0
+
+        # dt -> events, and dt -> arrival time of its first event.
+        self._pending = {}
+        self._arrivals = {}
+        # feed -> dt of its latest event, for the feeds still open.
+        self._watermarks = dict((feed, None) for feed in feeds)
+        self._last_dt = None
+        self._benchmarks = deque(sorted(benchmarks, key=lambda e: e.dt))
+
+    @property
+    def done(self):
+        """
+        Whether every feed is closed and every snapshot was released.
+        """
+        return not self._watermarks and not self._pending
+
+    def receive(self, feed, event, now):
+        """
+        Add @event of @feed, which arrived at @now.  Returns False if the
+        event was too late to be used.
+        """
+        dt = event.dt
+        if self._last_dt is not None and dt <= self._last_dt:
+            self.late_bars += 1
+            return False
+
+        try:
+            self._pending[dt].append(event)
+        except KeyError:
+            self._pending[dt] = [event]
+            self._arrivals[dt] = now
+
+        self._watermarks[feed] = max(dt, self._watermarks[feed] or dt)
+        return True
+
+    def close(self, feed):
+        """
+        Stop waiting for the bars of @feed.
+        """
+        self._watermarks.pop(feed, None)
+
+    def ready(self, now):
+        """
+        The pending dts that can be released at @now, in order.
+        """
+        dts = sorted(self._pending)
+        if not self._watermarks:
+            return dts
+
+        marks = list(itervalues(self._watermarks))
+        complete = None if None in marks else min(marks)
+
+        # Everything up to the last dt that is complete, or overdue.
+        ready = 0
+        for i, dt in enumerate(dts):
+            if ((complete is not None and dt < complete)
+                    or now - self._arrivals[dt] >= self.max_delay):
+                ready = i + 1
+        return dts[:ready]
+
+    def timeout(self, now):
+        """
+        How many seconds after @now the oldest pending dt is overdue, or
+        None if nothing is pending.
+        """
+        if not self._arrivals:
+            return None
+        oldest = min(itervalues(self._arrivals))
+        return max(0, oldest + self.max_delay - now)
+
+    def release(self, dt):
+        """
+        Remove the snapshot of @dt, returning a list of the
+        (dt, snapshot, arrival) to process in order.  Benchmark events
+        before @dt come first, in snapshots of their own with no arrival,
+        as they do when running over sources.
+        """
+        snapshot = self._pending.pop(dt)
+        arrival = self._arrivals.pop(dt)
+        self._last_dt = dt
+
+        steps = []
+        benchmarks = self._benchmarks
+        while benchmarks and benchmarks[0].dt < dt:
+            event = benchmarks.popleft()
+            steps.append((event.dt, [event], None))
+        while benchmarks and benchmarks[0].dt == dt:
+            snapshot.append(benchmarks.popleft())
+
+        # Events of the same dt are ordered by source, as in
+        # date_sorted_sources.
+        snapshot.sort(key=lambda e: e.source_id)
+        steps.append((dt, snapshot, arrival))
+        return steps
+
+    def remaining_benchmarks(self):
+        """
+        The (dt, snapshot, arrival) of the benchmark events left once every
+        feed is done.
+        """
+        steps = []
+        while self._benchmarks:
+            event = self._benchmarks.popleft()
+            steps.append((event.dt, [event], None))
+        return steps
@@ -0,0 +1,276 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Drive an algorithm from asynchronous feeds of bars.
+
+AlgorithmSimulator.transform pulls snapshots from a generator, which a live
+deployment can only feed by blocking.  A LiveDriver instead reads any
+number of feeds concurrently on an asyncio event loop, coalesces their bars
+into one snapshot per dt, and steps the simulator as snapshots complete.
+
+A snapshot is complete once every open feed has sent a bar with a later dt.
+A feed that falls behind only delays a snapshot by up to max_delay seconds,
+after which the snapshot is processed without it; bars that arrive for a
+dt that was already processed are counted in late_bars and dropped.
+
+Feeds are asynchronous iterables of trade Events.  QueueFeed reads from an
+asyncio.Queue and TCPFeed from a socket of JSON lines, as written by
+serve_events.
+
+This module requires Python 3.5 or later.  It can't be parsed by older
+versions, so nothing else in zipline imports it, and it isn't linted on the
+versions that can't parse it.  The coalescing of the bars into snapshots is
+done by zipline.gens.coalesce, which works on every version.
+"""
+
+import asyncio
+import json
+
+import pandas as pd
+
+from zipline.finance.performance.sinks import DataFrameSink
+from zipline.gens.coalesce import LatencyStats, SnapshotCoalescer
+from zipline.protocol import DATASOURCE_TYPE, Event
+from zipline.sources.benchmark_source import benchmark_events
+from zipline.utils.api_support import ZiplineAPI
+from zipline.utils.profiling import wall_clock
+
+
+class QueueFeed(object):
+    """
+    Feed of the events put on an asyncio.Queue, until None is put.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.queue.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+
+def encode_event(event):
+    values = dict(event.__dict__)
+    values['dt'] = values['dt'].isoformat()
+    values.pop('type', None)
+    return (json.dumps(values) + '\n').encode('utf-8')
+
+
+def decode_event(line, source_id):
+    values = json.loads(line.decode('utf-8'))
+    dt = pd.Timestamp(values['dt'])
+    if dt.tzinfo is None:
+        dt = dt.tz_localize('UTC')
+    else:
+        dt = dt.tz_convert('UTC')
+    values['dt'] = dt
+    values['type'] = DATASOURCE_TYPE.TRADE
+    values.setdefault('source_id', source_id)
+    return Event(values)
+
+
+class TCPFeed(object):
+    """
+    Feed of the trade bars sent to a socket as JSON lines, one bar per
+    line, until the connection is closed.
+    """
+
+    def __init__(self, host, port, source_id=None):
+        self.host = host
+        self.port = port
+        if source_id is None:
+            source_id = 'TCPFeed-{host}:{port}'.format(host=host, port=port)
+        self.source_id = source_id
+        self._reader = None
+        self._writer = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._reader is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port)
+
+        line = await self._reader.readline()
+        if not line:
+            self._writer.close()
+            raise StopAsyncIteration
+        return decode_event(line, self.source_id)
+
+
+async def serve_events(events, host='127.0.0.1', port=0, delay=0):
+    """
+    Start a server sending @events, as read by TCPFeed, to every client
+    that connects, sleeping @delay seconds between events.  A stand-in for
+    a market data feed.
+
+    Returns the asyncio server; its port is
+    server.sockets[0].getsockname()[1].
+    """
+    events = list(events)
+
+    async def send(reader, writer):
+        for event in events:
+            writer.write(encode_event(event))
+            await writer.drain()
+            if delay:
+                await asyncio.sleep(delay)
+        writer.close()
+
+    return await asyncio.start_server(send, host, port)
+
+
+class LiveDriver(object):
+    """
+    Run @algo over the bars of @feeds.
+
+    Latencies are measured from the arrival of the first bar of a snapshot:
+    snapshot_latency until the simulator has processed the snapshot, and
+    order_latency until the orders the algorithm placed on that snapshot
+    are emitted to the blotter.
+
+    Transforms registered with add_transform are not applied to live bars.
+    """
+
+    def __init__(self, algo, feeds, sim_params=None, max_delay=1.0,
+                 clock=wall_clock):
+        self.algo = algo
+        self.feeds = list(feeds)
+        if sim_params is None:
+            sim_params = algo.sim_params
+        self.sim_params = sim_params
+        self.max_delay = max_delay
+        self.clock = clock
+
+        self.snapshot_latency = LatencyStats()
+        self.order_latency = LatencyStats()
+        self._coalescer = SnapshotCoalescer(self.feeds, max_delay=max_delay)
+        self._wakeup = None
+
+    @property
+    def late_bars(self):
+        return self._coalescer.late_bars
+
+    def latency_report(self):
+        return pd.DataFrame({
+            'snapshot': self.snapshot_latency.summary(),
+            'order': self.order_latency.summary(),
+        }).T
+
+    def _setup(self):
+        algo = self.algo
+        sim_params = self.sim_params
+
+        if algo.history_specs:
+            algo.history_container = algo.history_container_class(
+                algo.history_specs,
+                sim_params.sids,
+                sim_params.first_open,
+                sim_params.data_frequency,
+            )
+
+        # Same as a run: a fresh tracker, simulator and transact.  The
+        # generator over the algorithm's sources is never started.
+        algo.perf_tracker = None
+        algo.set_sources([])
+        algo._create_generator(sim_params)
+
+        if algo.benchmark_return_source is None:
+            benchmarks = benchmark_events(sim_params)
+        else:
+            benchmarks = algo.benchmark_return_source
+        self._coalescer = SnapshotCoalescer(self.feeds, benchmarks,
+                                            self.max_delay)
+
+    async def _consume(self, feed):
+        coalescer = self._coalescer
+        try:
+            async for event in feed:
+                if coalescer.receive(feed, event, self.clock()):
+                    self._wakeup.set()
+        finally:
+            coalescer.close(feed)
+            self._wakeup.set()
+
+    def _step(self, dt, snapshot, arrival, sink):
+        simulator = self.algo.trading_client
+        orders_before = len(self.algo.blotter.orders)
+
+        for message in simulator.step(dt, snapshot):
+            sink.write(message)
+
+        if arrival is not None:
+            latency = self.clock() - arrival
+            self.snapshot_latency.record(latency)
+            if len(self.algo.blotter.orders) > orders_before:
+                self.order_latency.record(latency)
+
+    async def run(self, sink=None):
+        """
+        Run until every feed is exhausted, and return the result of @sink,
+        a DataFrameSink by default.
+        """
+        if sink is None:
+            sink = DataFrameSink()
+
+        self._setup()
+        self._wakeup = asyncio.Event()
+        coalescer = self._coalescer
+
+        simulator = self.algo.trading_client
+        with ZiplineAPI(self.algo), simulator.log_context():
+            simulator.start()
+
+            tasks = [asyncio.ensure_future(self._consume(feed))
+                     for feed in self.feeds]
+            try:
+                while not coalescer.done:
+                    # A feed that fails stops the run.
+                    for task in tasks:
+                        if task.done() and not task.cancelled() and \
+                                task.exception() is not None:
+                            raise task.exception()
+
+                    for dt in coalescer.ready(self.clock()):
+                        for step in coalescer.release(dt):
+                            self._step(*step, sink=sink)
+                    if coalescer.done:
+                        break
+
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(),
+                                               coalescer.timeout(self.clock()))
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            for step in coalescer.remaining_benchmarks():
+                self._step(*step, sink=sink)
+
+            sink.write(simulator.finish())
+            simulator.flush_logs()
+
+        self.algo.risk_report = sink.risk_report
+        return sink.result()
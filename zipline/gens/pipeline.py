@@ -0,0 +1,310 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pipelined execution of a simulation.
+
+The snapshot stream, i.e. the sources, the transforms and the benchmark
+merge, is produced by a forked worker process while the simulator runs in
+the parent.  Snapshots are sent in blocks, with the events of a block
+stored column by column in numpy arrays.
+
+The numeric arrays of a block are copied into one slot of a ring of
+buffers shared with the worker, multiprocessing.RawArray, so only the
+object columns and the layout of the arrays go through the queue.  The
+parent hands the slot back once the block is decoded.  Blocks whose arrays
+don't fit in a slot are sent whole through the queue.
+"""
+
+from collections import namedtuple
+
+import multiprocessing
+import os
+import traceback
+
+import numpy as np
+import pandas as pd
+from six import integer_types, iteritems, string_types
+from six.moves import queue as Queue
+
+from zipline.errors import PipelineWorkerError
+
+# Snapshots per block sent to the simulator.
+DEFAULT_BLOCK_SIZE = 256
+
+# Blocks that may be in flight; bounds the memory used when the worker
+# runs ahead of the simulator.
+DEFAULT_MAX_BLOCKS = 8
+
+# Bytes of each slot of the shared ring; there are max_blocks slots.
+DEFAULT_SLOT_BYTES = 4 * 1024 * 1024
+
+# Seconds between checks that the worker is still alive.
+WORKER_POLL_INTERVAL = 1.0
+
+# Fields whose values are all of one of these types are stored as typed
+# arrays, anything else as object arrays.
+_NUMERIC_TYPES = frozenset(
+    (float, bool, np.float64, np.int64) + integer_types
+)
+
+
+def can_pipeline():
+    """
+    Whether this platform can fork the worker process.  The worker shares
+    the algorithm's sources with the parent, which isn't possible with
+    spawned processes.
+    """
+    return hasattr(os, 'fork')
+
+
+def _context():
+    get_context = getattr(multiprocessing, 'get_context', None)
+    if get_context is None:
+        return multiprocessing
+    return get_context('fork')
+
+
+def _encode_column(name, values):
+    if name == 'dt':
+        index = pd.DatetimeIndex(values)
+        if index.tz is not None:
+            return 'dt', index.tz_convert('UTC').asi8
+
+    types = set(map(type, values))
+    if len(types) == 1 and types.pop() in _NUMERIC_TYPES:
+        return 'values', np.array(values)
+
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return 'objects', column
+
+
+def _decode_column(encoded):
+    kind, column = encoded
+    if kind == 'dt':
+        return list(pd.DatetimeIndex(column, tz='UTC'))
+    return column.tolist()
+
+
+# An array stored in a slot of the shared ring, at @offset bytes.
+SharedArray = namedtuple('SharedArray', ['dtype', 'length', 'offset'])
+
+
+class _SlotFull(Exception):
+    pass
+
+
+class _SlotWriter(object):
+    """
+    Copies arrays one after the other into @buffer, a uint8 view of a slot.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.position = 0
+
+    def put(self, array):
+        array = np.ascontiguousarray(array)
+        # Keep every array aligned for its dtype.
+        start = -(-self.position // 8) * 8
+        end = start + array.nbytes
+        if end > len(self.buffer):
+            raise _SlotFull()
+        self.buffer[start:end] = array.view(np.uint8).ravel()
+        self.position = end
+        return SharedArray(array.dtype.str, len(array), start)
+
+
+def _resolve(array, buffer):
+    if isinstance(array, SharedArray):
+        return np.frombuffer(buffer, dtype=np.dtype(array.dtype),
+                             count=array.length, offset=array.offset)
+    return array
+
+
+def share_block(block, buffer):
+    """
+    A copy of the encoded @block whose numeric arrays are stored in
+    @buffer, or None if they don't fit.
+    """
+    writer = _SlotWriter(buffer)
+    try:
+        return {
+            'dts': writer.put(block['dts']),
+            'offsets': writer.put(block['offsets']),
+            'groups': [
+                (cls, names, writer.put(positions),
+                 [(kind, column if kind == 'objects' else writer.put(column))
+                  for kind, column in columns])
+                for cls, names, positions, columns in block['groups']
+            ],
+        }
+    except _SlotFull:
+        return None
+
+
+def encode_block(snapshots):
+    """
+    Encode a list of (dt, events) pairs.
+
+    Events are grouped by class and set of fields, and each group stores
+    one array per field along with the positions of its events.
+    """
+    dts = []
+    offsets = [0]
+    groups = {}
+    position = 0
+
+    for dt, events in snapshots:
+        dts.append(dt)
+        for event in events:
+            values = event.__dict__
+            schema = (type(event), tuple(sorted(values)))
+            try:
+                positions, columns = groups[schema]
+            except KeyError:
+                positions, columns = groups[schema] = \
+                    [], [[] for _ in schema[1]]
+
+            positions.append(position)
+            for column, name in zip(columns, schema[1]):
+                column.append(values[name])
+            position += 1
+        offsets.append(position)
+
+    return {
+        'dts': pd.DatetimeIndex(dts).asi8,
+        'offsets': np.array(offsets),
+        'groups': [
+            (cls, names, np.array(rows),
+             [_encode_column(field, data)
+              for field, data in zip(names, fields)])
+            for (cls, names), (rows, fields) in iteritems(groups)
+        ],
+    }
+
+
+def decode_block(block, buffer=None):
+    """
+    The (dt, events) pairs encoded in @block.  @buffer is the slot holding
+    its arrays, if it was shared with share_block.  Nothing in the result
+    refers to @buffer, so the slot can be reused once this returns.
+    """
+    offsets = _resolve(block['offsets'], buffer).tolist()
+    events = [None] * offsets[-1]
+
+    for cls, names, positions, columns in block['groups']:
+        columns = [_decode_column((kind, _resolve(column, buffer)))
+                   for kind, column in columns]
+        positions = _resolve(positions, buffer)
+        for position, row in zip(positions.tolist(), zip(*columns)):
+            event = cls.__new__(cls)
+            event.__dict__ = dict(zip(names, row))
+            events[position] = event
+
+    dts = pd.DatetimeIndex(_resolve(block['dts'], buffer), tz='UTC')
+    return [(dt, events[offsets[i]:offsets[i + 1]])
+            for i, dt in enumerate(dts)]
+
+
+def _produce(algo, sim_params, source_filter, queue, ring, free,
+             block_size):
+    """
+    Worker process: put the blocks of the algorithm's snapshot stream on
+    @queue, as (slot, block) pairs, then None.  The arrays of a block are
+    stored in a free slot of @ring when they fit; the slot is None
+    otherwise.  If the stream fails, the traceback is put instead.
+    """
+    def send(snapshots):
+        block = encode_block(snapshots)
+        slot = free.get()
+        shared = share_block(block, ring[slot])
+        if shared is None:
+            free.put(slot)
+            queue.put((None, block))
+        else:
+            queue.put((slot, shared))
+
+    try:
+        block = []
+        stream = algo._create_data_generator(source_filter, sim_params)
+        for dt, snapshot in stream:
+            block.append((dt, list(snapshot)))
+            if len(block) >= block_size:
+                send(block)
+                block = []
+        if block:
+            send(block)
+        queue.put(None)
+    except Exception:
+        queue.put(traceback.format_exc())
+
+
+def pipelined_stream(algo, sim_params, source_filter=None,
+                     block_size=DEFAULT_BLOCK_SIZE,
+                     max_blocks=DEFAULT_MAX_BLOCKS,
+                     slot_bytes=DEFAULT_SLOT_BYTES):
+    """
+    Yield the (dt, snapshot) pairs of @algo's data generator, produced by a
+    worker process.
+    """
+    ctx = _context()
+    queue = ctx.Queue(max_blocks)
+
+    # The ring is allocated before the fork, so the worker inherits it.
+    ring = [np.frombuffer(ctx.RawArray('b', slot_bytes), dtype=np.uint8)
+            for _ in range(max_blocks)]
+    free = ctx.Queue()
+    for slot in range(max_blocks):
+        free.put(slot)
+
+    worker = ctx.Process(
+        target=_produce,
+        args=(algo, sim_params, source_filter, queue, ring, free,
+              block_size),
+    )
+    worker.daemon = True
+    worker.start()
+
+    try:
+        while True:
+            try:
+                message = queue.get(timeout=WORKER_POLL_INTERVAL)
+            except Queue.Empty:
+                if not worker.is_alive():
+                    raise PipelineWorkerError(
+                        traceback='exited with code {0}'.format(
+                            worker.exitcode))
+                continue
+
+            if message is None:
+                break
+            if isinstance(message, string_types):
+                raise PipelineWorkerError(traceback=message)
+
+            slot, block = message
+            if slot is None:
+                snapshots = decode_block(block)
+            else:
+                snapshots = decode_block(block, ring[slot])
+                free.put(slot)
+
+            for snapshot in snapshots:
+                yield snapshot
+    finally:
+        if worker.is_alive():
+            worker.terminate()
+        worker.join()
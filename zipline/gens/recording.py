@@ -0,0 +1,199 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Record and replay of the merged snapshot stream fed to the simulator.
+
+Preparing the stream, i.e. running the sources, merging them with the
+benchmark and applying the transforms, gives the same snapshots every time
+the inputs are the same.  A recording stores those snapshots in a binary
+file named after a hash of the inputs, so later runs over the same inputs
+can replay the file instead of preparing the stream again.
+"""
+
+from hashlib import md5
+import os
+
+import pandas as pd
+from six import b
+from six.moves import cPickle as pickle
+
+from zipline.sources.benchmark_source import benchmark_slice
+
+# Bump when the format of the recordings, or of the events in them,
+# changes, so that older recordings are not replayed.
+RECORDING_VERSION = 1
+
+RECORDING_EXTENSION = '.stream'
+
+
+def _update_with_pandas(hasher, data):
+    hasher.update(b(type(data).__name__))
+    for axis in data.axes:
+        hasher.update(b(repr(list(axis))))
+    values = data.values
+    if values.dtype == object:
+        # The bytes of an object array are the addresses of its objects.
+        hasher.update(b(repr(values.tolist())))
+    else:
+        hasher.update(values.tostring())
+
+
+def _source_fingerprint(source):
+    """
+    A string identifying the events @source produces, or None if there is no
+    way to tell.
+
+    Only the content of the pandas sources is hashed.  Other sources have to
+    opt in by defining a content_fingerprint method, whose result must change
+    whenever their events would; their get_hash is not enough, e.g. the one
+    of RandomWalkSource leaves out most of its parameters, and its events are
+    random anyway.
+    """
+    data = getattr(source, 'data', None)
+    if isinstance(data, (pd.DataFrame, pd.Panel)):
+        # The hashes of the pandas sources only cover the repr of the
+        # data, which elides most of it.
+        hasher = md5()
+        _update_with_pandas(hasher, data)
+        return '{0}-{1}-{2}'.format(type(source).__name__,
+                                    source.get_hash(),
+                                    hasher.hexdigest())
+
+    content_fingerprint = getattr(source, 'content_fingerprint', None)
+    if content_fingerprint is None:
+        return None
+    return '{0}-{1}'.format(type(source).__name__, content_fingerprint())
+
+
+def _sim_params_fingerprint(sim_params):
+    """
+    The fields of @sim_params that shape the snapshot stream.  The emission
+    policy only affects the messages built from the snapshots, and the repr
+    of a callable policy holds its address, so it is left out.
+    """
+    return repr((
+        str(sim_params.period_start),
+        str(sim_params.period_end),
+        sim_params.data_frequency,
+        sim_params.emission_rate,
+        str(sim_params.first_open),
+        str(sim_params.last_close),
+        sorted(sim_params.sids or []),
+    ))
+
+
+def _transform_fingerprint(tnfm):
+    arg_string = getattr(tnfm, 'arg_string', None)
+    if arg_string is None:
+        return None
+    return '{0}-{1}-{2}'.format(tnfm.namestring,
+                                type(tnfm.state).__name__,
+                                arg_string)
+
+
+def stream_key(sources, transforms, sim_params, benchmark_source=None):
+    """
+    A hash of everything that determines the snapshot stream of a
+    simulation, or None if any of @sources, @transforms or @benchmark_source
+    can't be identified, in which case the stream should not be recorded.
+
+    The returns of the default benchmark are hashed, so updating the
+    benchmark data invalidates the recordings using it.
+    """
+    parts = ['version={0}'.format(RECORDING_VERSION),
+             _sim_params_fingerprint(sim_params)]
+
+    for source in sources:
+        fingerprint = _source_fingerprint(source)
+        if fingerprint is None:
+            return None
+        parts.append(fingerprint)
+
+    for tnfm in transforms:
+        fingerprint = _transform_fingerprint(tnfm)
+        if fingerprint is None:
+            return None
+        parts.append(fingerprint)
+
+    hasher = md5()
+    for part in parts:
+        hasher.update(b(part))
+
+    if benchmark_source is None:
+        dts, returns = benchmark_slice(sim_params)
+        hasher.update(b(repr(dts)))
+        hasher.update(returns.tostring())
+    else:
+        fingerprint = _source_fingerprint(benchmark_source)
+        if fingerprint is None:
+            return None
+        hasher.update(b(fingerprint))
+
+    return hasher.hexdigest()
+
+
+def recording_path(directory, key):
+    return os.path.join(directory, key + RECORDING_EXTENSION)
+
+
+def record_stream(stream, path):
+    """
+    Yield the (dt, snapshot) pairs of @stream, writing them to @path as they
+    go.  The snapshots are yielded as lists, since they are iterated more
+    than once.
+
+    The file is written under a temporary name and only moved to @path once
+    the stream is exhausted, so a partial run never leaves a recording
+    behind.
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    tmp_path = '{path}.{pid}.tmp'.format(path=path, pid=os.getpid())
+    complete = False
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(RECORDING_VERSION, f, pickle.HIGHEST_PROTOCOL)
+            for dt, snapshot in stream:
+                snapshot = list(snapshot)
+                # Dump before yielding, the simulator may modify the events.
+                pickle.dump((dt, snapshot), f, pickle.HIGHEST_PROTOCOL)
+                yield dt, snapshot
+        os.rename(tmp_path, path)
+        complete = True
+    finally:
+        if not complete and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def replay_stream(path):
+    """
+    Yield the (dt, snapshot) pairs recorded in @path.
+    """
+    with open(path, 'rb') as f:
+        version = pickle.load(f)
+        if version != RECORDING_VERSION:
+            raise ValueError(
+                "Recording {path} has version {version}, expected "
+                "{expected}.".format(path=path, version=version,
+                                     expected=RECORDING_VERSION)
+            )
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
@@ -12,8 +12,11 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from logbook import Logger, Processor
+from collections import deque
+
+from logbook import Logger, NestedSetup, Processor
 from pandas.tslib import normalize_date
+from six import iteritems
 
 from zipline.finance import trading
 from zipline.protocol import (
@@ -67,6 +70,30 @@ class AlgorithmSimulator(object):
         # receive a message.
         self.simulation_dt = None
 
+        # The open and close of the current market day, set by start.
+        self.mkt_open = None
+        self.mkt_close = None
+
+        # Whether perf messages carry a copy of the recorded variables.
+        # Consumers that read the algorithm's recorder instead can turn
+        # this off.
+        self.emit_recorded_vars = True
+
+        # The algorithm's ProgressReporter, if any.
+        self.progress = getattr(algo, 'progress', None)
+
+        # ============
+        # Warmup Setup
+        # ============
+
+        # Events before algo_start are only used to prime state.  Until the
+        # first snapshot at or after algo_start, we collect the latest
+        # values per sid and the trailing bars needed by history, and apply
+        # them all at once in finish_warmup.
+        self.warming_up = False
+        self.warmup_data = {}
+        self.warmup_bars = None
+
         # =============
         # Logging Setup
         # =============
@@ -84,104 +111,299 @@ class AlgorithmSimulator(object):
             self.algo.perf_tracker.emission_rate]
 
     def process_event(self, event):
+        if (self.algo.skip_idle_bars
+                and event.type == DATASOURCE_TYPE.TRADE
+                and not self.algo.blotter.open_orders.get(event.sid)):
+            # No order can fill on this trade, so it only moves the last
+            # sale price.  Let the tracker apply it lazily.
+            self.algo.perf_tracker.defer_last_sale(event)
+            return
+
         process_trade = self.algo.blotter.process_trade
         for txn, order in process_trade(event):
             self.algo.perf_tracker.process_event(txn)
             self.algo.perf_tracker.process_event(order)
         self.algo.perf_tracker.process_event(event)
 
+    def process_events(self, events):
+        """
+        Process @events in order.  With batch_fills, each run of trades of
+        distinct sids is filled by the blotter at once.
+        """
+        if not self.algo.batch_fills:
+            for event in events:
+                self.process_event(event)
+            return
+
+        run = []
+        sids = set()
+        for event in events:
+            if event.type == DATASOURCE_TYPE.TRADE and event.sid not in sids:
+                run.append(event)
+                sids.add(event.sid)
+                continue
+
+            self.process_trades(run)
+            run = []
+            sids = set()
+            if event.type == DATASOURCE_TYPE.TRADE:
+                run.append(event)
+                sids.add(event.sid)
+            else:
+                self.process_event(event)
+
+        self.process_trades(run)
+
+    def process_trades(self, trades):
+        """
+        process_event for trades of distinct sids, filled together.
+        """
+        if not trades:
+            return
+
+        perf_tracker = self.algo.perf_tracker
+        open_orders = self.algo.blotter.open_orders
+        if self.algo.skip_idle_bars:
+            idle = [not open_orders.get(trade.sid) for trade in trades]
+        else:
+            idle = [False] * len(trades)
+
+        fillable = [trade for trade, is_idle in zip(trades, idle)
+                    if not is_idle]
+        fills = iter(self.algo.blotter.process_trades(fillable))
+
+        for trade, is_idle in zip(trades, idle):
+            if is_idle:
+                perf_tracker.defer_last_sale(trade)
+                continue
+            for txn, order in next(fills):
+                perf_tracker.process_event(txn)
+                perf_tracker.process_event(order)
+            perf_tracker.process_event(trade)
+
     def transform(self, stream_in):
         """
         Main generator work loop.
         """
-        # Initialize the mkt_close
-        mkt_open = self.algo.perf_tracker.market_open
-        mkt_close = self.algo.perf_tracker.market_close
-
         # inject the current algo
         # snapshot time to any log record generated.
-        with self.processor.threadbound():
-            data_frequency = self.sim_params.data_frequency
-
-            self._call_before_trading_start(mkt_open)
-
-            for date, snapshot in stream_in:
-
-                self.simulation_dt = date
-                self.on_dt_changed(date)
-
-                # If we're still in the warmup period.  Use the event to
-                # update our universe, but don't yield any perf messages,
-                # and don't send a snapshot to handle_data.
-                if date < self.algo_start:
-                    for event in snapshot:
-                        if event.type == DATASOURCE_TYPE.SPLIT:
-                            self.algo.blotter.process_split(event)
-
-                        elif event.type in (DATASOURCE_TYPE.TRADE,
-                                            DATASOURCE_TYPE.CUSTOM):
-                            self.update_universe(event)
-                        self.algo.perf_tracker.process_event(event)
-                else:
-                    message = self._process_snapshot(
-                        date,
-                        snapshot,
-                        self.algo.instant_fill,
-                    )
-                    # Perf messages are only emitted if the snapshot contained
-                    # a benchmark event.
-                    if message is not None:
+        with self.log_context():
+            try:
+                self.start()
+
+                for date, snapshot in stream_in:
+                    for message in self.step(date, snapshot):
                         yield message
 
-                    # When emitting minutely, we re-iterate the day as a
-                    # packet with the entire days performance rolled up.
-                    if date == mkt_close:
-                        if self.algo.perf_tracker.emission_rate == 'minute':
-                            daily_rollup = self.algo.perf_tracker.to_dict(
-                                emission_type='daily'
-                            )
-                            daily_rollup['daily_perf']['recorded_vars'] = \
-                                self.algo.recorded_vars
-                            yield daily_rollup
-                            tp = self.algo.perf_tracker.todays_performance
-                            tp.rollover()
-
-                        if mkt_close <= self.algo.perf_tracker.last_close:
-                            before_last_close = \
-                                mkt_close < self.algo.perf_tracker.last_close
-                            try:
-                                mkt_open, mkt_close = \
-                                    trading.environment \
-                                           .next_open_and_close(mkt_close)
-
-                            except trading.NoFurtherDataError:
-                                # If at the end of backtest history,
-                                # skip advancing market close.
-                                pass
-                            if (self.algo.perf_tracker.emission_rate
-                                    == 'minute'):
-                                self.algo.perf_tracker\
-                                         .handle_intraday_market_close(
-                                             mkt_open,
-                                             mkt_close)
-
-                            if before_last_close:
-                                self._call_before_trading_start(mkt_open)
-
-                    elif data_frequency == 'daily':
-                        next_day = trading.environment.next_trading_day(date)
-
-                        if (next_day is not None
-                                and next_day
-                                < self.algo.perf_tracker.last_close):
-                            self._call_before_trading_start(next_day)
-
-                    self.algo.portfolio_needs_update = True
-                    self.algo.account_needs_update = True
-                    self.algo.performance_needs_update = True
-
-            risk_message = self.algo.perf_tracker.handle_simulation_end()
-            yield risk_message
+                yield self.finish()
+            finally:
+                self.flush_logs()
+
+    def log_context(self):
+        """
+        The logbook setup to bind while the simulation runs: the processor
+        injecting algo_dt, and the algorithm's log handler if it set one.
+        """
+        handler = getattr(self.algo, 'log_handler', None)
+        if handler is None:
+            return self.processor.threadbound()
+        return NestedSetup([self.processor, handler]).threadbound()
+
+    def flush_logs(self):
+        """
+        Write the records kept by the algorithm's log handler and stop its
+        writer thread; the next run starts a new one.
+        """
+        handler = getattr(self.algo, 'log_handler', None)
+        if handler is not None:
+            handler.close()
+
+    def start(self):
+        """
+        Prepare for the first snapshot.  transform calls this, drivers that
+        push snapshots through step have to call it themselves.
+        """
+        # Initialize the mkt_close
+        self.mkt_open = self.algo.perf_tracker.market_open
+        self.mkt_close = self.algo.perf_tracker.market_close
+
+        self._call_before_trading_start(self.mkt_open)
+
+        if self.progress is not None:
+            self.progress.start(self.algo.perf_tracker)
+
+    def step(self, date, snapshot):
+        """
+        Process the events of a single datetime, yielding the perf messages
+        they produce.  Snapshots must be stepped in datetime order.
+        """
+        # If we're still in the warmup period.  Use the event to
+        # update our universe, but don't yield any perf messages,
+        # and don't send a snapshot to handle_data.
+        if date < self.algo_start:
+            self.warmup(date, snapshot)
+            return
+
+        if self.warming_up:
+            self.finish_warmup()
+
+        self.simulation_dt = date
+        self.on_dt_changed(date)
+
+        message = self._process_snapshot(
+            date,
+            snapshot,
+            self.algo.instant_fill,
+        )
+        # Perf messages are only emitted if the snapshot contained
+        # a benchmark event.
+        if message is not None:
+            yield message
+
+        mkt_close = self.mkt_close
+
+        # When emitting minutely, we re-iterate the day as a
+        # packet with the entire days performance rolled up.
+        if date == mkt_close:
+            if self.algo.perf_tracker.emission_rate == 'minute':
+                self.algo.perf_tracker.record_results()
+                daily_rollup = self.algo.perf_tracker.to_dict(
+                    emission_type='daily'
+                )
+                self._add_recorded_vars(daily_rollup['daily_perf'],
+                                        daily=True)
+                yield daily_rollup
+                tp = self.algo.perf_tracker.todays_performance
+                tp.rollover()
+
+            if mkt_close <= self.algo.perf_tracker.last_close:
+                before_last_close = \
+                    mkt_close < self.algo.perf_tracker.last_close
+                try:
+                    self.mkt_open, self.mkt_close = \
+                        trading.environment.next_open_and_close(mkt_close)
+
+                except trading.NoFurtherDataError:
+                    # If at the end of backtest history,
+                    # skip advancing market close.
+                    pass
+                if self.algo.perf_tracker.emission_rate == 'minute':
+                    self.algo.perf_tracker.handle_intraday_market_close(
+                        self.mkt_open,
+                        self.mkt_close)
+
+                if before_last_close:
+                    self._call_before_trading_start(self.mkt_open)
+
+        elif self.sim_params.data_frequency == 'daily':
+            next_day = trading.environment.next_trading_day(date)
+
+            if (next_day is not None
+                    and next_day < self.algo.perf_tracker.last_close):
+                self._call_before_trading_start(next_day)
+
+        self.algo.portfolio_needs_update = True
+        self.algo.account_needs_update = True
+        self.algo.performance_needs_update = True
+
+        if self.progress is not None:
+            self.progress.bar(date)
+
+    def finish(self):
+        """
+        End the simulation, returning the risk message.
+        """
+        risk_message = self.algo.perf_tracker.handle_simulation_end()
+        if self.progress is not None:
+            self.progress.finish(self.simulation_dt)
+        return risk_message
+
+    def warmup(self, dt, snapshot):
+        """
+        Record a snapshot from before algo_start.
+
+        The algorithm isn't called and its dt isn't advanced, so no new
+        orders are placed and the open orders restored from initial_state
+        don't fill.  Splits are applied to those orders and to the perf
+        tracker's positions; the trades are not seen by the perf tracker.
+        Only the latest values per sid are kept for the universe, and only
+        as many trailing bars as the history container can use.
+        """
+        self.warming_up = True
+
+        history_container = self.algo.history_container
+        if history_container is not None and self.warmup_bars is None:
+            self.warmup_bars = deque(maxlen=history_container.warmup_bars)
+
+        bar = {}
+        for event in snapshot:
+            if event.type == DATASOURCE_TYPE.TRADE:
+                bar[event.sid] = event
+                self.warmup_data.setdefault(event.sid, {}) \
+                                .update(event.__dict__)
+
+            elif event.type == DATASOURCE_TYPE.CUSTOM:
+                self.warmup_data.setdefault(event.sid, {}) \
+                                .update(event.__dict__)
+
+            elif event.type == DATASOURCE_TYPE.SPLIT:
+                self.algo.blotter.process_split(event)
+                self.algo.perf_tracker.process_event(event)
+
+        if bar and self.warmup_bars is not None:
+            self.warmup_bars.append((dt, bar))
+
+    def finish_warmup(self):
+        """
+        Apply the state collected by warmup, before the first snapshot at or
+        after algo_start is processed.
+        """
+        for sid, values in iteritems(self.warmup_data):
+            try:
+                sid_data = self.current_data[sid]
+            except KeyError:
+                sid_data = self.current_data[sid] = SIDData(sid)
+            sid_data.__dict__.update(values)
+
+        bars = self.warmup_bars
+
+        self.warming_up = False
+        self.warmup_data = {}
+        self.warmup_bars = None
+
+        if bars:
+            self.prime_history(bars)
+
+    def prime_history(self, bars):
+        """
+        Rebuild the algorithm's history container from the first of the
+        trailing warmup @bars, a sequence of (dt, {sid: trade}), and feed it
+        the bars, so that history windows are full from the first call to
+        handle_data.
+
+        The container watches the sids of the simulation and those traded
+        during the warmup, since the simulation's sids aren't always known
+        up front.
+        """
+        algo = self.algo
+        first_dt = bars[0][0]
+        sids = set(algo.sim_params.sids or ())
+        for _, bar in bars:
+            sids.update(bar)
+        history_container = algo.history_container_class(
+            algo.history_specs,
+            sids,
+            first_dt,
+            algo.sim_params.data_frequency,
+        )
+        for dt, bar in bars:
+            data = BarData({
+                sid: SIDData(sid, event.__dict__)
+                for sid, event in iteritems(bar)
+            })
+            history_container.update(data, dt)
+
+        algo.history_container = history_container
 
     def _process_snapshot(self, dt, snapshot, instant_fill):
         """
@@ -203,12 +425,12 @@ class AlgorithmSimulator(object):
         # Flags indicating whether we saw any events of type TRADE and type
         # BENCHMARK.  Respectively, these control whether or not handle_data is
         # called for this snapshot and whether we emit a perf message for this
-        # snapshot.
+        # snapshot.  A trade also gets a minute message if the emission
+        # policy asks for trade minutes.
         any_trade_occurred = False
         benchmark_event_occurred = False
 
-        if instant_fill:
-            events_to_be_processed = []
+        events_to_be_processed = []
 
         for event in snapshot:
 
@@ -223,12 +445,17 @@ class AlgorithmSimulator(object):
                 self.update_universe(event)
 
             elif event.type == DATASOURCE_TYPE.SPLIT:
+                if not instant_fill:
+                    # The orders fill against the trades before the split
+                    # at their pre-split amounts and prices.
+                    self.process_events(events_to_be_processed)
+                    events_to_be_processed = []
                 self.algo.blotter.process_split(event)
 
-            if not instant_fill:
-                self.process_event(event)
-            else:
-                events_to_be_processed.append(event)
+            events_to_be_processed.append(event)
+
+        if not instant_fill:
+            self.process_events(events_to_be_processed)
 
         if any_trade_occurred:
             new_orders = self._call_handle_data()
@@ -239,14 +466,26 @@ class AlgorithmSimulator(object):
             # Now that handle_data has been called and orders have been placed,
             # process the event stream to fill user orders based on the events
             # from this snapshot.
-            for event in events_to_be_processed:
-                self.process_event(event)
+            self.process_events(events_to_be_processed)
 
         if benchmark_event_occurred:
             return self.get_message(dt)
+        elif any_trade_occurred and self.emits_trade_minute(dt):
+            # Benchmark events only come at the market close.
+            return self.get_message(dt)
         else:
             return None
 
+    def emits_trade_minute(self, dt):
+        """
+        Whether a minute perf message is emitted for the market minute @dt,
+        which has a trade but no benchmark event.
+        """
+        tracker = self.algo.perf_tracker
+        policy = tracker.emission_policy
+        return (tracker.emission_rate == 'minute' and
+                policy.trade_minutes and policy.emit_minute(dt))
+
     def _call_handle_data(self):
         """
         Call the user's handle_data, returning any orders placed by the algo
@@ -265,8 +504,25 @@ class AlgorithmSimulator(object):
         dt = normalize_date(dt)
         self.simulation_dt = dt
         self.on_dt_changed(dt)
+        self._archive_orders(dt)
         self.algo.before_trading_start()
 
+    def _archive_orders(self, dt):
+        """
+        Archive the orders that the blotter's retention no longer keeps in
+        memory at the start of the market day @dt.
+        """
+        blotter = self.algo.blotter
+        if blotter.retention is None:
+            return
+        try:
+            before = trading.environment.add_trading_days(-blotter.retention,
+                                                          dt)
+        except trading.NoFurtherDataError:
+            return
+        if before is not None:
+            blotter.archive_orders(before)
+
     def on_dt_changed(self, dt):
         if self.algo.datetime != dt:
             self.algo.on_dt_changed(dt)
@@ -281,19 +537,33 @@ class AlgorithmSimulator(object):
         self.algo.updated_portfolio()
         self.algo.updated_account()
 
-        rvars = self.algo.recorded_vars
         if self.algo.perf_tracker.emission_rate == 'daily':
             perf_message = \
                 self.algo.perf_tracker.handle_market_close_daily()
-            perf_message['daily_perf']['recorded_vars'] = rvars
+            self._add_recorded_vars(perf_message['daily_perf'], daily=True)
             return perf_message
 
         elif self.algo.perf_tracker.emission_rate == 'minute':
+            # The minute close always has to be processed to keep the risk
+            # metrics up to date, but building the message is skipped
+            # when the emission policy doesn't ask for it.
             self.algo.perf_tracker.handle_minute_close(dt)
+            if not self.algo.perf_tracker.emission_policy.emit_minute(dt):
+                return None
             perf_message = self.algo.perf_tracker.to_dict()
-            perf_message['minute_perf']['recorded_vars'] = rvars
+            self._add_recorded_vars(perf_message['minute_perf'], daily=False)
             return perf_message
 
+    def _add_recorded_vars(self, perf, daily):
+        """
+        Store the day's row of recorded variables, and copy them into the
+        message if they are emitted.
+        """
+        if daily:
+            self.algo.recorder.append_row(perf['period_close'])
+        if self.emit_recorded_vars:
+            perf['recorded_vars'] = self.algo.recorded_vars
+
     def update_universe(self, event):
         """
         Update the universe with new event information.
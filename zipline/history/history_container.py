@@ -247,6 +247,17 @@ class HistoryContainer(object):
             dtype=np.float64,
         )
 
+    @property
+    def warmup_bars(self):
+        """
+        The number of bars, at the data frequency, needed to fill the
+        largest window of every frequency.
+        """
+        return max(
+            (spec.bar_count + 1) * spec.frequency.max_bars
+            for spec in itervalues(self.largest_specs)
+        )
+
     @property
     def ffillable_fields(self):
         return self.fields.intersection(HistorySpec.FORWARD_FILLABLE)
@@ -0,0 +1,114 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark return events for a simulation, built from the trading
+environment's benchmark returns.
+
+The slice of the benchmark history covering a simulation is found by
+binary search, and its event datetimes are computed in one vectorized
+lookup.  The sliced arrays are cached per environment, so repeated runs over
+the same period only pay for creating the events.
+"""
+
+from collections import OrderedDict
+import weakref
+
+from pandas.tseries.tools import normalize_date
+from six.moves import zip
+
+from zipline.finance import trading
+from zipline.protocol import Event, DATASOURCE_TYPE
+
+# How many (period, frequency) slices to keep per environment.
+MAX_CACHED_SLICES = 64
+
+# environment -> OrderedDict of slice key -> (dts, returns), least recently
+# used first.
+_slice_cache = weakref.WeakKeyDictionary()
+
+
+def clear_cache():
+    _slice_cache.clear()
+
+
+def _compute_slice(env, start, end, minute):
+    returns = env.benchmark_returns
+    index = returns.index
+
+    lo = index.searchsorted(normalize_date(start))
+    hi = index.searchsorted(normalize_date(end), side='right')
+
+    days = index[lo:hi]
+    values = returns.values[lo:hi]
+
+    if minute:
+        # Minute benchmark events happen at the market close.
+        dts = env.open_and_closes['market_close'].loc[days].tolist()
+    else:
+        dts = days.tolist()
+
+    return dts, values
+
+
+def benchmark_slice(sim_params, env=None):
+    """
+    The (dts, returns) of the benchmark events between the first and last
+    days of @sim_params, inclusive.
+    """
+    if env is None:
+        env = trading.environment
+
+    minute = (sim_params.data_frequency == 'minute' or
+              sim_params.emission_rate == 'minute')
+    key = (
+        # Invalidate if the environment's returns are replaced.
+        id(env.benchmark_returns),
+        normalize_date(sim_params.period_start),
+        normalize_date(sim_params.period_end),
+        minute,
+    )
+
+    try:
+        slices = _slice_cache[env]
+    except KeyError:
+        slices = _slice_cache[env] = OrderedDict()
+
+    try:
+        cached = slices.pop(key)
+    except KeyError:
+        cached = _compute_slice(env,
+                                sim_params.period_start,
+                                sim_params.period_end,
+                                minute)
+        if len(slices) >= MAX_CACHED_SLICES:
+            slices.popitem(last=False)
+
+    slices[key] = cached
+    return cached
+
+
+def benchmark_events(sim_params, env=None):
+    """
+    The list of BENCHMARK events for a simulation over @sim_params.
+    """
+    dts, returns = benchmark_slice(sim_params, env)
+    return [
+        Event({'dt': dt,
+               'returns': ret,
+               'type': DATASOURCE_TYPE.BENCHMARK,
+               'source_id': 'benchmarks'})
+        for dt, ret in zip(dts, returns)
+    ]
@@ -116,7 +116,8 @@ class StatefulTransform(object):
         # save the window_length of the state for external access.
         self.window_length = self.state.window_length
         # Create the string associated with this generator's output.
-        self.namestring = tnfm_class.__name__ + hash_args(*args, **kwargs)
+        self.arg_string = hash_args(*args, **kwargs)
+        self.namestring = tnfm_class.__name__ + self.arg_string
 
     def get_hash(self):
         return self.namestring
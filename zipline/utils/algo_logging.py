@@ -0,0 +1,186 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throttled logging for algorithms.
+
+An algorithm that logs on every bar produces one record per bar per call
+site, each of which is formatted and written before the simulation can move
+on.  An AlgoLogHandler, passed to TradingAlgorithm.set_logger, sits in
+front of the handler that writes the records:
+
+- only every sample_every-th record of each call site (file and line) is
+  considered;
+- of those, each call site keeps at most max_per_period records per period
+  of simulation time, so the same records are kept on every run.  Records
+  logged outside of a simulation, which have no algo_dt, are counted by the
+  wall clock time they were logged at instead;
+- the kept records are formatted and written by a background thread.
+
+Records that are dropped are never formatted.  The number dropped per call
+site is available from suppressed.
+
+Only the records of the algorithm's logger are throttled; zipline's own
+records, and those of any other logger, are passed on to the handlers
+further down the stack.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+import threading
+
+import logbook
+import pytz
+from six.moves import queue as Queue
+
+# Put on the queue to stop the writer thread.
+_STOP = object()
+
+
+class _CallSite(object):
+    __slots__ = ['window_start', 'window_count', 'seen']
+
+    def __init__(self):
+        self.window_start = None
+        self.window_count = 0
+        self.seen = 0
+
+
+class AlgoLogHandler(logbook.Handler):
+    """
+    Throttle the records of an algorithm and hand the ones kept to
+    @handler.
+
+    max_per_period : int <default: None>
+        Records kept per call site per @period of simulation time.  No
+        limit by default.
+    period : timedelta <default: 1 day>
+    sample_every : int <default: 1>
+        Keep one record out of every @sample_every per call site.
+    threaded : bool <default: True>
+        Hand the records to @handler on a background thread.
+    channel : str <default: None>
+        Name of the logger whose records are handled; the others are
+        left to the next handler.  TradingAlgorithm.set_logger sets it to
+        the name of the algorithm's logger.  All records are handled if
+        None.
+    """
+
+    def __init__(self, handler, max_per_period=None,
+                 period=timedelta(days=1), sample_every=1, threaded=True,
+                 channel=None, level=logbook.NOTSET, filter=None,
+                 bubble=False):
+        super(AlgoLogHandler, self).__init__(level, filter, bubble)
+        self.handler = handler
+        self.channel = channel
+        self.max_per_period = max_per_period
+        self.period = period
+        self.sample_every = sample_every
+        self.threaded = threaded
+
+        self._sites = defaultdict(_CallSite)
+        self.suppressed = defaultdict(int)
+
+        self._queue = None
+        self._thread = None
+
+    def should_handle(self, record):
+        return (super(AlgoLogHandler, self).should_handle(record) and
+                (self.channel is None or record.channel == self.channel))
+
+    def _keep(self, record):
+        key = (record.filename, record.lineno)
+        site = self._sites[key]
+        site.seen += 1
+
+        if (site.seen - 1) % self.sample_every:
+            self.suppressed[key] += 1
+            return False
+
+        if self.max_per_period is not None:
+            dt = record.extra.get('algo_dt')
+            if dt is None:
+                dt = record.time
+                if dt.tzinfo is None:
+                    dt = dt.replace(tzinfo=pytz.utc)
+            # The window also restarts when the time goes back, e.g. from
+            # the wall clock to a simulation.
+            if (site.window_start is None or
+                    not site.window_start <= dt <
+                    site.window_start + self.period):
+                site.window_start = dt
+                site.window_count = 0
+            if site.window_count >= self.max_per_period:
+                self.suppressed[key] += 1
+                return False
+            site.window_count += 1
+
+        return True
+
+    def emit(self, record):
+        if not self._keep(record):
+            return
+
+        if not self.threaded:
+            self.handler.handle(record)
+            return
+
+        # Fetch everything that depends on the calling frame or thread
+        # before the record changes threads.
+        record.pull_information()
+        if self._thread is None:
+            self._start()
+        self._queue.put(record)
+
+    def _start(self):
+        self._queue = Queue.Queue()
+        self._thread = threading.Thread(target=self._write,
+                                        name='AlgoLogHandler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _write(self):
+        while True:
+            record = self._queue.get()
+            try:
+                if record is _STOP:
+                    return
+                self.handler.handle(record)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        Wait until every record kept so far has been written.
+        """
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        """
+        Write the pending records and stop the writer thread.
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
+
+    def reset(self):
+        """
+        Forget the rate limit and sampling state, e.g. between runs.
+        """
+        self._sites.clear()
+        self.suppressed.clear()
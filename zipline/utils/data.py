@@ -13,9 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import OrderedDict
+from datetime import datetime
+
 import numpy as np
 import pandas as pd
 from copy import deepcopy
+from six import integer_types, iteritems
 
 
 def _ensure_index(x):
@@ -336,3 +340,122 @@ class MutableIndexRollingPanel(object):
             self.buffer.loc[non_nan_items, :, non_nan_cols])
 
         self.buffer = new_buffer
+
+
+_INT_TYPES = integer_types + (np.integer,)
+_FLOAT_TYPES = (float, np.floating)
+
+
+def _column_kind(value):
+    if isinstance(value, (bool, np.bool_)):
+        return object
+    if isinstance(value, _INT_TYPES):
+        return np.int64
+    if isinstance(value, _FLOAT_TYPES):
+        return np.float64
+    return object
+
+
+# The kind a column has to become to hold a value of another kind.
+_PROMOTIONS = {
+    (np.int64, np.float64): np.float64,
+    (np.float64, np.int64): np.float64,
+}
+
+
+class GrowableColumns(object):
+    """
+    Rows of named values, indexed by dt, stored as one preallocated numpy
+    array per name that doubles in size when full.
+
+    Names whose values are always integers or always floats get typed
+    arrays, anything else an object array.  Rows appended before a name
+    first appears are NaN.
+    """
+
+    def __init__(self, capacity=256):
+        self._initial_capacity = capacity
+        self.clear_rows()
+
+    def clear_rows(self):
+        self._capacity = self._initial_capacity
+        self._size = 0
+        self._columns = OrderedDict()
+        self._dts = []
+
+    def __len__(self):
+        return self._size
+
+    def _new_column(self, kind):
+        if kind is np.int64 and self._size:
+            # The earlier rows are missing, which needs NaN.
+            kind = np.float64
+        column = np.empty(self._capacity, dtype=kind)
+        column[:self._size] = np.nan
+        return column
+
+    def _promote(self, name, column, kind):
+        if column.dtype == kind:
+            return column
+        new_kind = _PROMOTIONS.get((column.dtype.type, kind), object)
+        if column.dtype == new_kind:
+            return column
+        promoted = np.empty(self._capacity, dtype=new_kind)
+        promoted[:self._size] = column[:self._size]
+        self._columns[name] = promoted
+        return promoted
+
+    def _grow(self):
+        self._capacity *= 2
+        for name, column in iteritems(self._columns):
+            grown = np.empty(self._capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append(self, dt, values):
+        """
+        Store the dict @values as the row for @dt.  Names missing from
+        @values are NaN in this row.
+        """
+        if self._size == self._capacity:
+            self._grow()
+
+        row = self._size
+        columns = self._columns
+        for name, value in iteritems(values):
+            kind = _column_kind(value)
+            try:
+                column = columns[name]
+            except KeyError:
+                column = columns[name] = self._new_column(kind)
+            else:
+                column = self._promote(name, column, kind)
+            column[row] = value
+
+        for name, column in list(iteritems(columns)):
+            if name not in values:
+                column = self._promote(name, column, np.float64)
+                column[row] = np.nan
+
+        self._dts.append(dt)
+        self._size += 1
+
+    def columns(self):
+        """
+        (name, array) of every name, one value per row.
+        """
+        return [(name, column[:self._size])
+                for name, column in iteritems(self._columns)]
+
+    def frame(self):
+        """
+        The rows as a DataFrame indexed by their dts.  Object columns that
+        only hold datetimes are converted to datetime columns.
+        """
+        data = OrderedDict()
+        for name, column in self.columns():
+            if (column.dtype == object and len(column) and
+                    all(isinstance(v, datetime) for v in column)):
+                column = pd.to_datetime(list(column))
+            data[name] = column
+        return pd.DataFrame(data, index=pd.DatetimeIndex(self._dts))
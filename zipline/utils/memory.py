@@ -0,0 +1,242 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Memory accounting of a simulation.
+
+memory_footprint measures the approximate number of bytes held by each of
+the components of a running simulation that grow with the length of the run
+or the size of the universe.  A MemoryProfiler, created by TradingAlgorithm
+when profile_memory is set, measures the footprint every few days, and can
+take tracemalloc snapshots of the largest allocations on Pythons that have
+tracemalloc.  Both are included in the algorithm's profile_report.
+
+Each component is measured on its own: an object referenced by two
+components, e.g. an order held by the blotter and by today's performance
+period, is counted in both.  Objects owned by the trading environment and
+the simulation parameters are never counted.
+"""
+
+from collections import deque
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+from six import itervalues
+
+from zipline.finance import trading
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Largest allocations kept per tracemalloc snapshot.
+DEFAULT_TOP_ALLOCATIONS = 10
+
+_PANDAS_TYPES = (pd.Series, pd.DataFrame, pd.Panel)
+
+# Types that don't reference other objects worth following.
+_ATOMIC_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+)
+
+
+def _array_size(array, stack):
+    size = array.nbytes
+    if array.dtype == object:
+        stack.extend(array.ravel().tolist())
+    return size
+
+
+def _pandas_size(obj, seen, stack):
+    size = sys.getsizeof(object())
+    for axis in obj.axes:
+        if id(axis) not in seen:
+            seen.add(id(axis))
+            size += _array_size(np.asarray(axis.values), stack)
+
+    blocks = getattr(getattr(obj, '_data', None), 'blocks', None)
+    if blocks is None:
+        arrays = [np.asarray(obj.values)]
+    else:
+        arrays = [block.values for block in blocks]
+    for array in arrays:
+        size += _array_size(array, stack)
+    return size
+
+
+def sizeof(obj, seen=None):
+    """
+    The approximate number of bytes held by @obj and the objects it
+    references, skipping the objects whose ids are in @seen.  The ids of the
+    objects measured are added to @seen.
+    """
+    if seen is None:
+        seen = set()
+
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _ATOMIC_TYPES):
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, _PANDAS_TYPES):
+            size += _pandas_size(obj, seen, stack)
+            continue
+        if isinstance(obj, np.ndarray):
+            size += _array_size(obj, stack)
+            continue
+
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+
+        attrs = getattr(obj, '__dict__', None)
+        if attrs is not None:
+            stack.append(attrs)
+        for slot in getattr(type(obj), '__slots__', ()):
+            value = getattr(obj, slot, None)
+            if value is not None:
+                stack.append(value)
+
+    return size
+
+
+def _shared_ids(algo):
+    """
+    The ids of the objects shared by the whole simulation, which no
+    component owns.
+    """
+    shared = [algo, trading.environment, algo.sim_params]
+    shared.extend(itervalues(trading.environment.__dict__))
+    shared.extend(itervalues(algo.sim_params.__dict__))
+    return set(map(id, shared))
+
+
+def _components(algo, sink):
+    tracker = algo.perf_tracker
+    components = [
+        ('history_container', algo.history_container),
+        ('blotter.orders', algo.blotter.orders),
+        ('blotter.open_orders', algo.blotter.open_orders),
+        ('recorded_vars', algo.recorder),
+    ]
+    if tracker is not None:
+        components.extend([
+            ('risk.cumulative', tracker.cumulative_risk_metrics),
+            ('risk.intraday', tracker.intraday_risk_metrics),
+            ('processed_transactions',
+             [period.processed_transactions
+              for period in tracker.perf_periods]),
+            ('perf_tracker.returns',
+             [tracker.returns, tracker.all_benchmark_returns]),
+        ])
+    if sink is not None:
+        components.append(('sink', sink))
+    return components
+
+
+def memory_footprint(algo, sink=None):
+    """
+    A Series of the approximate bytes held by each component of @algo's
+    simulation, and by @sink, the PerfSink of the run.
+    """
+    shared = _shared_ids(algo)
+    return pd.Series({
+        name: sizeof(component, seen=set(shared))
+        for name, component in _components(algo, sink)
+        if component is not None
+    })
+
+
+class MemoryProfiler(object):
+    """
+    Measure the memory footprint of a simulation every @interval market
+    days, and take a tracemalloc snapshot every @trace_interval market days
+    if tracemalloc is available.
+    """
+
+    def __init__(self, interval=1, trace_interval=None,
+                 top=DEFAULT_TOP_ALLOCATIONS):
+        self.interval = interval
+        self.trace_interval = trace_interval
+        self.top = top
+
+        self.days = 0
+        self.footprints = {}
+        self.allocations = []
+
+        self._tracing = False
+
+    @property
+    def traces(self):
+        return self.trace_interval is not None and tracemalloc is not None
+
+    def start(self):
+        if self.traces and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+    def stop(self):
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def day(self, dt, algo, sink=None):
+        """
+        Count a completed market day, ending at @dt, measuring if an interval
+        has passed.
+        """
+        self.days += 1
+        if self.interval and self.days % self.interval == 0:
+            self.footprints[dt] = memory_footprint(algo, sink)
+        if self.traces and self.days % self.trace_interval == 0:
+            self.snapshot(dt)
+
+    def snapshot(self, dt):
+        stats = tracemalloc.take_snapshot().statistics('lineno')
+        for rank, stat in enumerate(stats[:self.top]):
+            frame = stat.traceback[0]
+            self.allocations.append({
+                'dt': dt,
+                'rank': rank,
+                'location': '{0}:{1}'.format(frame.filename, frame.lineno),
+                'size': stat.size,
+                'count': stat.count,
+            })
+
+    def report(self):
+        """
+        The footprints, as a DataFrame of bytes per component indexed by
+        day, and the allocations, as a DataFrame of the largest allocations
+        of every snapshot.
+        """
+        memory = pd.DataFrame(self.footprints).T
+        allocations = pd.DataFrame(
+            self.allocations,
+            columns=['dt', 'rank', 'location', 'size', 'count'],
+        )
+        return memory, allocations
@@ -0,0 +1,259 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Date-chunked backtests
+======================
+
+Splits the trading days of a simulation into contiguous chunks and simulates
+each chunk in its own worker process.  Every chunk starts flat, with the
+capital base as cash, so the chunks can run concurrently.
+
+The chunks are then reconciled sequentially, in date order:
+
+  - If the previous chunk ended with no positions and no open orders, and
+    with the cash the chunk was simulated from, the chunk's results are
+    kept.
+
+  - If the cash differs but the algorithm is declared cash independent, i.e.
+    its orders don't depend on its cash or portfolio value, the results are
+    also kept.  Only the cash level differs from a sequential run, so the
+    cash denominated columns are shifted by the difference and
+    returns/leverage are recomputed.
+
+  - Otherwise the chunk is simulated again in the calling process, starting
+    from the cash, positions and open orders the previous chunk ended with.
+
+A chunk that traded rarely ends with exactly the capital base, so unless the
+algorithm is cash independent nearly every chunk is simulated again, and the
+run is no faster than a sequential one.  For cash independent strategies
+that are frequently flat, nearly every chunk is kept, and the run time is
+divided by the number of workers.
+
+Each chunk can start with a warm-up window; events before the chunk's start
+are used to fill the algorithm's universe and history but are not traded on.
+
+The daily stats only hold the fields of each day, which are exact once the
+cash is shifted.  Dividends are not carried across chunks, and no risk report
+is computed over the whole run.
+"""
+
+import multiprocessing
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from zipline.finance import trading
+from zipline.protocol import DATASOURCE_TYPE
+from zipline.finance.trading import SimulationParameters
+
+
+ChunkTask = namedtuple(
+    'ChunkTask',
+    ['algo_factory', 'source_factory', 'sim_params', 'start', 'end',
+     'warmup_days', 'initial_state'],
+)
+
+ChunkResult = namedtuple(
+    'ChunkResult',
+    ['daily_stats', 'start_state', 'end_state'],
+)
+
+
+def chunk_date_ranges(sim_params, chunks):
+    """
+    Split the trading days of @sim_params into at most @chunks contiguous
+    (first_day, last_day) ranges of roughly equal length.
+    """
+    days = sim_params.trading_days
+    chunks = max(1, min(chunks, len(days)))
+    bounds = np.array_split(np.arange(len(days)), chunks)
+    return [(days[b[0]], days[b[-1]]) for b in bounds]
+
+
+def warmup_start(start, warmup_days):
+    """
+    The trading day @warmup_days trading days before @start, clamped to the
+    first day of the trading calendar.
+    """
+    if not warmup_days:
+        return start
+    env = trading.environment
+    idx = max(env.get_index(start) - warmup_days, 0)
+    return env.trading_days[idx]
+
+
+def without_splits_before(source, dt):
+    """
+    Yield the events of @source, except the splits dated before @dt.
+    """
+    for event in source:
+        if event.type == DATASOURCE_TYPE.SPLIT and event.dt < dt:
+            continue
+        yield event
+
+
+def run_chunk(task):
+    """
+    Simulate the date range of a single ChunkTask.
+
+    Module level so that it can be sent to worker processes.
+    """
+    sim_params = task.sim_params
+    chunk_params = SimulationParameters(
+        period_start=task.start,
+        period_end=task.end,
+        capital_base=sim_params.capital_base,
+        emission_rate=sim_params.emission_rate,
+        data_frequency=sim_params.data_frequency,
+        sids=sim_params.sids,
+        emission_policy=sim_params.emission_policy,
+    )
+
+    start_state = task.initial_state
+    if start_state is None:
+        start_state = (sim_params.capital_base, {}, [])
+
+    algo = task.algo_factory(chunk_params)
+    algo.initial_state = start_state
+
+    source = task.source_factory(warmup_start(task.start, task.warmup_days),
+                                 task.end)
+    if not isinstance(source, list):
+        source = [source]
+
+    if task.initial_state is not None and task.warmup_days:
+        # The carried state was taken at the chunk's start, so it already
+        # reflects the splits of the warm-up window.
+        source = [without_splits_before(s, task.start) for s in source]
+
+    daily_stats = algo.run(source, overwrite_sim_params=False)
+    return ChunkResult(daily_stats, start_state, algo.get_state())
+
+
+def shift_cash(daily_stats, offset):
+    """
+    Return a copy of @daily_stats as if the account had held @offset more
+    cash throughout, recomputing the fields that depend on the cash level.
+    """
+    if not offset:
+        return daily_stats
+
+    stats = daily_stats.copy()
+
+    gross_exposure = stats['gross_leverage'] * \
+        (stats['ending_cash'] + stats['ending_value'])
+
+    for field in ('starting_cash', 'ending_cash', 'portfolio_value'):
+        stats[field] += offset
+
+    total_at_start = stats['starting_cash'] + stats['starting_value']
+    stats['returns'] = (stats['pnl'] / total_at_start).where(
+        total_at_start != 0, 0.0)
+    stats['gross_leverage'] = gross_exposure / \
+        (stats['ending_cash'] + stats['ending_value'])
+
+    return stats
+
+
+def reconcile_chunks(tasks, results, cash_independent=False):
+    """
+    Stitch the results of independently simulated chunks back together,
+    re-simulating the chunks whose starting state doesn't match the state the
+    previous chunk ended with.  See the module docstring for details.
+    """
+    frames = []
+    carried = None
+
+    for task, result in zip(tasks, results):
+        offset = 0.0
+
+        if carried is not None:
+            cash, positions, open_orders = carried
+            start_cash, start_positions, start_orders = result.start_state
+            if (positions != start_positions or open_orders or start_orders
+                    or not (cash_independent or
+                            np.isclose(cash, start_cash))):
+                result = run_chunk(task._replace(initial_state=carried))
+            else:
+                offset = cash - start_cash
+
+        frames.append(shift_cash(result.daily_stats, offset))
+
+        end_cash, end_positions, end_orders = result.end_state
+        carried = (end_cash + offset, end_positions, end_orders)
+
+    return pd.concat(frames)
+
+
+def run_chunked(algo_factory,
+                source_factory,
+                sim_params,
+                chunks=None,
+                warmup_days=0,
+                processes=None,
+                cash_independent=False):
+    """
+    Run a backtest over @sim_params as a set of date-chunked simulations.
+
+    :Arguments:
+        algo_factory : callable
+            Called with the SimulationParameters of a chunk, returns a new
+            TradingAlgorithm using those parameters.
+        source_factory : callable
+            Called with (start, end) dates, returns a source (or list of
+            sources) with data covering that range.
+        sim_params : SimulationParameters
+            The full simulation.
+        chunks : int <default: number of cpus>
+            How many date ranges to split the simulation into.
+        warmup_days : int <default: 0>
+            How many trading days of data to feed each chunk before its
+            start, e.g. to fill history windows.
+        processes : int <default: number of cpus>
+            Size of the worker pool.  With a single process the chunks are
+            simulated in the calling process, which doesn't require the
+            factories to be picklable.
+        cash_independent : bool <default: False>
+            Whether the algorithm's orders are the same whatever its cash
+            and portfolio value, e.g. because it orders fixed share amounts.
+            The chunks that start flat are then kept even though they were
+            simulated from the capital base.
+
+    :Returns:
+        daily_stats : pandas.DataFrame
+            The stitched daily performance of all chunks.
+    """
+    if chunks is None:
+        chunks = multiprocessing.cpu_count()
+
+    tasks = [
+        ChunkTask(algo_factory, source_factory, sim_params, start, end,
+                  warmup_days, None)
+        for start, end in chunk_date_ranges(sim_params, chunks)
+    ]
+
+    if processes == 1 or len(tasks) == 1:
+        results = [run_chunk(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(run_chunk, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+    return reconcile_chunks(tasks, results, cash_independent)
@@ -0,0 +1,234 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Phase level profiling of a simulation.
+
+A Profiler replaces methods on the simulation's components with timed
+wrappers, so nothing is timed, and nothing costs anything, unless an
+algorithm is created with profile=True.
+
+Phases nest: a blotter's process_trade calls the slippage model, and the
+simulation loop pulls events from the sources while it processes a bar.  Each
+phase reports its own time, with the time spent in nested phases subtracted,
+as well as its total time.
+"""
+
+from collections import defaultdict
+from functools import WRAPPER_ASSIGNMENTS, wraps
+import time
+
+import pandas as pd
+from six import iteritems
+
+wall_clock = getattr(time, 'perf_counter', time.time)
+cpu_clock = getattr(time, 'process_time', None) or time.clock
+
+PHASE_COLUMNS = ['calls', 'wall', 'cpu', 'total_wall', 'total_cpu']
+
+
+# The value of an attribute that wasn't set on the instrumented object.
+_NOT_SET = object()
+
+
+def uninstrumented(func):
+    """
+    The original of a function instrumented by a Profiler.
+    """
+    return getattr(func, '__profiled__', func)
+
+
+def wraps_any(func):
+    """
+    functools.wraps, for callables that lack some of the attributes it
+    copies, e.g. a functools.partial on Python 2.
+    """
+    return wraps(func, assigned=[attr for attr in WRAPPER_ASSIGNMENTS
+                                 if hasattr(func, attr)])
+
+
+class ProfileReport(object):
+    """
+    The result of a profiled run.
+
+    phases is a DataFrame indexed by phase name, with the number of calls and
+    the wall and cpu seconds spent in each phase, excluding (wall, cpu) and
+    including (total_wall, total_cpu) nested phases.
+
+    bar_latency is a Series counting the bars whose processing took at most
+    the number of microseconds in its index, in powers of two.
+
+    memory is a DataFrame of the approximate bytes held by each component of
+    the simulation, indexed by the days they were measured, and allocations
+    a DataFrame of the largest allocations found by tracemalloc, see
+    zipline.utils.memory.  Both are None unless the memory was profiled.
+    """
+
+    def __init__(self, phases, bar_latency, memory=None, allocations=None):
+        self.phases = phases
+        self.bar_latency = bar_latency
+        self.memory = memory
+        self.allocations = allocations
+
+    def __repr__(self):
+        text = "{name}(\n{phases}\n\nbar latency (us):\n{latency}".format(
+            name=self.__class__.__name__,
+            phases=self.phases,
+            latency=self.bar_latency,
+        )
+        if self.memory is not None:
+            text += "\n\nmemory (bytes):\n{memory}".format(
+                memory=self.memory.tail(1).T)
+        return text + "\n)"
+
+
+class Profiler(object):
+
+    def __init__(self):
+        # phase -> [calls, wall, cpu, total_wall, total_cpu]
+        self.phases = defaultdict(lambda: [0, 0.0, 0.0, 0.0, 0.0])
+        # log2 of the bar latency in microseconds -> number of bars
+        self.bar_latency = defaultdict(int)
+        # (wall, cpu) spent in nested phases, per active phase.
+        self._stack = []
+        # MemoryProfiler measuring the simulation's memory, if any.
+        self.memory = None
+        # (obj, attr, value set on obj before it was instrumented)
+        self._instrumented = []
+
+    def _enter(self):
+        self._stack.append([0.0, 0.0])
+        return wall_clock(), cpu_clock()
+
+    def _exit(self, name, start, histogram=False):
+        wall = wall_clock() - start[0]
+        cpu = cpu_clock() - start[1]
+        nested_wall, nested_cpu = self._stack.pop()
+        if self._stack:
+            parent = self._stack[-1]
+            parent[0] += wall
+            parent[1] += cpu
+
+        stats = self.phases[name]
+        stats[0] += 1
+        stats[1] += wall - nested_wall
+        stats[2] += cpu - nested_cpu
+        stats[3] += wall
+        stats[4] += cpu
+
+        if histogram:
+            self.bar_latency[int(wall * 1e6).bit_length()] += 1
+
+    def wrap(self, name, func, histogram=False):
+        """
+        Return a version of @func that is timed as phase @name.
+        """
+        @wraps_any(func)
+        def timed(*args, **kwargs):
+            start = self._enter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit(name, start, histogram)
+        return timed
+
+    def wrap_generator(self, name, func):
+        """
+        Return a version of the generator function @func whose iteration,
+        rather than creation, is timed as phase @name.
+        """
+        @wraps_any(func)
+        def timed(*args, **kwargs):
+            return self.timed_iter(name, func(*args, **kwargs))
+        return timed
+
+    def timed_iter(self, name, iterable):
+        """
+        Iterate over @iterable, timing every step as phase @name.
+        """
+        it = iter(iterable)
+        while True:
+            start = self._enter()
+            try:
+                value = next(it)
+            except StopIteration:
+                return
+            finally:
+                self._exit(name, start)
+            yield value
+
+    def instrument(self, obj, attr, name, generator=False, histogram=False):
+        """
+        Replace @obj.@attr with a version timed as phase @name.  The wrapper
+        is set on the instance, so only calls through @obj are timed.  If
+        @obj.@attr was instrumented by an earlier profiler, that wrapper is
+        replaced rather than wrapped again.  restore undoes it.
+        """
+        func = uninstrumented(getattr(obj, attr))
+        if generator:
+            timed = self.wrap_generator(name, func)
+        else:
+            timed = self.wrap(name, func, histogram)
+        timed.__profiled__ = func
+        self._instrumented.append((obj, attr, vars(obj).get(attr, _NOT_SET)))
+        setattr(obj, attr, timed)
+
+    def restore(self):
+        """
+        Put back the attributes replaced by instrument, so that the objects
+        aren't timed after the profiled run.
+        """
+        while self._instrumented:
+            obj, attr, value = self._instrumented.pop()
+            if value is _NOT_SET:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, uninstrumented(value))
+
+    def instrument_factory(self, factory, attr, name):
+        """
+        Return a version of @factory which instruments @attr on every object
+        it creates.
+        """
+        factory = uninstrumented(factory)
+
+        @wraps_any(factory)
+        def create(*args, **kwargs):
+            obj = factory(*args, **kwargs)
+            self.instrument(obj, attr, name)
+            return obj
+        create.__profiled__ = factory
+        return create
+
+    def report(self):
+        phases = pd.DataFrame.from_dict(
+            dict(self.phases), orient='index'
+        )
+        if len(phases):
+            phases.columns = PHASE_COLUMNS
+            phases = phases.sort('wall', ascending=False)
+        else:
+            phases = pd.DataFrame(columns=PHASE_COLUMNS)
+
+        bar_latency = pd.Series(
+            {2 ** bucket: count
+             for bucket, count in iteritems(self.bar_latency)},
+            dtype=int,
+        ).sort_index()
+
+        if self.memory is None:
+            return ProfileReport(phases, bar_latency)
+        memory, allocations = self.memory.report()
+        return ProfileReport(phases, bar_latency, memory, allocations)
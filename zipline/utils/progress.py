@@ -0,0 +1,149 @@
+#
+# Copyright 2014 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Progress and throughput of a running simulation.
+
+A ProgressReporter, passed to TradingAlgorithm as progress, is told about
+every bar the simulation processes.  Every interval seconds of wall time, and
+once at the end of the run, it calls its callback with a Progress.  The
+fraction of the simulation completed is the perf tracker's progress, i.e. the
+position of the current bar in the trading calendar between the start and the
+end of the simulation.
+
+A callback that raises ends the run, e.g. when the throughput shows the run
+has stalled.
+"""
+
+from __future__ import division
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from zipline.utils.profiling import wall_clock
+
+DEFAULT_INTERVAL = 10.0
+
+Progress = namedtuple('Progress', [
+    # The simulation datetime of the last bar processed.
+    'dt',
+    # The fraction of the simulation completed, between 0.0 and 1.0.
+    'progress',
+    # Bars, events and transactions processed since the start of the run.
+    'bars',
+    'events',
+    'transactions',
+    # Wall seconds since the start of the run.
+    'elapsed',
+    # Bars and events processed per wall second since the previous report.
+    'bars_per_second',
+    'events_per_second',
+    # Projected wall seconds left, and the projected completion time in
+    # UTC.  None until some progress has been made.
+    'remaining',
+    'eta',
+])
+
+
+class ProgressReporter(object):
+    """
+    Call @callback with a Progress every @interval wall seconds while a
+    simulation runs, and once when it ends.
+    """
+
+    def __init__(self, callback, interval=DEFAULT_INTERVAL, clock=wall_clock):
+        self.callback = callback
+        self.interval = interval
+        self.clock = clock
+
+        self.tracker = None
+        self.last = None
+
+        self._start = None
+        self._next_report = None
+        self._bars = 0
+        self._last_time = None
+        self._last_bars = 0
+        self._last_events = 0
+
+    def start(self, tracker):
+        """
+        Start timing a run whose progress is read from the
+        PerformanceTracker @tracker.
+        """
+        self.tracker = tracker
+        self.last = None
+
+        now = self.clock()
+        self._start = now
+        self._next_report = now + self.interval
+        self._bars = 0
+        self._last_time = now
+        self._last_bars = 0
+        self._last_events = tracker.event_count
+
+    def bar(self, dt):
+        """
+        Count a processed bar, reporting if the interval has passed.
+        """
+        self._bars += 1
+        now = self.clock()
+        if now >= self._next_report:
+            self.report(dt, now)
+
+    def finish(self, dt):
+        """
+        Report the end of the run.
+        """
+        self.report(dt, self.clock())
+
+    def report(self, dt, now):
+        tracker = self.tracker
+        progress = tracker.progress
+        elapsed = now - self._start
+
+        interval = now - self._last_time
+        if interval > 0:
+            bars_per_second = (self._bars - self._last_bars) / interval
+            events_per_second = \
+                (tracker.event_count - self._last_events) / interval
+        else:
+            bars_per_second = events_per_second = 0.0
+
+        if progress > 0:
+            remaining = elapsed * (1.0 - progress) / progress
+            eta = datetime.utcnow() + timedelta(seconds=remaining)
+        else:
+            remaining = eta = None
+
+        self.last = Progress(
+            dt=dt,
+            progress=progress,
+            bars=self._bars,
+            events=tracker.event_count,
+            transactions=tracker.txn_count,
+            elapsed=elapsed,
+            bars_per_second=bars_per_second,
+            events_per_second=events_per_second,
+            remaining=remaining,
+            eta=eta,
+        )
+
+        self._next_report = now + self.interval
+        self._last_time = now
+        self._last_bars = self._bars
+        self._last_events = tracker.event_count
+
+        self.callback(self.last)